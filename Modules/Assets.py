@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+
+from Modules.Journal import latest_offsets, read_record
+from Modules.Pipeline import run_pipeline
+from Modules.ProductIndex import canonical_url
+
+# --- Configuration ---
+ASSET_CONCURRENCY = 8     # Max downloads in flight per asset host
+ASSET_WORKERS = 10        # Products whose assets are being downloaded at once
+ASSET_TIMEOUT = 300       # Seconds allowed for one download (large PDFs)
+MANIFEST_FILE = 'manifest.jsonl'  # Canonical URL -> stored file, one line per finished download
+PARTIAL_DIR = 'partial'           # Interrupted downloads, resumed with a Range request
+
+
+def asset_urls(record):
+    """
+    Absolute URLs of a product's gallery images and technical documents, in
+    order and without duplicates. Handles both layouts: Petzl's
+    {heading: [{'text', 'url'}]} and Edelrid's [{'name', 'link'}].
+    """
+    urls = list((record.get('gallery') or {}).get('full_images') or [])
+    documents = record.get('technical_documents') or []
+    if isinstance(documents, dict):
+        documents = [document for group in documents.values() for document in group]
+    urls += [document.get('url') or document.get('link') for document in documents]
+    return list(dict.fromkeys(urljoin(record['product_url'], url) for url in urls if url))
+
+
+def _content_range_start(headers):
+    match = re.match(r'bytes (\d+)-', headers.get('Content-Range', ''))
+    return int(match.group(1)) if match else 0
+
+
+class _PartialFile:
+    """
+    Stream consumer that writes a download to its partial file and hashes it.
+    A 206 answer continues after the bytes already on disk (which are hashed
+    first); anything else starts the file over. Writes are unbuffered, so an
+    attempt that is abandoned mid-body never flushes stale bytes later.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def begin(self, status, headers):
+        offset = _content_range_start(headers) if status == 206 else 0
+        self._file = open(self.path, 'r+b' if os.path.exists(self.path) else 'wb', buffering=0)
+        self._file.truncate(offset)
+        while self.size < offset:
+            chunk = self._file.read(min(1 << 20, offset - self.size))
+            self._hash.update(chunk)
+            self.size += len(chunk)
+        validator = headers.get('ETag') or headers.get('Last-Modified')
+        with open(self.path + '.validator', 'w', encoding='utf-8') as f:
+            f.write(validator or '')
+
+    def feed(self, chunk):
+        if self._file is None:
+            self.begin(200, {})
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def close(self):
+        if self._file is None:
+            self.begin(200, {})
+        self._file.close()
+        return self._hash.hexdigest(), self.size
+
+
+class AssetStore:
+    """
+    Content-addressed download directory for product assets. Every file is
+    stored once as `<sha256><ext>`, however many URLs serve it (the same
+    safety manual is linked from dozens of products), and every URL is
+    downloaded once per store, keyed by its canonical form. Finished
+    downloads are appended to `manifest.jsonl`, so later runs and resumed
+    runs skip them; unfinished ones stay in `partial/` and continue with an
+    HTTP Range request (plus If-Range, so a changed file starts over).
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.partial_dir = os.path.join(directory, PARTIAL_DIR)
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Half-written last line
+                    self.manifest[entry['url']] = entry
+        self._manifest_file = open(self.manifest_path, 'a', encoding='utf-8')
+        self._in_flight = {}
+        self.downloaded = self.reused = self.duplicates = self.resumed = self.failed = 0
+        self.bytes_downloaded = 0
+
+    def local_path(self, entry):
+        return os.path.join(self.directory, entry['file'])
+
+    def _known(self, key):
+        entry = self.manifest.get(key)
+        return entry if entry and os.path.exists(self.local_path(entry)) else None
+
+    async def fetch(self, fetcher, url):
+        """Returns the local path of `url`'s content, downloading it unless already stored; None on failure."""
+        key = canonical_url(url)
+        if entry := self._known(key):
+            self.reused += 1
+            return self.local_path(entry)
+        if key in self._in_flight:
+            self.reused += 1  # Another product is downloading it right now
+        else:
+            self._in_flight[key] = asyncio.ensure_future(self._download(fetcher, url, key))
+        entry = await asyncio.shield(self._in_flight[key])
+        return self.local_path(entry) if entry else None
+
+    async def _download(self, fetcher, url, key):
+        partial = os.path.join(self.partial_dir, hashlib.sha1(key.encode('utf-8')).hexdigest())
+        headers = {}
+        if os.path.exists(partial) and os.path.getsize(partial):
+            headers['Range'] = f'bytes={os.path.getsize(partial)}-'
+            if os.path.exists(partial + '.validator'):
+                with open(partial + '.validator', encoding='utf-8') as f:
+                    if validator := f.read():
+                        headers['If-Range'] = validator
+            self.resumed += 1
+        try:
+            digest, size = await fetcher.stream(url, lambda: _PartialFile(partial), headers=headers,
+                                                timeout=ASSET_TIMEOUT, endpoint='asset')
+        except aiohttp.ClientResponseError as e:
+            if e.status == 416 and os.path.exists(partial):
+                os.remove(partial)  # The partial file no longer fits the asset; start over next time
+            print(f"  - Could not download {url}: HTTP Status {e.status}")
+            self.failed += 1
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"  - Could not download {url}: {e or type(e).__name__}")
+            self.failed += 1
+            return None
+        finally:
+            self._in_flight.pop(key, None)
+
+        extension = os.path.splitext(urlsplit(url).path)[1].lower()
+        file_name = digest + (extension if re.fullmatch(r'\.[a-z0-9]{1,5}', extension) else '')
+        final_path = os.path.join(self.directory, file_name)
+        if os.path.exists(final_path):
+            os.remove(partial)
+            self.duplicates += 1
+        else:
+            os.replace(partial, final_path)
+        if os.path.exists(partial + '.validator'):
+            os.remove(partial + '.validator')
+        self.downloaded += 1
+        self.bytes_downloaded += size
+        entry = {'url': key, 'file': file_name, 'sha256': digest, 'bytes': size}
+        self.manifest[key] = entry
+        self._manifest_file.write(json.dumps(entry) + '\n')
+        self._manifest_file.flush()
+        return entry
+
+    async def attach(self, fetcher, record):
+        """Downloads a product's assets concurrently and returns the record with {url: local path} in 'assets'."""
+        urls = asset_urls(record)
+        paths = await asyncio.gather(*(self.fetch(fetcher, url) for url in urls))
+        return {**record, 'assets': dict(zip(urls, paths))}
+
+    def close(self):
+        self._manifest_file.close()
+
+    def summary(self):
+        return (f"Assets: {self.downloaded} downloaded ({self.bytes_downloaded / 1e6:.1f} MB, "
+                f"{self.duplicates} duplicate contents, {self.resumed} resumed), {self.reused} already stored, "
+                f"{self.failed} failed, in '{self.directory}'")
+
+
+def needs_assets(record):
+    """True if a finished record has assets that were never stored or failed last time."""
+    if 'error' in record:
+        return False
+    stored = record.get('assets') or {}
+    return any(stored.get(url) is None for url in asset_urls(record))
+
+
+async def download_product_assets(fetcher, store, journal, workers=ASSET_WORKERS):
+    """
+    Optional stage after the detail fetches: streams every journaled product
+    that still needs assets through `workers` concurrent downloaders and
+    journals it again with the local paths, so the output (built from the
+    latest journal entry per product) carries them. Returns the number of
+    products updated.
+    """
+    journal.sync()
+    offsets = latest_offsets(journal.path)
+
+    async def produce(emit):
+        with open(journal.path, 'rb') as f:
+            for offset in offsets.values():
+                record = read_record(f, offset)
+                if needs_assets(record):
+                    await emit(record)
+
+    return await run_pipeline(produce, lambda record: store.attach(fetcher, record), journal.append,
+                              workers=workers, metrics=fetcher.metrics)
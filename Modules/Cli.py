@@ -0,0 +1,146 @@
+"""
+Headless entry point for servers and cron jobs (installed as `scraper`).
+
+    scraper petzl edelrid --concurrency 10 --backend lxml --output-dir /srv/scrapes
+    scraper all --resume --format jsonl
+    scraper --list
+
+Only the standard library is imported until the arguments are parsed; after
+that just the selected scrapers' modules are loaded, and never tkinter.
+Ctrl+C / SIGTERM cancels the run gracefully: requests in flight finish and
+every product parsed so far is written out. A second signal aborts at once.
+To spread one crawl over several processes or boxes, use `scraper-frontier`
+(Modules/Frontier.py).
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+from Modules.Registry import SCRAPER_MODULES
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='scraper', description="Run the product scrapers without the GUI.")
+    parser.add_argument('scrapers', nargs='*', metavar='SCRAPER',
+                        help=f"Scrapers to run side by side: {', '.join(SCRAPER_MODULES)} or 'all'")
+    parser.add_argument('--list', action='store_true', help="List the available scrapers and exit")
+    parser.add_argument('--concurrency', type=int, metavar='N',
+                        help="Max in-flight requests per site (default: each scraper's MAX_CONCURRENCY)")
+    parser.add_argument('--output-dir', metavar='DIR',
+                        help="Directory for the journals, output files and metrics (default: current directory)")
+    parser.add_argument('--format', choices=['json', 'jsonl'], help="Output format (default: json)")
+    parser.add_argument('--cache-dir', metavar='DIR', help="HTTP cache directory (default: .http_cache)")
+    parser.add_argument('--no-cache', action='store_true', help="Disable the HTTP cache")
+    parser.add_argument('--backend', choices=['bs4', 'lxml'], help="Product page parser (default: bs4)")
+    parser.add_argument('--parse-executor', choices=['inline', 'process'],
+                        help="Parse on the event loop or in a process pool (default: inline)")
+    parser.add_argument('--politeness-delay', type=float, metavar='SECONDS',
+                        help="Minimum gap between discovery requests to one host")
+    parser.add_argument('--locales', metavar='LIST',
+                        help="Comma-separated locales to crawl in one run, primary first, e.g. de,en,fr,it (default: de)")
+    parser.add_argument('--discovery', choices=['categories', 'sitemap'],
+                        help="Find products by crawling the category pages or from the XML sitemap, skipping "
+                             "products whose lastmod is unchanged (default: categories)")
+    parser.add_argument('--resume', action='store_true', help="Continue the previous run from its journal")
+    parser.add_argument('--sqlite', action='store_true',
+                        help="Also upsert the products into <output>.sqlite (indexed by article number and GTIN)")
+    parser.add_argument('--export-variants', metavar='BASE', nargs='?', const='variants',
+                        help="Afterwards, export every variant of the selected scrapers to BASE.csv and "
+                             "BASE.parquet/.npz (default: variants)")
+    parser.add_argument('--download-assets', action='store_true',
+                        help="Also download product images and technical documents (into <scraper>_assets/)")
+    parser.add_argument('--replay-url', metavar='URL', help="Send every request to a replay server (Modules/Replay.py)")
+    return parser
+
+
+def scraper_options(args):
+    """Keyword arguments for run_scrapers(); unset flags keep each scraper's defaults."""
+    options = {'resume': args.resume}
+    if args.locales:
+        options['locales'] = tuple(locale.strip() for locale in args.locales.split(',') if locale.strip())
+    if args.discovery:
+        options['discovery'] = args.discovery
+    if args.sqlite:
+        options['sqlite'] = True
+    if args.download_assets:
+        options['download_assets'] = True
+    if args.concurrency:
+        options['max_concurrency'] = args.concurrency
+    if args.format:
+        options['output_format'] = args.format
+    if args.no_cache:
+        options['cache_dir'] = None
+    elif args.cache_dir:
+        options['cache_dir'] = os.path.abspath(args.cache_dir)
+    if args.backend:
+        options['parse_backend'] = args.backend
+    if args.parse_executor:
+        options['parse_executor_kind'] = args.parse_executor
+    if args.politeness_delay is not None:
+        options['politeness_delay'] = args.politeness_delay
+    if args.replay_url:
+        options['replay_url'] = args.replay_url
+    return options
+
+
+async def run(names, options):
+    from Modules.Control import RunControl
+    from Modules.Registry import run_scrapers
+
+    control = RunControl()
+    loop = asyncio.get_running_loop()
+
+    def on_signal():
+        if control.cancelled:
+            print("\nAborting.")
+            os._exit(130)
+        print("\nCancelling: finishing requests in flight and saving results (press Ctrl+C again to abort)")
+        control.cancel()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, on_signal)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+
+    outcome = await run_scrapers(names, control=control, **options)
+    return 1 if any(outcome.values()) or control.cancelled else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.list:
+        for name, module in SCRAPER_MODULES.items():
+            print(f"{name:10} {module}")
+        return 0
+
+    names = list(SCRAPER_MODULES) if 'all' in args.scrapers else args.scrapers
+    if not names:
+        build_parser().error("name at least one scraper (or 'all')")
+    unknown = [name for name in names if name not in SCRAPER_MODULES]
+    if unknown:
+        build_parser().error(f"unknown scraper(s): {', '.join(unknown)} (see --list)")
+
+    options = scraper_options(args)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        os.chdir(args.output_dir)  # Journals and outputs are written relative to the working directory
+
+    try:
+        status = asyncio.run(run(names, options))
+    except KeyboardInterrupt:
+        return 130
+
+    if args.export_variants:
+        from Modules.Registry import get_scraper
+        from Modules.VariantExport import export_variants
+        count, files = export_variants({name: get_scraper(name).journal_file for name in names}, args.export_variants)
+        print(f"Exported {count} variants to {', '.join(files)}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
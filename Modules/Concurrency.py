@@ -0,0 +1,131 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# --- Configuration ---
+INITIAL_CONCURRENCY = 4     # In-flight requests per host at the start of a run
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 20        # Upper bound per host, whatever the latency looks like
+BACKOFF_FACTOR = 0.5        # Multiplicative decrease on timeouts, 429 and 503
+LATENCY_TOLERANCE = 3.0     # A response slower than this multiple of the host's best latency is "unhealthy"
+
+OVERLOAD_STATUSES = {429, 503}
+
+
+def parse_retry_after(value):
+    """Returns the number of seconds a Retry-After header asks us to wait, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _HostState:
+    def __init__(self, initial):
+        self.limit = float(initial)
+        self.in_flight = 0
+        self.slow_start = True
+        self.best_latency = None
+        self.blocked_until = 0.0
+        self.last_backoff = 0.0
+        self.waiters = []
+
+    @property
+    def capacity(self):
+        return max(1, int(self.limit))
+
+
+class AdaptiveLimiter:
+    """
+    Per-host AIMD concurrency controller shared by every request of a run.
+
+    Each host starts at `initial` in-flight requests. While responses are
+    healthy the limit grows (doubling per round trip until the first
+    back-off, then +1 per round trip). A timeout, 429 or 503 cuts it by
+    `backoff`, at most once per round trip, and a Retry-After header pauses
+    the host entirely until it expires. The state is created lazily inside
+    the running event loop, never at import time.
+    """
+    def __init__(self, initial=INITIAL_CONCURRENCY, minimum=MIN_CONCURRENCY, maximum=MAX_CONCURRENCY,
+                 backoff=BACKOFF_FACTOR, latency_tolerance=LATENCY_TOLERANCE):
+        self.initial = min(initial, maximum)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self._hosts = {}
+
+    def _state(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(self.initial)
+        return self._hosts[host]
+
+    def limit(self, url_or_host):
+        host = urlparse(url_or_host).netloc or url_or_host
+        return self._state(host).capacity
+
+    async def acquire(self, url):
+        """Waits for a free slot on the URL's host and returns the host key for `release`."""
+        host = urlparse(url).netloc
+        state = self._state(host)
+        loop = asyncio.get_running_loop()
+        while True:
+            blocked_for = state.blocked_until - loop.time()
+            if blocked_for > 0:
+                await asyncio.sleep(blocked_for)
+                continue
+            if state.in_flight < state.capacity:
+                state.in_flight += 1
+                return host
+            waiter = loop.create_future()
+            state.waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in state.waiters:
+                    state.waiters.remove(waiter)
+
+    def release(self, host, latency, status=None, timed_out=False, retry_after=None):
+        """
+        Frees the slot taken by `acquire` and adapts the host's limit to the outcome:
+        `status` is the HTTP status (None for connection errors), `timed_out` marks
+        a timeout and `retry_after` is the parsed Retry-After delay in seconds.
+        """
+        state = self._hosts[host]
+        state.in_flight -= 1
+        now = asyncio.get_running_loop().time()
+
+        if timed_out or status in OVERLOAD_STATUSES:
+            # One multiplicative decrease per round trip, however many requests failed in it
+            if now - state.last_backoff > (state.best_latency or 1.0):
+                old_limit = state.capacity
+                state.limit = max(self.minimum, state.limit * self.backoff)
+                state.slow_start = False
+                state.last_backoff = now
+                reason = 'timeout' if timed_out else f'HTTP {status}'
+                print(f"  - Backing off {host} ({reason}): {old_limit} -> {state.capacity} concurrent requests")
+            if retry_after:
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+                print(f"  - {host} asked us to wait {retry_after:.0f}s (Retry-After)")
+        elif status is not None and status < 400:
+            state.best_latency = latency if state.best_latency is None else min(state.best_latency, latency)
+            if latency <= state.best_latency * self.latency_tolerance:
+                state.limit += 1 if state.slow_start else 1 / state.limit
+                state.limit = min(self.maximum, state.limit)
+            else:
+                state.slow_start = False
+
+        self._wake(state)
+
+    def _wake(self, state):
+        free = state.capacity - state.in_flight
+        for waiter in state.waiters[:max(0, free)]:
+            if not waiter.done():
+                waiter.set_result(None)
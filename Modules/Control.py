@@ -0,0 +1,87 @@
+import asyncio
+
+
+class RunCancelled(Exception):
+    """Raised at a checkpoint once the run has been cancelled."""
+
+
+async def gather_or_cancel(*aws):
+    """
+    Like asyncio.gather, but the first exception (e.g. RunCancelled) cancels
+    the sibling tasks and waits for them before it propagates, so nothing
+    keeps fetching after a cancel.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class RunControl:
+    """
+    Pause / resume / cancel switch for a scrape running on another thread's
+    event loop. `pause()`, `resume()` and `cancel()` may be called from any
+    thread (e.g. the GUI); the scraper calls `bind()` inside its loop and
+    awaits `checkpoint()` before dispatching each new request.
+
+    Pausing holds new requests at the checkpoint while the session and its
+    connections stay open. Cancelling makes every checkpoint raise
+    RunCancelled, so queued work stops straight away while requests already
+    in flight finish and are saved.
+    """
+    def __init__(self):
+        self.paused = False
+        self.cancelled = False
+        self._loop = None
+        self._unpaused = None  # asyncio.Event, set while not paused
+
+    def bind(self):
+        """Attaches the control to the running event loop (scrapers sharing a loop share one control)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._unpaused = asyncio.Event()
+        self._sync()
+
+    @property
+    def running(self):
+        """False while paused or once cancelled."""
+        return not (self.paused or self.cancelled)
+
+    def pause(self):
+        self.paused = True
+        self._signal()
+
+    def resume(self):
+        self.paused = False
+        self._signal()
+
+    def cancel(self):
+        self.cancelled = True
+        self._signal()
+
+    def _signal(self):
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._sync)
+        except RuntimeError:
+            pass  # The loop has already finished
+
+    def _sync(self):
+        if self.paused and not self.cancelled:
+            self._unpaused.clear()
+        else:
+            self._unpaused.set()
+
+    async def checkpoint(self):
+        """Waits while paused; raises RunCancelled once the run is cancelled."""
+        if self._unpaused is not None and not self._unpaused.is_set():
+            await self._unpaused.wait()
+        if self.cancelled:
+            raise RunCancelled()
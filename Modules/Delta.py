@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+
+from Modules.Journal import latest_offsets, read_record
+from Modules.ProductIndex import with_categories
+
+# --- Configuration ---
+SNAPSHOT_SUFFIX = '.snapshot.jsonl'  # Last good version of every product, kept for the next run's diffs
+INDEX_SUFFIX = '.index.json'         # Key -> content hashes and snapshot offset
+DELTA_SUFFIX = '.delta.jsonl'        # One added/removed/changed entry per line
+REFERENCE_ID_FIELDS = ('article_number', 'Reference', 'gtin')  # First one present identifies a variant
+# Fields that depend on how the run was configured (download_assets, locales), not on the site: never a change
+RUN_FIELDS = ('assets', 'locale', 'locales')
+INDEX_VERSION = 2                    # Bumped whenever the product keys change (2: canonical URLs)
+
+
+def content_hash(value):
+    """Stable hash of a record or variant: the same content always hashes the same, whatever the key order."""
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def reference_key(reference):
+    """Identifies a variant within its product; variants without an id are keyed by their content."""
+    for field in REFERENCE_ID_FIELDS:
+        if reference.get(field):
+            return f"{field}:{reference[field]}"
+    return 'hash:' + content_hash(reference)
+
+
+def site_content(record):
+    """The record without its RUN_FIELDS, i.e. what the site itself shows."""
+    return {name: value for name, value in record.items() if name not in RUN_FIELDS}
+
+
+def record_hashes(record):
+    return {
+        'hash': content_hash(site_content(record)),
+        'references': {reference_key(ref): content_hash(ref) for ref in record.get('references') or []},
+    }
+
+
+def diff_fields(old, new, path=''):
+    """
+    Field-level differences between two records as [{'field', 'old', 'new'}],
+    recursing into nested dicts (e.g. 'specifications.Gewicht'). Lists are
+    compared whole, except 'references', which diff_references() handles;
+    RUN_FIELDS are ignored.
+    """
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return [] if old == new else [{'field': path, 'old': old, 'new': new}]
+    changes = []
+    for name in list(old) + [name for name in new if name not in old]:
+        if not path and (name == 'references' or name in RUN_FIELDS):
+            continue
+        field = f"{path}.{name}" if path else name
+        if name not in new:
+            changes.append({'field': field, 'old': old[name], 'new': None})
+        elif name not in old:
+            changes.append({'field': field, 'old': None, 'new': new[name]})
+        else:
+            changes.extend(diff_fields(old[name], new[name], field))
+    return changes
+
+
+def diff_references(old_record, new_record):
+    """Added, removed and changed variants between two versions of a product, matched by reference_key()."""
+    old_refs = {reference_key(ref): ref for ref in old_record.get('references') or []}
+    new_refs = {reference_key(ref): ref for ref in new_record.get('references') or []}
+    diff = {
+        'added': [ref for key, ref in new_refs.items() if key not in old_refs],
+        'removed': [ref for key, ref in old_refs.items() if key not in new_refs],
+        'changed': [{'reference': key, 'changes': diff_fields(old_refs[key], ref)}
+                    for key, ref in new_refs.items() if key in old_refs and old_refs[key] != ref],
+    }
+    return {kind: entries for kind, entries in diff.items() if entries}
+
+
+def load_index(index_file, snapshot_file):
+    """
+    The previous run's {key: hashes and snapshot offset}, or {} when there is
+    none, it was keyed differently, or it doesn't belong to the snapshot on
+    disk (a crash between the two being replaced), in which case every
+    product is reported as added again.
+    """
+    if not (os.path.exists(index_file) and os.path.exists(snapshot_file)):
+        return {}
+    with open(index_file, encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get('version') != INDEX_VERSION:
+        print(f"⚠️ {index_file} is from an older version; reporting every product as added")
+        return {}
+    if index.get('snapshot_size') != os.path.getsize(snapshot_file):
+        print(f"⚠️ {index_file} doesn't match {snapshot_file}; reporting every product as added")
+        return {}
+    return index['products']
+
+
+def _copy_line(source, offset, snapshot):
+    """Carries one record over from the previous snapshot unchanged; returns its new offset."""
+    source.seek(offset)
+    new_offset = snapshot.tell()
+    snapshot.write(source.readline())
+    return new_offset
+
+
+def write_delta(journal_path, output_base, complete=True, categories=None):
+    """
+    Compares this run's journal against the index and snapshot left by the
+    previous run, writes `<output_base>.delta.jsonl` and replaces the
+    snapshot and index with this run's. Each delta line is one of
+
+        {"op": "added",   "product_url", "record": {...}}
+        {"op": "removed", "product_url"}
+        {"op": "changed", "product_url", "changes": [...], "references": {...}}
+
+    Products are keyed by canonical URL, and `categories` is applied to the
+    records as in write_output(), so a product moving category is a change.
+    RUN_FIELDS (downloaded assets, the crawled locales) are not compared, so
+    rerunning with other options doesn't report every product as changed.
+
+    Products that failed this run keep their previous version, so an outage
+    never shows up as a removal. Pass `complete=False` for a cancelled run:
+    products it never reached are carried over instead of being removed.
+    The first run (no index yet) reports every product as added.
+
+    Returns (delta file, {'added', 'removed', 'changed', 'unchanged': count}).
+    """
+    snapshot_file = output_base + SNAPSHOT_SUFFIX
+    index_file = output_base + INDEX_SUFFIX
+    delta_file = output_base + DELTA_SUFFIX
+    previous = load_index(index_file, snapshot_file)
+
+    index = {}
+    counts = dict.fromkeys(('added', 'removed', 'changed', 'unchanged'), 0)
+    old_snapshot = open(snapshot_file, 'rb') if previous else None
+    try:
+        with open(journal_path, 'rb') as journal, \
+                open(snapshot_file + '.tmp', 'wb') as snapshot, \
+                open(delta_file + '.tmp', 'w', encoding='utf-8') as delta:
+
+            def emit(op, key, **fields):
+                counts[op] += 1
+                entry = {'op': op, 'product_url': key, **fields}
+                delta.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+            for key, offset in latest_offsets(journal_path).items():
+                before = previous.get(key)
+                record = read_record(journal, offset)
+                if 'error' in record:
+                    if before:
+                        index[key] = dict(before, offset=_copy_line(old_snapshot, before['offset'], snapshot))
+                    continue
+
+                record = with_categories(record, categories)
+                index[key] = dict(record_hashes(record), offset=snapshot.tell())
+                snapshot.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+                if before is None:
+                    emit('added', key, record=record)
+                elif before['hash'] == index[key]['hash']:
+                    counts['unchanged'] += 1
+                else:
+                    old_record = read_record(old_snapshot, before['offset'])
+                    if record_hashes(old_record)['hash'] == index[key]['hash']:
+                        counts['unchanged'] += 1  # Only the hash changed (an older version hashed RUN_FIELDS)
+                        continue
+                    changes = {'changes': diff_fields(old_record, record)}
+                    if before['references'] != index[key]['references']:
+                        changes['references'] = diff_references(old_record, record)
+                    emit('changed', key, **changes)
+
+            for key, before in previous.items():
+                if key in index:
+                    continue
+                if complete:
+                    emit('removed', key)
+                else:
+                    index[key] = dict(before, offset=_copy_line(old_snapshot, before['offset'], snapshot))
+    finally:
+        if old_snapshot:
+            old_snapshot.close()
+
+    with open(index_file + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'snapshot_size': os.path.getsize(snapshot_file + '.tmp'), 'products': index}, f, ensure_ascii=False)
+    os.replace(delta_file + '.tmp', delta_file)
+    os.replace(snapshot_file + '.tmp', snapshot_file)
+    os.replace(index_file + '.tmp', index_file)
+    return delta_file, counts
@@ -1,13 +1,30 @@
 import asyncio
 import aiohttp
+import re
 from bs4 import BeautifulSoup
 import json
-import time
-import requests
+from functools import partial
+from lxml import etree
 from urllib.parse import urljoin, urlparse
 from pathlib import PurePosixPath
 
-semaphore = asyncio.Semaphore(20)
+from Modules.Assets import AssetStore, download_product_assets, ASSET_CONCURRENCY
+from Modules.Http import Fetcher, shared_session, POLITENESS_DELAY
+from Modules.Concurrency import AdaptiveLimiter, MAX_CONCURRENCY
+from Modules.Control import RunControl, RunCancelled, gather_or_cancel
+from Modules.HttpCache import ResponseCache, CACHE_DIR
+from Modules.Journal import RunJournal
+from Modules.Locales import merge_locales, tag_locale, MERGED_SUFFIX
+from Modules.Metrics import RunMetrics
+from Modules.Delta import write_delta
+from Modules.Output import write_output, OUTPUT_FORMAT
+from Modules.ProductIndex import ProductIndex
+from Modules.Progress import Progress
+from Modules.Sitemap import LastmodFilter, discover_from_sitemap, DISCOVERY_MODES
+from Modules.SqliteStore import write_sqlite, DB_SUFFIX
+from Modules.Registry import Scraper, register
+from Modules.Parsing import parse_executor, parse_page, PARSE_EXECUTOR, PARSE_BACKEND
+from Modules.LxmlHelpers import has_class, html_tree, get_text, first
 
 # --- Configuration ---
 BASE_URL = "https://edelrid.com"
@@ -15,18 +32,34 @@ HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'X-Requested-With': 'XMLHttpRequest' # Crucial header for Edelrid's API
 }
-
-# === STAGE 1 & 2: Get all Product URLs (Synchronous part - from your code) ===
-
-def fetch_edelrid_categories(url):
+JOURNAL_FILE = 'edelrid_run.journal.jsonl'
+OUTPUT_BASE = 'edelrid_full_product_data'
+ASSET_DIR = 'edelrid_assets'
+# Locale -> URL prefix; the first locale of a run is the primary one (see Modules/Locales.py)
+LOCALES = {'de': 'de-de', 'en': 'en-en', 'fr': 'fr-fr', 'it': 'it-it'}
+DEFAULT_LOCALE = 'de'
+SECTION = 'professional'  # Site section crawled below every locale prefix
+# Accordion titles (lower-case, '_' for spaces) of the specifications section in every supported locale
+SPEC_SECTION_KEYS = ('technische_informationen', 'technical_information', 'informations_techniques',
+                     'informazioni_tecniche')
+# Sitemap discovery (discovery='sitemap'): product pages are <prefix>/p/<product>
+SITEMAP_URL = f"{BASE_URL}/sitemap.xml"
+PRODUCT_PATH = r'/p/[^/?#]+/?$'
+
+# === STAGE 1 & 2: Get all Product URLs (Asynchronous, over the shared session) ===
+
+def section_url(locale=DEFAULT_LOCALE):
+    """The landing page of the crawled section in `locale`."""
+    return f"{BASE_URL}/{LOCALES[locale]}/{SECTION}"
+
+async def fetch_edelrid_categories(fetcher, url):
     """
     Fetches the main product categories from the Edelrid professional page.
     """
     categories = []
     try:
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'lxml')
+        content = await fetcher.get(url, headers=HEADERS, polite=True, endpoint='categories')
+        soup = BeautifulSoup(content, 'lxml')
 
         container = soup.find('div', class_='iframe-brick')
         if not container:
@@ -48,92 +81,175 @@ def fetch_edelrid_categories(url):
                     'category_url': absolute_url
                 })
         return categories
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         print(f"Error fetching categories from {url}: {e}")
         return []
 
-def get_all_product_urls_edelrid():
+class EdelridGridParser:
+    """
+    Incremental extractor for Edelrid product grids (category pages and the
+    `limit=9999` listing API response). It is fed raw chunks as they arrive,
+    only looks at `div.ed-product-grid-item` blocks, their
+    `a.ed-product-grid-item-link` and the article-loader div, and clears every
+    finished element, so it never builds the full tree and memory stays
+    constant however large the listing is.
     """
-    Scrapes categories, then for each category, finds the 'load all' URL
-    and fetches all product listings from it.
+    def __init__(self):
+        self._parser = etree.HTMLPullParser(events=('start', 'end'), encoding='utf-8')
+        self._open_blocks = []  # [element, is_highlight, first product href]
+        self.product_paths = []
+        self.loader = None      # Attributes of the article-loader div
+        self.bytes_fed = 0
+
+    def feed(self, chunk):
+        self.bytes_fed += len(chunk)
+        self._parser.feed(chunk)
+        self._drain()
+
+    def close(self):
+        if self.bytes_fed:
+            self._parser.close()
+            self._drain()
+        return self
+
+    def _drain(self):
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                classes = (element.get('class') or '').split()
+                if element.tag == 'div':
+                    if 'ed-product-grid-item' in classes:
+                        self._open_blocks.append([element, 'ed-grid-item-highlights' in classes, None])
+                    elif self.loader is None and element.get('data-controller') == 'article-loader':
+                        self.loader = dict(element.attrib)
+                elif element.tag == 'a' and 'ed-product-grid-item-link' in classes and element.get('href') is not None:
+                    for block in self._open_blocks:
+                        if block[2] is None:
+                            block[2] = element.get('href')
+            else:
+                if self._open_blocks and element is self._open_blocks[-1][0]:
+                    _, is_highlight, href = self._open_blocks.pop()
+                    if not is_highlight and href is not None:
+                        self.product_paths.append(href)
+                # Drop everything already processed
+                element.clear(keep_tail=True)
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+    def products(self, category_name):
+        products = []
+        for product_url in self.product_paths:
+            if not product_url.startswith('http'):
+                product_url = BASE_URL + product_url
+            products.append({
+                'category': category_name,
+                'product_url': product_url
+            })
+        return products
+
+async def fetch_category_products_edelrid(fetcher, category, locale=DEFAULT_LOCALE):
     """
-    print("--- STAGE 1: Fetching Edelrid Categories ---")
-    start_url = f"{BASE_URL}/de-de/professional"
-    categories = fetch_edelrid_categories(start_url)
+    Fetches one category page, finds its 'load all' URL and returns every
+    product listed in the category. Both responses are streamed through
+    EdelridGridParser instead of being parsed into a full tree.
+    """
+    products = []
+    try:
+        initial_grid = await fetcher.stream(category['category_url'], EdelridGridParser, headers=HEADERS, polite=True,
+                                            endpoint='category')
 
-    all_products = []
+        # Fetch initial products
+        products.extend(initial_grid.products(category['category_name']))
 
-    print(f"\n--- STAGE 2: Finding 'Load All' links and Fetching Product Listings ---")
-    for category in categories:
-        print(f"Processing category: {category['category_name']}")
+        loader = initial_grid.loader
+        if not loader:
+            print(f"  - Could not find article-loader div for '{category['category_name']}'. Skipping.")
+            return products
 
-        try:
-            initial_response = requests.get(category['category_url'], headers=HEADERS)
-            initial_response.raise_for_status()
-            initial_soup = BeautifulSoup(initial_response.content, 'lxml')
-
-            # Fetch initial products
-            product_blocks_initial = initial_soup.find_all('div', class_='ed-product-grid-item')
-
-            count = 0
-            for block in product_blocks_initial:
-                if 'ed-grid-item-highlights' in block.get('class', []): continue
-
-                if prod_link := block.find('a', class_='ed-product-grid-item-link', href=True):
-                    product_url = prod_link['href']
-                    if not product_url.startswith('http'):
-                        product_url = BASE_URL + product_url
-                    all_products.append({
-                        'category': category['category_name'],
-                        'product_url': product_url
-                    })
-                    count += 1
+        category_id = loader.get('data-article-loader-category-id-value')
+        department = loader.get('data-article-loader-department-value', SECTION)
 
-            loader_div = initial_soup.find('div', attrs={'data-controller': 'article-loader'})
-            if not loader_div:
-                print(f"  - Could not find article-loader div for '{category['category_name']}'. Skipping.")
-                continue
+        api_url = f"{BASE_URL}/{LOCALES[locale]}/view/list/products/{category_id}/{department}?brick=contentSection:1.content&page={category['category_url']}&render_template=category_page/_product-grid.html.twig&limit=9999"
 
-            category_id = loader_div.get('data-article-loader-category-id-value')
-            department = loader_div.get('data-article-loader-department-value', 'professional')
+        print(f"  - Making API call to load all products for category ID {category_id}...")
+        listing = await fetcher.stream(api_url, EdelridGridParser, headers=HEADERS, polite=True, endpoint='listing_api')
 
-            api_url = f"{BASE_URL}/de-de/view/list/products/{category_id}/{department}?brick=contentSection:1.content&page={category['category_url']}&render_template=category_page/_product-grid.html.twig&limit=9999"
+        if not listing.bytes_fed:
+            print(f"  - API response for '{category['category_name']}' contained no HTML. Skipping.")
+            return products
 
-            print(f"  - Making API call to load all products for category ID {category_id}...")
-            api_response = requests.get(api_url, headers=HEADERS)
-            api_response.raise_for_status()
+        products.extend(listing.products(category['category_name']))
+        print(f"  - Scraped {len(products)} products from '{category['category_name']}'.")
 
-            products_html = api_response.text
+    except (aiohttp.ClientError, asyncio.TimeoutError, etree.LxmlError) as e:
+        print(f"  - An error occurred for category '{category['category_name']}': {e}")
 
-            if not products_html:
-                print(f"  - API response for '{category['category_name']}' contained no HTML. Skipping.")
-                continue
+    return products
 
-            products_soup = BeautifulSoup(products_html, 'lxml')
-            product_blocks = products_soup.find_all('div', class_='ed-product-grid-item')
+async def discover_locale_edelrid(fetcher, emit, locale=DEFAULT_LOCALE):
+    """
+    Scrapes the categories of `locale`, then fetches every category (and its
+    'load all' listing) concurrently and awaits `emit(product)` for each
+    product listed. Requests to the same host are spaced out by the
+    fetcher's politeness delay instead of a global sleep.
+    """
+    print(f"--- STAGE 1: Fetching Edelrid Categories ({locale}) ---")
+    with fetcher.metrics.stage('1_categories'):
+        categories = await fetch_edelrid_categories(fetcher, section_url(locale))
+
+    print(f"\n--- STAGE 2: Finding 'Load All' links and Fetching Product Listings for {len(categories)} categories ---")
+    with fetcher.metrics.stage('2_listings'):
+        per_category = await gather_or_cancel(
+            *(fetch_category_products_edelrid(fetcher, category, locale) for category in categories)
+        )
+    for products in per_category:
+        for product in products:
+            await emit(product)
+
+async def discover_products_sitemap_edelrid(fetcher, emit, locales=(DEFAULT_LOCALE,)):
+    """
+    Sitemap-driven producer (Modules/Sitemap.py): emits the product pages of
+    every locale from SITEMAP_URL with their 'lastmod', while the category
+    pages and listings are crawled alongside only for category membership
+    (and for products the sitemap is missing).
+    """
+    routes = [(re.compile(re.escape('/' + LOCALES[locale]) + PRODUCT_PATH), tag_locale(emit, locale, locales))
+              for locale in locales]
 
-            for block in product_blocks:
-                if 'ed-grid-item-highlights' in block.get('class', []): continue
+    async def listing(collect):
+        await gather_or_cancel(*(discover_locale_edelrid(fetcher, tag_locale(collect, locale, locales), locale)
+                                 for locale in locales))
 
-                if prod_link := block.find('a', class_='ed-product-grid-item-link', href=True):
-                    product_url = prod_link['href']
-                    if not product_url.startswith('http'):
-                        product_url = BASE_URL + product_url
-                    all_products.append({
-                        'category': category['category_name'],
-                        'product_url': product_url
-                    })
-                    count += 1
-            print(f"  - Scraped {count} products.")
-            time.sleep(0.5)
+    await discover_from_sitemap(fetcher, SITEMAP_URL, routes, listing, emit, headers=HEADERS)
 
-        except requests.exceptions.RequestException as e:
-            print(f"  - An error occurred for category '{category['category_name']}': {e}")
-            continue
+async def get_all_product_urls_edelrid(fetcher, index=None, locales=(DEFAULT_LOCALE,), discovery='categories'):
+    """
+    Discovers the products of every locale concurrently and returns each
+    product once, however many categories (or both the grid and the
+    listing) show it; pass a ProductIndex as `index` to keep every
+    product's categories. With several locales each product is tagged
+    with its 'locale'. `discovery='sitemap'` takes the URLs from the
+    sitemap instead.
+    """
+    if index is None:
+        index = ProductIndex()
+
+    async def collect(product):
+        index.add(product)
 
-    unique_products = [dict(t) for t in {tuple(d.items()) for d in all_products}]
-    print(f"\nTotal unique products found across all categories: {len(unique_products)}")
-    return unique_products
+    if discovery == 'sitemap':
+        await discover_products_sitemap_edelrid(fetcher, collect, locales)
+    else:
+        await gather_or_cancel(*(discover_locale_edelrid(fetcher, tag_locale(collect, locale, locales), locale)
+                                 for locale in locales))
+    print(f"\nTotal unique products found across all categories: {index.summary()}")
+    return index.products()
+
+async def discover_products_edelrid(fetcher, emit):
+    """
+    Discovery in the registry's producer form: awaits `emit(product)` for
+    every listing, so the caller's ProductIndex keeps all of a product's categories.
+    """
+    await discover_locale_edelrid(fetcher, emit)
 
 
 # === STAGE 3: Fetch and Parse a Single Product Page (Asynchronous Worker) ===
@@ -254,7 +370,7 @@ def parse_product_details_edelrid(soup):
                 #         details['detailed_description'] = content_div.get_text(strip=True, separator='\n')
 
                 # --- For "Technische Informationen" (Specifications) ---
-                elif 'technische_informationen' in title_key:
+                elif any(key in title_key for key in SPEC_SECTION_KEYS):
                     specs = {}
                     for li in content_div.select('ul > li'):
                         text = li.get_text(strip=True)
@@ -316,22 +432,155 @@ def parse_product_details_edelrid(soup):
 
     return details
 
-async def fetch_and_parse_edelrid(session, product):
+# --- lxml backend: the same extraction as parse_product_details_edelrid, with XPath compiled once at import ---
+
+_X_TITLE = etree.XPath(f"(//*[{has_class('ed-product-detail-banner-details-header')}]//h1)[1]")
+_X_SUBTITLE = etree.XPath(f"(//*[{has_class('ed-product-detail-banner-sub-headline')}])[1]")
+_X_DESCRIPTION = etree.XPath(f"(//*[{has_class('ed-product-detail-banner-details')}]"
+                             f"//*[{has_class('ed-text-child-light-content')}])[1]")
+_X_ACTIVE_CAROUSEL = etree.XPath(f"(//*[{has_class('ed-product-detail-banner-container')}][{has_class('ed-active')}])[1]")
+_X_CAROUSEL_IMAGES = etree.XPath(f".//li[{has_class('ed-product-detail-banner-image')}]")
+_X_FIRST_IMG_WITH_SRC = etree.XPath("(.//img[@src])[1]")
+_X_FEATURES_ANCHOR = etree.XPath("(//a[@id='features'])[1]")
+_X_DOWNLOADS_ANCHOR = etree.XPath("(//a[@id='pdf-downloads'])[1]")
+_X_NEXT_ACCORDION_CONTENT = etree.XPath(f"following-sibling::div[{has_class('uk-accordion-content')}][1]")
+_X_FIRST_UL = etree.XPath("(.//ul)[1]")
+_X_LI = etree.XPath(".//li")
+_X_PLAIN_LINKS = etree.XPath(f".//a[{has_class('ed-link-plain')}]")
+_X_ACCORDION_ITEMS = etree.XPath(f"//*[{has_class('ed-product-page-details')}]/div/ul/li")
+_X_ACCORDION_TITLE = etree.XPath(f"(.//a[{has_class('uk-accordion-title')}])[1]")
+_X_ACCORDION_CONTENT = etree.XPath(f"(.//div[{has_class('uk-accordion-content')}])[1]")
+_X_LIST_ITEMS = etree.XPath(".//ul/li")
+_X_VARIANTS = etree.XPath("(//div[@data-product-detail-description-variants-value])[1]")
+_X_COLOR_TOGGLES = etree.XPath(f"//button[{has_class('ed-product-color-toggle')}][@data-color-id]")
+
+def extract_features_list_lxml(tree):
+    """lxml twin of extract_features_list."""
+    features_list = []
+    if (features_anchor := first(_X_FEATURES_ANCHOR(tree))) is not None:
+        if (accordion_content := first(_X_NEXT_ACCORDION_CONTENT(features_anchor))) is not None:
+            if (feature_ul := first(_X_FIRST_UL(accordion_content))) is not None:
+                features_list = [get_text(item) for item in _X_LI(feature_ul)]
+    return features_list
+
+def extract_download_links_lxml(tree):
+    """lxml twin of extract_download_links."""
+    pdf_downloads = []
+    if (downloads_anchor := first(_X_DOWNLOADS_ANCHOR(tree))) is not None:
+        if (accordion_content := first(_X_NEXT_ACCORDION_CONTENT(downloads_anchor))) is not None:
+            for link in _X_PLAIN_LINKS(accordion_content):
+                file_name = get_text(link)
+                file_link = link.get('href')
+                if file_name and file_link:
+                    pdf_downloads.append({'name': file_name, 'link': file_link})
+    return pdf_downloads
+
+def parse_product_details_edelrid_lxml(tree):
+    """lxml-native twin of parse_product_details_edelrid; must return exactly the same dict."""
+    details = {}
+
+    # --- Product Title, Subtitle, and Main Description ---
+    try:
+        if (title_tag := first(_X_TITLE(tree))) is not None:
+            details['title'] = get_text(title_tag)
+        if (subtitle_tag := first(_X_SUBTITLE(tree))) is not None:
+            details['subtitle'] = get_text(subtitle_tag)
+        if (desc_tag := first(_X_DESCRIPTION(tree))) is not None:
+            details['main_description'] = get_text(desc_tag)
+    except Exception as e:
+        print(f"  - Warning: Could not parse title/description. Error: {e}")
+
+    # --- Image Gallery for the active color variant ---
+    try:
+        if (active_carousel := first(_X_ACTIVE_CAROUSEL(tree))) is not None:
+            image_urls = []
+            for li in _X_CAROUSEL_IMAGES(active_carousel):
+                if (img_tag := first(_X_FIRST_IMG_WITH_SRC(li))) is not None:
+                    high_res_url = img_tag.get('src').replace('/web-s', '/web-xl').replace('/web-m', '/web-xl')
+                    image_urls.append(high_res_url)
+            details['gallery'] = {"full_images": list(dict.fromkeys(image_urls))}
+    except Exception as e:
+        print(f"  - Warning: Could not parse image gallery. Error: {e}")
+
+    # --- Accordion Sections (Features, Tech Info, Documents) ---
+    try:
+        details['features'] = extract_features_list_lxml(tree)
+        details['technical_documents'] = extract_download_links_lxml(tree)
+
+        for item in _X_ACCORDION_ITEMS(tree):
+            if (title_tag := first(_X_ACCORDION_TITLE(item))) is not None:
+                title_key = get_text(title_tag).lower().replace('&', 'and').replace(' ', '_')
+                content_div = first(_X_ACCORDION_CONTENT(item))
+                if content_div is None: continue
+
+                if any(key in title_key for key in SPEC_SECTION_KEYS):
+                    specs = {}
+                    for li in _X_LIST_ITEMS(content_div):
+                        text = get_text(li)
+                        if ':' in text:
+                            key, value = text.split(':', 1)
+                            specs[key.strip()] = value.strip()
+                        else:
+                            specs.setdefault('notes', []).append(text)
+                    details['specifications'] = specs
+    except Exception as e:
+        print(f"  - Warning: Could not parse accordion sections. Error: {e}")
+
+    # --- References (Variants from JSON) ---
+    try:
+        if (variants_container := first(_X_VARIANTS(tree))) is not None:
+            color_map = {
+                btn.get('data-color-id'): btn.get('uk-tooltip', '').split('title: ')[-1].split(';')[0].strip()
+                for btn in _X_COLOR_TOGGLES(tree)
+            }
+
+            variants_data = json.loads(variants_container.get('data-product-detail-description-variants-value'))
+
+            references = []
+            for color_id_str, sizes_data in variants_data:
+                color_name = color_map.get(color_id_str, "N/A")
+                for size_name, variant_details in sizes_data:
+                    references.append({
+                        "color": color_name,
+                        "size": size_name,
+                        "article_number": variant_details.get("articleNumber"),
+                        "gtin": variant_details.get("gtin"),
+                        "price_eur": variant_details.get("price") / 100.0 if variant_details.get("price") else None,
+                        "stock_quantity": variant_details.get("stockQty")
+                    })
+            details['references'] = references
+    except (json.JSONDecodeError, AttributeError, KeyError) as e:
+        print(f"  - Warning: Could not parse product variants. Error: {e}")
+
+    return details
+
+def parse_product_page_edelrid(html, backend=PARSE_BACKEND, encoding=None):
+    """
+    Parses raw product page HTML into a plain dict (runs inline or in a parse
+    worker process). `backend` is 'bs4' or 'lxml'; both give the same result.
+    `encoding` is the charset from the response's Content-Type, if any.
+    """
+    if backend == 'lxml':
+        return parse_product_details_edelrid_lxml(html_tree(html, encoding))
+    return parse_product_details_edelrid(BeautifulSoup(html, 'lxml', from_encoding=encoding))
+
+async def fetch_and_parse_edelrid(fetcher, product, executor=None, backend=PARSE_BACKEND):
     """Async worker: fetches a URL, parses it, and returns the merged data."""
     url = product['product_url']
     try:
-        async with semaphore:
-            async with session.get(url, headers=HEADERS, timeout=60) as response:
-                if response.status != 200:
-                    print(f"  - Failed {url} with status {response.status}")
-                    return {**product, 'error': f'HTTP Status {response.status}'}
-
-                html = await response.text()
-                soup = BeautifulSoup(html, 'lxml')
-
-                detailed_data = parse_product_details_edelrid(soup)
-                product.update(detailed_data)
-                return product
+        # In-flight requests are bounded per host by the fetcher's adaptive limiter
+        try:
+            html, charset = await fetcher.get_page(url, headers=HEADERS, timeout=60, endpoint='product')
+        except aiohttp.ClientResponseError as e:
+            print(f"  - Failed {url} with status {e.status}")
+            return {**product, 'error': f'HTTP Status {e.status}'}
+
+        with fetcher.metrics.time_parse(backend=backend):
+            parse = partial(parse_product_page_edelrid, backend=backend, encoding=charset)
+            detailed_data = await parse_page(executor, parse, html)
+        return {**product, **detailed_data}
+    except RunCancelled:
+        raise
     except asyncio.TimeoutError:
         print(f"  - Timeout error processing {url}")
         return {**product, 'error': 'Timeout'}
@@ -342,32 +591,137 @@ async def fetch_and_parse_edelrid(session, product):
 
 # === STAGE 4: Main Orchestration ===
 
-async def main_edelrid():
-    """Main function to run the entire Edelrid scraping process."""
-
-    products_to_scrape = get_all_product_urls_edelrid()
-    if not products_to_scrape:
-        print("No products found to scrape. Exiting.")
-        return
-
-    print(f"\n--- STAGE 3: Asynchronously Fetching Details for {len(products_to_scrape)} Products ---")
-
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_and_parse_edelrid(session, product) for product in products_to_scrape]
-        results = await asyncio.gather(*tasks)
-
+async def main_edelrid(politeness_delay=POLITENESS_DELAY, parse_executor_kind=PARSE_EXECUTOR,
+                       cache_dir=CACHE_DIR, resume=False, output_format=OUTPUT_FORMAT,
+                       max_concurrency=MAX_CONCURRENCY, session=None, parse_backend=PARSE_BACKEND,
+                       record_dir=None, replay_url=None, progress=None, control=None, download_assets=False,
+                       sqlite=False, locales=(DEFAULT_LOCALE,), discovery='categories'):
+    """
+    Main function to run the entire Edelrid scraping process.
+    Requests per host adapt between 1 and `max_concurrency` in flight (AIMD).
+    `parse_executor_kind='process'` parses product pages in a process pool and
+    `parse_backend` picks the 'bs4' or the faster 'lxml' extraction.
+    `cache_dir` holds the shared on-disk HTTP cache; pass None to disable it.
+    Every product page is fetched once, however many categories list it.
+    Every finished product is streamed to JOURNAL_FILE; `resume=True` reloads
+    it and only fetches the products that are not done yet. The output file
+    ('json' or 'jsonl') is built from the journal at the end, next to a
+    Prometheus text file and a JSON summary of the run's metrics.
+    `download_assets=True` also downloads every product's gallery images and
+    PDF downloads into ASSET_DIR and lists their local paths in the record's
+    'assets'.
+    `sqlite=True` also upserts the products into OUTPUT_BASE + '.sqlite'
+    (Modules/SqliteStore.py), indexed for article number and GTIN lookups.
+    `locales` (keys of LOCALES) crawls several languages in one run over the
+    same session, cache and per-host limits; the output then has one record
+    per product with every locale's text under 'locales' (Modules/Locales.py).
+    `discovery='sitemap'` reads the product URLs from the site's XML sitemaps
+    (the category pages and listings are still crawled for category
+    membership); a single-locale run also reuses the last run's version of
+    every product whose sitemap `lastmod` hasn't moved (Modules/Sitemap.py).
+    Pass `session` to share an existing session; otherwise one is created
+    with Modules.Http.create_session.
+    `record_dir` archives every response for the replay server (Modules/Replay.py);
+    `replay_url` sends all requests to such a server instead of the real site.
+    `progress` is called with a Modules.Progress.ProgressEvent as products finish.
+    `control` (a Modules.Control.RunControl) pauses or cancels the run from another
+    thread; a cancelled run still saves every product parsed so far.
+    """
+    unknown = [locale for locale in locales if locale not in LOCALES]
+    if unknown:
+        raise ValueError(f"Unknown locale(s) {', '.join(unknown)} (expected some of: {', '.join(LOCALES)})")
+    if discovery not in DISCOVERY_MODES:
+        raise ValueError(f"Unknown discovery {discovery!r} (expected one of: {', '.join(DISCOVERY_MODES)})")
+    metrics = RunMetrics('edelrid')
+    tracker = Progress(progress)
+    index = ProductIndex()
+    # Merged multi-locale snapshots can't stand in for one locale's page, so only single-locale runs skip
+    lastmods = LastmodFilter(OUTPUT_BASE if discovery == 'sitemap' and len(locales) == 1 else None)
+    control = control or RunControl()
+    control.bind()
+    if record_dir:
+        from Modules.Replay import ArchiveRecorder  # Only recording runs need the aiohttp server code
+
+    with RunJournal(JOURNAL_FILE, resume=resume) as journal, parse_executor(parse_executor_kind) as executor:
+        if resume:
+            print(f"Resuming: {len(journal.done)} products already done in '{JOURNAL_FILE}'")
+
+        async def fetch_and_journal(product):
+            try:
+                result = await fetch_and_parse_edelrid(fetcher, product, executor, parse_backend)
+            except RunCancelled:
+                return
+            # We don't want to save the original 'category_name' and 'category_url' in the product list
+            result.pop('category_name', None)
+            result.pop('category_url', None)
+            metrics.inc('products_total', result='error' if result.get('error') else 'ok')
+            tracker.advance(error=bool(result.get('error')))
+            journal.append(result)
+
+        async with shared_session(session, limit_per_host=max_concurrency) as session:
+            cache = ResponseCache(cache_dir) if cache_dir else None
+            fetcher = Fetcher(session, delay=politeness_delay, cache=cache,
+                              limiter=AdaptiveLimiter(maximum=max_concurrency),
+                              recorder=ArchiveRecorder(record_dir) if record_dir else None, origin=replay_url,
+                              metrics=metrics, control=control)
+
+            try:
+                products_to_scrape = await get_all_product_urls_edelrid(fetcher, index, locales, discovery)
+            except RunCancelled:
+                print("\n--- Run cancelled during discovery ---")
+                return
+            if not products_to_scrape:
+                print("No products found to scrape. Exiting.")
+                return
+
+            pending = [product for product in products_to_scrape
+                       if not journal.is_done(lastmods.take(product)) and not lastmods.carry_over(product, journal)]
+            print(f"\n--- STAGE 3: Asynchronously Fetching Details for {len(pending)} Products ---")
+            tracker.add_total(len(pending))
+
+            with metrics.stage('3_details'):
+                await asyncio.gather(*(fetch_and_journal(product) for product in pending))
+            tracker.finish()
+
+            if download_assets and not control.cancelled:
+                print(f"\n--- Downloading product images and PDFs to '{ASSET_DIR}' ---")
+                store = AssetStore(ASSET_DIR)
+                asset_fetcher = Fetcher(session, delay=0, limiter=AdaptiveLimiter(maximum=ASSET_CONCURRENCY),
+                                        origin=replay_url, metrics=metrics, control=control)
+                with metrics.stage('3_assets'):
+                    await download_product_assets(asset_fetcher, store, journal)
+                store.close()
+                print(store.summary())
+
+    if control.cancelled:
+        print("\n--- Run cancelled: saving the products finished so far (resume to continue) ---")
     print("\n--- STAGE 4: Data Processing Complete ---")
-
-    final_data = {}
-    for product in results:
-        category = product.get('category', 'Uncategorized')
-        # We don't want to save the original 'category_name' and 'category_url' in the product list
-        product.pop('category_name', None)
-        product.pop('category_url', None)
-        final_data.setdefault(category, []).append(product)
-
-    output_file = 'edelrid_full_product_data.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(final_data, f, indent=2, ensure_ascii=False)
-
-    print(f"\nSuccessfully scraped all data. Results saved to '{output_file}'")
\ No newline at end of file
+    print(fetcher.summary())
+    if lastmods.output_base:
+        print(lastmods.summary())
+
+    with metrics.stage('4_output'):
+        source = JOURNAL_FILE
+        if len(locales) > 1:
+            source = merge_locales(JOURNAL_FILE, OUTPUT_BASE + MERGED_SUFFIX, {locale: LOCALES[locale] for locale in locales})
+        output_file = write_output(source, OUTPUT_BASE, output_format, categories=index.categories())
+        delta_file, changes = write_delta(source, OUTPUT_BASE, complete=not control.cancelled,
+                                          categories=index.categories())
+        lastmods.save(source)
+        if sqlite:
+            written, seen = write_sqlite(source, OUTPUT_BASE + DB_SUFFIX, categories=index.categories())
+    print(f"\nSuccessfully scraped all data. Results saved to '{output_file}'")
+    print("Changes since the last run saved to '{}' ({added} added, {removed} removed, "
+          "{changed} changed, {unchanged} unchanged)".format(delta_file, **changes))
+    if sqlite:
+        print(f"SQLite store '{OUTPUT_BASE + DB_SUFFIX}' updated: {written} of {seen} products written")
+    print("Run metrics saved to '{}' and '{}'".format(*metrics.write(OUTPUT_BASE)))
+
+
+# === Registry ===
+
+SCRAPER = register(Scraper(
+    name='edelrid', label='Edlerid',
+    discover=discover_products_edelrid, fetch=fetch_and_parse_edelrid, parse=parse_product_page_edelrid,
+    run=main_edelrid, journal_file=JOURNAL_FILE, output_base=OUTPUT_BASE,
+))
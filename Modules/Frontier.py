@@ -0,0 +1,523 @@
+"""
+Distributed crawl over a shared SQLite frontier, for refreshes that one
+event loop on one core can't keep up with.
+
+A coordinator discovers the products and writes them into the frontier;
+any number of worker processes, on this box or on others that mount the
+same volume, claim batches of products, fetch and parse them with the
+scraper's own fetch function and write the records back:
+
+    python -m Modules.Frontier coordinate petzl --frontier /mnt/shared/petzl.frontier --workers 4
+    python -m Modules.Frontier work /mnt/shared/petzl.frontier        # on every other box
+
+Every claim is a lease that the worker's heartbeat keeps extending; the
+products of a worker that dies return to the pool once its lease expires.
+When the frontier is drained the coordinator copies the records into the
+scraper's journal and writes the usual output, delta and SQLite files.
+
+Each worker keeps its own per-host limiter, so the sites see up to
+workers x `--concurrency` requests in flight; size both to the politeness
+limit. Throughput grows with the worker count until that limit, or the
+frontier's write lock, becomes the bottleneck.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from Modules.Concurrency import AdaptiveLimiter
+from Modules.Control import RunControl
+from Modules.Delta import write_delta
+from Modules.Http import Fetcher, shared_session, POLITENESS_DELAY
+from Modules.HttpCache import ResponseCache, CACHE_DIR
+from Modules.Journal import RunJournal
+from Modules.Metrics import RunMetrics
+from Modules.Output import write_output, OUTPUT_FORMAT
+from Modules.Parsing import PARSE_BACKEND
+from Modules.Pipeline import run_pipeline
+from Modules.ProductIndex import ProductIndex, canonical_url
+from Modules.Registry import get_scraper
+
+# --- Configuration ---
+FRONTIER_SUFFIX = '.frontier.sqlite'
+LEASE_SECONDS = 120        # A claim returns to the pool if its worker stops heartbeating for this long
+HEARTBEAT_INTERVAL = 20    # Seconds between lease extensions (and result flushes)
+CLAIM_BATCH = 25           # Max products claimed per transaction; a worker claims at most its own concurrency
+RESULT_BATCH = 25          # Records written back per transaction
+POLL_INTERVAL = 0.5        # Seconds an idle worker waits before claiming again
+PROGRESS_INTERVAL = 10.0   # Seconds between the coordinator's progress lines
+MAX_ATTEMPTS = 3           # Leases a product may lose to dead workers before it is given up
+BUSY_TIMEOUT = 60          # Seconds a connection waits for another process's write lock
+COORDINATOR_WAIT = 300     # Seconds a worker started before its coordinator waits for the frontier to be set up
+# WAL needs shared memory, which networked volumes don't provide; 'WAL' is faster when every worker is local
+JOURNAL_MODE = 'DELETE'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,          -- canonical URL
+    product TEXT NOT NULL,             -- the product as discovered (JSON)
+    state TEXT NOT NULL DEFAULT 'pending',  -- pending, leased or done
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT                        -- the finished record (JSON)
+);
+CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state, lease_expires);
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL,
+    claimed INTEGER NOT NULL DEFAULT 0,
+    finished INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Frontier:
+    """
+    The shared work queue: one row per product with its lease, and the
+    finished record once a worker has written it back. Every claim runs in
+    a BEGIN IMMEDIATE transaction, so two workers never lease the same row.
+
+    The methods block (up to BUSY_TIMEOUT while another process writes), so
+    the frontier is opened with `await Frontier.open(path)`, which connects
+    on the frontier's own thread, and async code runs every method there
+    through `call`.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='frontier')
+        self.db = None
+
+    @classmethod
+    async def open(cls, path):
+        """Creates (or opens) the frontier at `path` without blocking the event loop."""
+        frontier = cls(path)
+        await frontier.call(frontier._connect)
+        return frontier
+
+    def _connect(self):
+        self.db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self.db.execute(f'PRAGMA journal_mode={JOURNAL_MODE}')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    async def call(self, method, *args):
+        """Runs `method` (one of this frontier's methods) on the frontier's thread without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(method, *args))
+
+    @contextmanager
+    def _transaction(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+
+    def get_meta(self, key):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key, value):
+        with self._transaction():
+            self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, json.dumps(value, ensure_ascii=False)))
+
+    def add(self, products):
+        """Queues products that aren't in the frontier yet; returns how many were new."""
+        before = self.db.total_changes
+        with self._transaction():
+            self.db.executemany('INSERT OR IGNORE INTO frontier (url, product) VALUES (?, ?)',
+                                [(canonical_url(product['product_url']), json.dumps(product, ensure_ascii=False))
+                                 for product in products])
+        return self.db.total_changes - before
+
+    def finish_discovery(self, categories):
+        """Marks discovery complete and stores every product's categories for the output."""
+        self.set_meta('categories', categories)
+
+    def discovered(self):
+        return self.get_meta('categories') is not None
+
+    def claim(self, worker, limit=CLAIM_BATCH, lease=LEASE_SECONDS):
+        """
+        Leases up to `limit` products to `worker`: pending ones first, then
+        those whose lease expired (their worker died). A product that already
+        lost MAX_ATTEMPTS leases is finished with an 'error' record instead.
+        Returns (products, number reclaimed from expired leases).
+        """
+        now = time.time()
+        with self._transaction():
+            abandoned = self.db.execute(
+                "SELECT id, product FROM frontier WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, MAX_ATTEMPTS)).fetchall()
+            self.db.executemany(
+                "UPDATE frontier SET state = 'done', worker = NULL, lease_expires = NULL, result = ? WHERE id = ?",
+                [(json.dumps({**json.loads(product), 'error': f'Lost by {MAX_ATTEMPTS} workers'}, ensure_ascii=False),
+                  row_id) for row_id, product in abandoned])
+            rows = self.db.execute(
+                """SELECT id, product, state FROM frontier
+                   WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?)
+                   ORDER BY state DESC, id LIMIT ?""", (now, limit)).fetchall()
+            self.db.executemany(
+                "UPDATE frontier SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?", [(worker, now + lease, row_id) for row_id, _, _ in rows])
+            self.db.execute(
+                """INSERT INTO workers (name, heartbeat, claimed) VALUES (?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET heartbeat = excluded.heartbeat,
+                                                   claimed = claimed + excluded.claimed""", (worker, now, len(rows)))
+        return [json.loads(product) for _, product, _ in rows], sum(state == 'leased' for _, _, state in rows)
+
+    def heartbeat(self, worker, lease=LEASE_SECONDS):
+        """Extends every lease `worker` holds."""
+        now = time.time()
+        with self._transaction():
+            self.db.execute("UPDATE frontier SET lease_expires = ? WHERE worker = ? AND state = 'leased'",
+                            (now + lease, worker))
+            self.db.execute('UPDATE workers SET heartbeat = ? WHERE name = ?', (now, worker))
+
+    def complete(self, worker, records):
+        """Writes finished records back. A record that arrives after its lease moved on still counts."""
+        with self._transaction():
+            self.db.executemany(
+                "UPDATE frontier SET state = 'done', worker = NULL, lease_expires = NULL, result = ? "
+                "WHERE url = ? AND state != 'done'",
+                [(json.dumps(record, ensure_ascii=False), canonical_url(record['product_url'])) for record in records])
+            self.db.execute('UPDATE workers SET finished = finished + ?, heartbeat = ? WHERE name = ?',
+                            (len(records), time.time(), worker))
+
+    def release(self, worker):
+        """Returns the products `worker` still holds to the pool (a clean shutdown)."""
+        with self._transaction():
+            self.db.execute("UPDATE frontier SET state = 'pending', worker = NULL, lease_expires = NULL, "
+                            "attempts = attempts - 1 WHERE worker = ? AND state = 'leased'", (worker,))
+
+    def counts(self):
+        counts = dict.fromkeys(('pending', 'leased', 'done'), 0)
+        counts.update(self.db.execute('SELECT state, COUNT(*) FROM frontier GROUP BY state'))
+        return counts
+
+    def finished(self):
+        """True once discovery is complete and every product is done."""
+        counts = self.counts()
+        return self.discovered() and not counts['pending'] and not counts['leased']
+
+    def export(self, journal):
+        """Appends every finished record to `journal` (a RunJournal) in discovery order; returns the count."""
+        exported = 0
+        for (result,) in self.db.execute("SELECT result FROM frontier WHERE state = 'done' ORDER BY id"):
+            journal.append(json.loads(result))
+            exported += 1
+        return exported
+
+    def summary(self):
+        counts = self.counts()
+        workers = self.db.execute('SELECT COUNT(*) FROM workers').fetchone()[0]
+        return (f"Frontier: {counts['done']} done, {counts['leased']} leased, {counts['pending']} pending, "
+                f"{workers} workers seen")
+
+    def close(self):
+        if self.db is not None:
+            self._executor.submit(self.db.close).result()
+        self._executor.shutdown()
+
+
+async def join_frontier(frontier_path, control, wait=COORDINATOR_WAIT):
+    """
+    Opens the frontier at `frontier_path` once a coordinator has created it
+    and recorded its scraper; returns (frontier, scraper name), or
+    (None, None) if `control` is cancelled first. Raises TimeoutError after
+    `wait` seconds.
+    """
+    deadline = time.monotonic() + wait
+    announced = False
+    while not control.cancelled:
+        # Only open an existing file: a worker must not create the frontier the coordinator is about to replace
+        if os.path.exists(frontier_path):
+            frontier = await Frontier.open(frontier_path)
+            if scraper_name := await frontier.call(frontier.get_meta, 'scraper'):
+                return frontier, scraper_name
+            frontier.close()
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"No coordinator set up '{frontier_path}' within {wait}s; "
+                               f"start 'python -m Modules.Frontier coordinate' for it first")
+        if not announced:
+            print(f"Waiting up to {wait}s for a coordinator to set up '{frontier_path}'")
+            announced = True
+        await asyncio.sleep(POLL_INTERVAL)
+    return None, None
+
+
+async def work(frontier_path, name=None, max_concurrency=None, cache_dir=CACHE_DIR, parse_backend=PARSE_BACKEND,
+               replay_url=None, session=None, control=None, wait=COORDINATOR_WAIT):
+    """
+    Worker loop: claims batches from the frontier and runs them through the
+    scraper's fetch function on `max_concurrency` detail workers (default:
+    the scraper's MAX_CONCURRENCY), writing the records back in batches and
+    heartbeating its leases. It only claims a batch once its detail workers
+    are about to run out, so the other workers get their share. Returns once the frontier is drained, or when
+    `control` is cancelled, in which case unfinished claims are released.
+    A worker started before its coordinator waits up to `wait` seconds for
+    the frontier (see join_frontier). Returns the number of products fetched.
+    """
+    control = control or RunControl()
+    control.bind()
+    frontier, scraper_name = await join_frontier(frontier_path, control, wait)
+    if frontier is None:
+        return 0
+    scraper = get_scraper(scraper_name)
+    name = name or worker_name()
+    concurrency = max_concurrency or scraper.max_concurrency
+    results = []
+
+    async def flush():
+        if results:
+            batch = results[:]
+            results.clear()
+            await frontier.call(frontier.complete, name, batch)
+
+    async def fetch(product):
+        results.append(await scraper.fetch(fetcher, product, None, parse_backend))
+        if len(results) >= RESULT_BATCH:
+            await flush()
+
+    async def produce(emit):
+        while not control.cancelled:
+            products, reclaimed = await frontier.call(frontier.claim, name, min(CLAIM_BATCH, concurrency))
+            if reclaimed:
+                print(f"[{name}] Reclaimed {reclaimed} products from expired leases")
+            if not products:
+                await flush()  # Our own leases keep the frontier from looking drained
+                if await frontier.call(frontier.finished):
+                    return
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+            for product in products:
+                await emit(product)
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await flush()
+            await frontier.call(frontier.heartbeat, name)
+
+    print(f"[{name}] Working on '{frontier_path}' ({scraper.label}, {concurrency} detail workers)")
+    try:
+        async with shared_session(session, limit_per_host=concurrency) as session:
+            fetcher = Fetcher(session, cache=ResponseCache(cache_dir) if cache_dir else None,
+                              limiter=AdaptiveLimiter(maximum=concurrency), origin=replay_url,
+                              metrics=RunMetrics(scraper.name), control=control)
+            beating = asyncio.ensure_future(heartbeat())
+            try:
+                fetched = await run_pipeline(produce, fetch, lambda record: None, workers=concurrency, queue_size=1,
+                                             metrics=fetcher.metrics)
+            finally:
+                beating.cancel()
+        await flush()
+    finally:
+        await frontier.call(frontier.release, name)
+        frontier.close()
+    print(f"[{name}] Done: {fetched} products fetched")
+    return fetched
+
+
+def _work_process(frontier_path, options):
+    """Entry point of a local worker process; SIGINT/SIGTERM release its claims and stop it."""
+    control = RunControl()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, control.cancel)
+            except (NotImplementedError, RuntimeError):
+                pass
+        await work(frontier_path, control=control, **options)
+
+    asyncio.run(main())
+
+
+def start_workers(frontier_path, count, **options):
+    """Starts `count` local worker processes (spawned, so they work the same on every platform)."""
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=_work_process, args=(frontier_path, options), daemon=True)
+                 for _ in range(count)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+async def coordinate(scraper_name, frontier_path=None, workers=0, resume=False, max_concurrency=None,
+                     politeness_delay=POLITENESS_DELAY, cache_dir=CACHE_DIR, parse_backend=PARSE_BACKEND,
+                     output_format=OUTPUT_FORMAT, sqlite=False, replay_url=None, session=None, control=None):
+    """
+    Runs one scraper's crawl through a frontier at `frontier_path` (default:
+    the scraper's output base + '.frontier.sqlite'): discovers the products
+    into it, starts `workers` local worker processes (0 to rely on workers
+    started elsewhere with `work`), waits until the frontier is drained and
+    writes the journal, output, delta and (`sqlite=True`) SQLite store.
+    `resume=True` keeps the existing frontier, so finished products aren't
+    fetched again and discovery is skipped if it already completed.
+    `control` cancels the wait; the records finished so far are still written.
+    """
+    from Modules.SqliteStore import write_sqlite, DB_SUFFIX
+
+    scraper = get_scraper(scraper_name)
+    frontier_path = frontier_path or scraper.output_base + FRONTIER_SUFFIX
+    control = control or RunControl()
+    control.bind()
+    if not resume:
+        for suffix in ('', '-journal', '-wal', '-shm'):
+            if os.path.exists(frontier_path + suffix):
+                os.remove(frontier_path + suffix)
+    frontier = await Frontier.open(frontier_path)
+    await frontier.call(frontier.set_meta, 'scraper', scraper.name)
+    metrics = RunMetrics(scraper.name)
+    started = time.monotonic()
+
+    worker_options = {'max_concurrency': max_concurrency,
+                      'cache_dir': os.path.abspath(cache_dir) if cache_dir else None,
+                      'parse_backend': parse_backend, 'replay_url': replay_url}
+    # Workers start straight away and pick products up as discovery writes them
+    processes = start_workers(frontier_path, workers, **worker_options)
+    try:
+        if await frontier.call(frontier.discovered):
+            print(f"Resuming '{frontier_path}': {await frontier.call(frontier.summary)}")
+        else:
+            index = ProductIndex()
+            batch = []
+
+            async def emit(product):
+                if index.add(product):
+                    batch.append(product)
+                if len(batch) >= CLAIM_BATCH:
+                    products = batch[:]
+                    batch.clear()
+                    await frontier.call(frontier.add, products)
+
+            async with shared_session(session, limit_per_host=max_concurrency or scraper.max_concurrency) as session:
+                fetcher = Fetcher(session, delay=politeness_delay, cache=ResponseCache(cache_dir) if cache_dir else None,
+                                  limiter=AdaptiveLimiter(maximum=max_concurrency or scraper.max_concurrency),
+                                  origin=replay_url, metrics=metrics, control=control)
+                with metrics.stage('1_discovery'):
+                    await scraper.discover(fetcher, emit)
+            await frontier.call(frontier.add, batch)
+            await frontier.call(frontier.finish_discovery, index.categories())
+            print(f"Discovered {index.summary()} into '{frontier_path}'")
+
+        print(f"--- Waiting for {workers or 'remote'} workers to drain the frontier ---")
+        with metrics.stage('3_details'):
+            last_report = time.monotonic()
+            while not control.cancelled and not await frontier.call(frontier.finished):
+                if processes and not any(process.is_alive() for process in processes):
+                    print("⚠️ Every local worker has exited; stopping with the frontier unfinished")
+                    break
+                if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    print(await frontier.call(frontier.summary))
+                    last_report = time.monotonic()
+                await asyncio.sleep(POLL_INTERVAL / 4)
+    finally:
+        for process in processes:
+            process.join(timeout=POLL_INTERVAL * 2)  # Workers exit by themselves once the frontier is drained
+            if process.is_alive():
+                process.terminate()  # SIGTERM: it releases its claims and stops
+                process.join()
+
+    complete = await frontier.call(frontier.finished)
+    categories = await frontier.call(frontier.get_meta, 'categories') or {}
+    with metrics.stage('4_output'):
+        with RunJournal(scraper.journal_file) as journal:
+            exported = await frontier.call(frontier.export, journal)
+        output_file = write_output(scraper.journal_file, scraper.output_base, output_format, categories=categories)
+        delta_file, changes = write_delta(scraper.journal_file, scraper.output_base, complete=complete,
+                                          categories=categories)
+        if sqlite:
+            written, seen = write_sqlite(scraper.journal_file, scraper.output_base + DB_SUFFIX, categories=categories)
+    print(await frontier.call(frontier.summary))
+    frontier.close()
+
+    print(f"\n--- {scraper.label}: {exported} products in {time.monotonic() - started:.1f}s ---")
+    if not complete:
+        print(f"Frontier unfinished: resume with the same '{frontier_path}' to fetch the rest")
+    print(f"Results saved to '{output_file}'")
+    print("Changes since the last run saved to '{}' ({added} added, {removed} removed, "
+          "{changed} changed, {unchanged} unchanged)".format(delta_file, **changes))
+    if sqlite:
+        print(f"SQLite store '{scraper.output_base + DB_SUFFIX}' updated: {written} of {seen} products written")
+    print("Run metrics saved to '{}' and '{}'".format(*metrics.write(scraper.output_base)))
+    return exported
+
+
+def main(argv=None):
+    from Modules.Registry import SCRAPER_MODULES
+
+    parser = argparse.ArgumentParser(description="Crawl through a shared SQLite frontier with several workers.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    coordinator = commands.add_parser('coordinate', help="Discover into the frontier, wait for it, write the output")
+    coordinator.add_argument('scraper', choices=list(SCRAPER_MODULES))
+    coordinator.add_argument('--frontier', metavar='PATH',
+                             help=f"Frontier database (default: <output base>{FRONTIER_SUFFIX})")
+    coordinator.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                             help="Local worker processes; 0 when every worker runs elsewhere (default: one per CPU)")
+    coordinator.add_argument('--resume', action='store_true', help="Keep the existing frontier and its finished products")
+    coordinator.add_argument('--sqlite', action='store_true', help="Also upsert the products into <output>.sqlite")
+    coordinator.add_argument('--format', choices=['json', 'jsonl'], default=OUTPUT_FORMAT)
+    coordinator.add_argument('--politeness-delay', type=float, default=POLITENESS_DELAY, metavar='SECONDS')
+    worker = commands.add_parser('work', help="Join a frontier as a worker")
+    worker.add_argument('frontier', metavar='PATH')
+    worker.add_argument('--wait', type=float, default=COORDINATOR_WAIT, metavar='SECONDS',
+                        help="How long to wait for a coordinator to set the frontier up")
+    for command in (coordinator, worker):
+        command.add_argument('--concurrency', type=int, metavar='N', help="Detail requests in flight per worker")
+        command.add_argument('--cache-dir', default=CACHE_DIR, metavar='DIR', help="HTTP cache directory")
+        command.add_argument('--no-cache', action='store_true', help="Disable the HTTP cache")
+        command.add_argument('--backend', choices=['bs4', 'lxml'], default=PARSE_BACKEND)
+        command.add_argument('--replay-url', metavar='URL', help="Send every request to a replay server")
+    args = parser.parse_args(argv)
+
+    options = {'max_concurrency': args.concurrency, 'cache_dir': None if args.no_cache else args.cache_dir,
+               'parse_backend': args.backend, 'replay_url': args.replay_url}
+    if args.command == 'work':
+        try:
+            _work_process(args.frontier, {**options, 'wait': args.wait})
+        except TimeoutError as e:
+            print(e)
+            return 1
+        return 0
+    control = RunControl()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, control.cancel)
+            except (NotImplementedError, RuntimeError):
+                pass
+        return await coordinate(args.scraper, args.frontier, workers=args.workers, resume=args.resume,
+                                politeness_delay=args.politeness_delay, output_format=args.format,
+                                sqlite=args.sqlite, control=control, **options)
+
+    asyncio.run(run())
+    return 1 if control.cancelled else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
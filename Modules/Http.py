@@ -0,0 +1,257 @@
+import asyncio
+import aiohttp
+from aiohttp.helpers import parse_mimetype
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse, urlsplit, urlunsplit
+
+from Modules.Concurrency import AdaptiveLimiter, parse_retry_after, MAX_CONCURRENCY
+from Modules.Metrics import RunMetrics
+from Modules.Retry import RetryPolicy
+
+# --- Configuration ---
+POLITENESS_DELAY = 0.5      # Minimum seconds between two discovery requests to the same host
+CONNECTION_LIMIT = 100      # Open connections across all hosts
+KEEPALIVE_TIMEOUT = 60      # Seconds an idle connection is kept for reuse
+DNS_CACHE_TTL = 600         # Seconds a resolved host is cached
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def accept_encoding():
+    """Advertise brotli only when aiohttp can actually decode it."""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return 'gzip, deflate'
+    return 'gzip, deflate, br'
+
+
+def create_session(limit_per_host=MAX_CONCURRENCY):
+    """
+    The one aiohttp session factory for every scraper: a TCPConnector with
+    per-host limits, long keep-alive and a DNS cache, so connections (and
+    their TLS handshakes) are reused across stages, plus compressed responses.
+    aiohttp does not pipeline requests on a connection; reuse is sequential.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        use_dns_cache=True,
+        ttl_dns_cache=DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(connector=connector, headers={'Accept-Encoding': accept_encoding()})
+
+
+@asynccontextmanager
+async def shared_session(session=None, limit_per_host=MAX_CONCURRENCY):
+    """Yields `session` if the caller already has one, otherwise creates (and closes) one."""
+    if session is not None:
+        yield session
+        return
+    async with create_session(limit_per_host) as own_session:
+        yield own_session
+
+
+class HostThrottle:
+    """
+    Spaces out requests to the same host by at least `delay` seconds.
+    Requests to different hosts never wait on each other.
+    """
+    def __init__(self, delay=POLITENESS_DELAY):
+        self.delay = delay
+        self._next_slot = {}
+        self._locks = {}
+
+    async def wait(self, url):
+        if self.delay <= 0:
+            return
+        host = urlparse(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            wait_for = self._next_slot.get(host, 0) - loop.time()
+            if wait_for > 0:
+                await asyncio.sleep(wait_for)
+            self._next_slot[host] = loop.time() + self.delay
+
+
+class _BodyCollector:
+    """Default stream consumer: buffers the whole body and returns it as bytes."""
+    def __init__(self):
+        self._chunks = []
+
+    def feed(self, chunk):
+        self._chunks.append(chunk)
+
+    def close(self):
+        return b''.join(self._chunks)
+
+
+class _PageCollector(_BodyCollector):
+    """Buffers the body like _BodyCollector and returns (body, charset of its Content-Type or None)."""
+    def __init__(self):
+        super().__init__()
+        self.charset = None
+
+    def begin(self, status, headers):
+        if content_type := headers.get('Content-Type'):
+            self.charset = parse_mimetype(content_type).parameters.get('charset')
+
+    def close(self):
+        return super().close(), self.charset
+
+
+class Fetcher:
+    """
+    Thin wrapper around an aiohttp session that every stage fetches through,
+    so the politeness rules, the per-host concurrency limits, the retry
+    policy and the response cache live in one place.
+
+    `recorder` (a Modules.Replay.ArchiveRecorder) archives every response.
+    `origin` sends every request to another server instead, keeping the
+    path and query, e.g. the local replay server; results still carry the
+    original URLs.
+    Every request is recorded in `metrics` (a Modules.Metrics.RunMetrics),
+    labelled with the `endpoint` name the caller passes.
+    With a `control` (Modules.Control.RunControl) new requests wait while
+    the run is paused and raise RunCancelled once it is cancelled.
+    """
+    def __init__(self, session, delay=POLITENESS_DELAY, cache=None, limiter=None, retry=None,
+                 recorder=None, origin=None, metrics=None, control=None):
+        self.session = session
+        self.throttle = HostThrottle(delay)
+        self.cache = cache
+        self.metrics = metrics or RunMetrics()
+        self.limiter = limiter or AdaptiveLimiter()
+        self.retry = retry or RetryPolicy(metrics=self.metrics)
+        self.recorder = recorder
+        self.control = control
+        self.origin = origin.rstrip('/') if origin else None
+
+    async def get(self, url, headers=None, timeout=30, polite=False, endpoint='other'):
+        """
+        Fetches `url` and returns the raw response body as bytes.
+        Raises aiohttp.ClientResponseError for non-2xx responses once retries
+        are exhausted (see Modules/Retry.py for what is retried).
+        `polite=True` applies the per-host politeness delay (used for discovery).
+        With a cache, fresh entries are served from disk and stale ones are
+        revalidated; a 304 Not Modified is answered from the cache.
+        """
+        return await self.stream(url, _BodyCollector, headers=headers, timeout=timeout, polite=polite,
+                                 endpoint=endpoint)
+
+    async def get_page(self, url, headers=None, timeout=30, polite=False, endpoint='other'):
+        """
+        Like `get`, but returns (body, charset): the charset of the response's
+        Content-Type header (None without one), for decoding HTML pages the
+        way the server declared them.
+        """
+        return await self.stream(url, _PageCollector, headers=headers, timeout=timeout, polite=polite,
+                                 endpoint=endpoint)
+
+    async def stream(self, url, consumer_factory, headers=None, timeout=30, polite=False, endpoint='other'):
+        """
+        Like `get`, but hands the body to a consumer chunk by chunk as it
+        arrives instead of buffering it. `consumer_factory()` must return an
+        object with `feed(chunk)` and `close()`; a fresh consumer is built for
+        every attempt and the value of its `close()` is returned. A consumer
+        with a `begin(status, headers)` method is told about the response
+        before its first chunk (e.g. to tell a 206 Partial Content from a 200).
+        """
+        target = self._target(url)
+        if self.recorder:
+            consumer_factory = self.recorder.wrap(url, consumer_factory)
+        try:
+            return await self.retry.call(
+                lambda: self._stream_once(target, consumer_factory(), headers, timeout, polite, endpoint), target)
+        except aiohttp.ClientResponseError as e:
+            if self.recorder:
+                self.recorder.record(url, e.status)
+            raise
+
+    def _target(self, url):
+        if not self.origin:
+            return url
+        parts = urlsplit(url)
+        return self.origin + urlunsplit(('', '', parts.path, parts.query, ''))
+
+    @staticmethod
+    def _replay(entry, consumer):
+        if hasattr(consumer, 'begin'):
+            consumer.begin(200, entry.response_headers())
+        for chunk in entry.iter_chunks(STREAM_CHUNK_SIZE):
+            consumer.feed(chunk)
+        return consumer.close()
+
+    async def _stream_once(self, url, consumer, headers, timeout, polite, endpoint):
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry and entry.is_fresh():
+            self.cache.hits += 1
+            self.metrics.inc('cache_hits_total', endpoint=endpoint)
+            return self._replay(entry, consumer)
+        if entry:
+            headers = {**(headers or {}), **entry.conditional_headers()}
+
+        while True:
+            if self.control:
+                await self.control.checkpoint()
+            if polite:
+                await self.throttle.wait(url)
+            host = await self.limiter.acquire(url)
+            if not self.control or self.control.running:
+                break
+            # Paused or cancelled while waiting for a slot: give it back (no status, so
+            # the limit is not adapted) and go back to the checkpoint
+            self.limiter.release(host, 0.0)
+        self.metrics.request_started(host)
+        started = asyncio.get_running_loop().time()
+        status = retry_after = writer = None
+        timed_out = False
+        size = 0
+        try:
+            async with self.session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                status = response.status
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if entry and response.status == 304:
+                    self.cache.revalidated += 1
+                    self.cache.refresh(entry, response.headers)
+                    return self._replay(entry, consumer)
+                response.raise_for_status()
+                if hasattr(consumer, 'begin'):
+                    consumer.begin(response.status, response.headers)
+                writer = self.cache.writer(url, response.headers) if self.cache else None
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    size += len(chunk)
+                    consumer.feed(chunk)
+                    if writer:
+                        writer.write(chunk)
+        except BaseException as e:
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            if writer:
+                writer.discard()
+            raise
+        finally:
+            latency = asyncio.get_running_loop().time() - started
+            self.limiter.release(host, latency, status=status, timed_out=timed_out, retry_after=retry_after)
+            self.metrics.request_finished(host, endpoint, status or ('timeout' if timed_out else 'error'),
+                                          latency, size)
+
+        if self.cache:
+            self.cache.misses += 1
+            if writer:
+                writer.commit()
+        return consumer.close()
+
+    def summary(self):
+        if self.cache:
+            cache_line = (f"HTTP cache: {self.cache.hits} fresh hits, {self.cache.revalidated} revalidated (304), "
+                          f"{self.cache.misses} downloaded")
+        else:
+            cache_line = "HTTP cache disabled"
+        text = f"{cache_line}\n{self.retry.summary()}"
+        if self.recorder:
+            text += f"\nRecorded {self.recorder.recorded} responses to '{self.recorder.directory}'"
+        return text
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+# --- Configuration ---
+CACHE_DIR = '.http_cache'
+DEFAULT_TTL = 6 * 60 * 60            # Seconds a response is served without asking the server
+CACHE_TTLS = [                       # (URL regex, TTL in seconds); first match wins
+    (re.compile(r'/view/list/products/'), 60 * 60),  # Edelrid listing API
+]
+MAX_CACHE_BYTES = 500 * 1024 * 1024  # Least recently used entries are evicted above this size
+STALE_TEMP_AGE = 60 * 60             # Seconds after which a leftover .part/.tmp file counts as abandoned
+
+
+class CacheEntry:
+    """One cached response: its metadata and the path of the stored body."""
+    def __init__(self, meta, body_path):
+        self.meta = meta
+        self.body_path = body_path
+
+    def is_fresh(self, now=None):
+        return (now or time.time()) < self.meta['stored_at'] + self.meta['ttl']
+
+    def conditional_headers(self):
+        """Validators for revalidating a stale entry (If-None-Match / If-Modified-Since)."""
+        headers = {}
+        if etag := self.meta.get('etag'):
+            headers['If-None-Match'] = etag
+        if last_modified := self.meta.get('last_modified'):
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def response_headers(self):
+        """The stored response headers that describe the body (Content-Type)."""
+        content_type = self.meta.get('content_type')
+        return {'Content-Type': content_type} if content_type else {}
+
+    def read(self):
+        with open(self.body_path, 'rb') as f:
+            return f.read()
+
+    def iter_chunks(self, chunk_size):
+        with open(self.body_path, 'rb') as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+
+class CacheWriter:
+    """Streams a response body into the cache; the entry only appears on `commit()`."""
+    def __init__(self, cache, key, meta):
+        self.cache = cache
+        self.key = key
+        self.meta = meta
+        self.size = 0
+        fd, self._tmp_path = tempfile.mkstemp(dir=cache.directory, prefix=key, suffix='.part')
+        self._file = os.fdopen(fd, 'wb')
+
+    def write(self, chunk):
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self):
+        self._file.close()
+        self.cache._commit(self.key, self._tmp_path, self.meta, self.size)
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache keyed by URL, shared by all scrapers.
+
+    Each entry is stored as `<sha256>.body` plus a `<sha256>.json` metadata
+    file. Fresh entries are served straight from disk; stale entries are
+    revalidated with their ETag / Last-Modified and refreshed on a 304.
+    When the cache grows past `max_bytes` the least recently used entries
+    are evicted. Temp files left behind by a crashed run are removed on open
+    once they are older than STALE_TEMP_AGE (younger ones may belong to
+    another process sharing the directory).
+    """
+    def __init__(self, directory=CACHE_DIR, default_ttl=DEFAULT_TTL, ttl_rules=CACHE_TTLS,
+                 max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.default_ttl = default_ttl
+        self.ttl_rules = ttl_rules
+        self.max_bytes = max_bytes
+        self.hits = self.revalidated = self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._load_index()  # key -> (size, last access time)
+        self._total_bytes = sum(size for size, _ in self._index.values())
+
+    def _load_index(self):
+        index = {}
+        stale_before = time.time() - STALE_TEMP_AGE
+        for name in os.listdir(self.directory):
+            if name.endswith(('.part', '.tmp')):
+                self._remove_stale(os.path.join(self.directory, name), stale_before)
+                continue
+            if not name.endswith('.body'):
+                continue
+            key = name[:-len('.body')]
+            if not os.path.exists(self._meta_path(key)):
+                continue
+            stat = os.stat(self._body_path(key))
+            index[key] = (stat.st_size, stat.st_mtime)
+        return index
+
+    @staticmethod
+    def _remove_stale(path, stale_before):
+        try:
+            if os.stat(path).st_mtime < stale_before:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, key + '.body')
+
+    def _meta_path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def ttl_for(self, url):
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, url):
+        """Returns the CacheEntry for `url`, or None if it is not cached."""
+        key = self._key(url)
+        if key not in self._index:
+            return None
+        try:
+            with open(self._meta_path(key), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._remove(key)
+            return None
+        self._touch(key)
+        return CacheEntry(meta, self._body_path(key))
+
+    def writer(self, url, headers):
+        """
+        Returns a CacheWriter for streaming a 200 response into the cache, or
+        None for responses marked `Cache-Control: no-store`.
+        """
+        if 'no-store' in headers.get('Cache-Control', ''):
+            return None
+        meta = {
+            'url': url,
+            'stored_at': time.time(),
+            'ttl': self.ttl_for(url),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_type': headers.get('Content-Type'),
+        }
+        return CacheWriter(self, self._key(url), meta)
+
+    def store(self, url, body, headers):
+        """Stores a complete 200 response body."""
+        if writer := self.writer(url, headers):
+            writer.write(body)
+            writer.commit()
+
+    def _commit(self, key, tmp_body_path, meta, size):
+        self._remove(key)
+        os.replace(tmp_body_path, self._body_path(key))
+        self._write_atomic(self._meta_path(key), json.dumps(meta).encode('utf-8'))
+        self._index[key] = (size, time.time())
+        self._total_bytes += size
+        self._evict()
+
+    def refresh(self, entry, headers):
+        """Marks a revalidated entry (304 Not Modified) as fresh again."""
+        entry.meta['stored_at'] = time.time()
+        entry.meta['ttl'] = self.ttl_for(entry.meta['url'])
+        entry.meta['etag'] = headers.get('ETag') or entry.meta.get('etag')
+        entry.meta['last_modified'] = headers.get('Last-Modified') or entry.meta.get('last_modified')
+        key = self._key(entry.meta['url'])
+        self._write_atomic(self._meta_path(key), json.dumps(entry.meta).encode('utf-8'))
+
+    def _touch(self, key):
+        size, _ = self._index[key]
+        now = time.time()
+        self._index[key] = (size, now)
+        try:
+            os.utime(self._body_path(key), (now, now))
+        except OSError:
+            pass
+
+    def _remove(self, key):
+        if key in self._index:
+            size, _ = self._index.pop(key)
+            self._total_bytes -= size
+        for path in (self._body_path(key), self._meta_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            self._remove(key)
+            if self._total_bytes <= self.max_bytes:
+                break
+
+    @staticmethod
+    def _write_atomic(path, data):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,108 @@
+import json
+import os
+import time
+
+from Modules.ProductIndex import canonical_url
+
+# --- Configuration ---
+FSYNC_EVERY = 25        # fsync after this many appended records...
+FSYNC_INTERVAL = 2.0    # ...or after this many seconds, whichever comes first
+
+
+def record_key(record):
+    """Identifies a product record across runs: its canonical URL, whichever categories list it."""
+    return canonical_url(record['product_url'])
+
+
+def iter_journal(path):
+    """
+    Yields (byte offset, record) for every record in a journal, in write order.
+    A truncated final line (crash mid-write) is skipped.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        offset = 0
+        for line in f:
+            try:
+                yield offset, json.loads(line)
+            except json.JSONDecodeError:
+                pass
+            offset += len(line)
+
+
+def latest_offsets(path):
+    """Maps every record key to the offset of its latest journal entry, in first-seen order."""
+    offsets = {}
+    for offset, record in iter_journal(path):
+        offsets[record_key(record)] = offset
+    return offsets
+
+
+def read_record(f, offset):
+    """Reads the single record starting at `offset` from a journal opened in binary mode."""
+    f.seek(offset)
+    return json.loads(f.readline())
+
+
+def _drop_partial_line(path):
+    """Truncates a half-written last line so new records start on a fresh line."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+class RunJournal:
+    """
+    Append-only JSONL journal of completed product records, so a crashed run
+    keeps everything finished so far. Writes are fsynced in batches.
+
+    With `resume=True` the existing journal is reloaded and appended to; the
+    keys of records whose latest entry finished without an 'error' are kept
+    in `done` so the caller can skip those URLs. Otherwise a fresh journal
+    is started.
+    """
+    def __init__(self, path, resume=False, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.done = set()
+        if resume:
+            for _, record in iter_journal(path):
+                if 'error' in record:
+                    self.done.discard(record_key(record))
+                else:
+                    self.done.add(record_key(record))
+            _drop_partial_line(path)
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def is_done(self, product):
+        return record_key(product) in self.done
+
+    def append(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._pending += 1
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
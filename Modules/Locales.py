@@ -0,0 +1,86 @@
+import json
+from urllib.parse import urlsplit, urlunsplit
+
+from Modules.Journal import iter_journal, read_record, record_key
+from Modules.ProductIndex import canonical_url
+
+# --- Configuration ---
+MERGED_SUFFIX = '.locales.jsonl'  # One merged record per product, built from the journal at the end of a run
+# Fields that differ between locales; everything else (gallery, references, ...) comes from the primary locale
+LOCALE_FIELDS = ('product_url', 'category', 'title', 'subtitle', 'main_description', 'features',
+                 'specifications', 'technical_documents')
+
+
+def tag_locale(emit, locale, locales):
+    """Wraps a discovery `emit` so products carry their 'locale', but only when a run crawls several locales."""
+    if len(locales) < 2:
+        return emit
+
+    async def emit_tagged(product):
+        await emit({**product, 'locale': locale})
+    return emit_tagged
+
+
+def neutral_url(url, prefix):
+    """The canonical URL without its locale prefix, e.g. '/DE/de/Professional/X' -> '/Professional/X'."""
+    parts = urlsplit(canonical_url(url))
+    path = parts.path
+    if prefix and path.lower().startswith(f'/{prefix.lower()}/'):
+        path = path[len(prefix) + 1:]
+    return urlunsplit(parts._replace(path=path))
+
+
+def _article_numbers(record):
+    return {str(number) for ref in record.get('references') or []
+            if (number := ref.get('article_number') or ref.get('Reference') or ref.get('gtin'))}
+
+
+def merge_locales(journal_path, merged_path, prefixes):
+    """
+    Folds the per-locale records of a multi-locale run into one record per
+    product and writes them to `merged_path` (a JSONL file the output
+    writers read like a journal). `prefixes` is {locale: URL prefix} in
+    priority order; the first locale is the primary one.
+
+    Pages of the same product are matched by their URL without the locale
+    prefix, or failing that (translated slugs) by a shared article number.
+    The merged record is the primary locale's (or the first that parsed),
+    so gallery, references and other locale-independent data are taken
+    once, plus 'locales': {locale: {title, description, features, ...}}
+    with every locale's text, and the union of all locales' 'assets'.
+    Only record offsets and article numbers are held in memory.
+
+    Returns `merged_path`.
+    """
+    order = {locale: position for position, locale in enumerate(prefixes)}
+    latest = {}
+    for offset, record in iter_journal(journal_path):
+        latest[record_key(record)] = (offset, record.get('locale'), record['product_url'], _article_numbers(record))
+
+    groups = {}        # neutral URL -> {locale: offset}
+    by_article = {}    # article number -> neutral URL of the product that has it
+    entries = sorted(latest.values(), key=lambda entry: order.get(entry[1], len(order)))
+    for offset, locale, url, articles in entries:
+        key = neutral_url(url, prefixes.get(locale))
+        if key not in groups:
+            key = next((by_article[number] for number in articles if number in by_article), key)
+        groups.setdefault(key, {}).setdefault(locale, offset)
+        for number in articles:
+            by_article.setdefault(number, key)
+
+    with open(journal_path, 'rb') as journal, open(merged_path, 'w', encoding='utf-8') as out:
+        for group in groups.values():
+            records = [read_record(journal, offset)
+                       for _, offset in sorted(group.items(), key=lambda item: order.get(item[0], len(order)))]
+            parsed = [record for record in records if 'error' not in record]
+            if not parsed:
+                merged = records[0]
+            else:
+                merged = {name: value for name, value in parsed[0].items() if name != 'locale'}
+                merged['locales'] = {record.get('locale'): {name: record[name] for name in LOCALE_FIELDS if name in record}
+                                     for record in parsed}
+                assets = {url: path for record in parsed for url, path in (record.get('assets') or {}).items()}
+                if assets:
+                    merged['assets'] = assets
+            out.write(json.dumps(merged, ensure_ascii=False) + '\n')
+    return merged_path
@@ -0,0 +1,73 @@
+import lxml.html
+from bs4.dammit import UnicodeDammit
+from lxml import etree
+
+# Text inside these tags is not part of BeautifulSoup's get_text()
+_NON_TEXT_TAGS = frozenset(('script', 'style', 'template'))
+
+
+def has_class(name):
+    """XPath predicate matching elements whose class list contains `name` (like BS4's class_=)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def html_tree(html, encoding=None):
+    """
+    Parses raw page bytes with lxml. The encoding is worked out exactly as
+    BeautifulSoup does it (bs4's UnicodeDammit: `encoding`, normally the
+    HTTP charset, then a BOM or <meta charset>, then sniffing), so both parse
+    backends read a page the same way.
+    """
+    if isinstance(html, str):
+        return lxml.html.document_fromstring(html)
+    dammit = UnicodeDammit(html, [encoding] if encoding else [], is_html=True)
+    if dammit.original_encoding in ('utf-8', 'ascii'):
+        data = html
+    else:
+        data = dammit.unicode_markup.encode('utf-8')
+    return lxml.html.document_fromstring(data, parser=lxml.html.HTMLParser(encoding='utf-8'))
+
+
+def _strings(element):
+    if element.tag in _NON_TEXT_TAGS:
+        return
+    if element.text:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str):
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def get_text(element, separator=''):
+    """Equivalent of BeautifulSoup's `tag.get_text(strip=True, separator=separator)`."""
+    return separator.join(text for text in (s.strip() for s in _strings(element)) if text)
+
+
+def bs4_string(element):
+    """
+    Equivalent of BeautifulSoup's `tag.string`: the text of an element with a
+    single child (descending through single-child elements), else None.
+    """
+    children = []
+    if element.text:
+        children.append(element.text)
+    for child in element:
+        children.append(child)
+        if child.tail:
+            children.append(child.tail)
+    if len(children) != 1:
+        return None
+    child = children[0]
+    if isinstance(child, str):
+        return child
+    if child.tag is etree.Comment:
+        return child.text
+    if isinstance(child.tag, str):
+        return bs4_string(child)
+    return None
+
+
+def first(nodes):
+    return nodes[0] if nodes else None
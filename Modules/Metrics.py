@@ -0,0 +1,202 @@
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# --- Configuration ---
+METRIC_PREFIX = 'scraper_'
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)        # Seconds per HTTP request
+PARSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)  # Seconds per parsed page
+
+_HELP = {
+    'stage_seconds': ('gauge', "Wall time spent in each scraper stage (stages can overlap when pipelined)"),
+    'request_duration_seconds': ('histogram', "HTTP request latency by host and endpoint"),
+    'response_bytes_total': ('counter', "Response body bytes downloaded"),
+    'responses_total': ('counter', "HTTP responses by status code ('timeout' / 'error' without a response)"),
+    'cache_hits_total': ('counter', "Responses served from the HTTP cache without a request"),
+    'retries_total': ('counter', "Retried requests by reason"),
+    'retry_budget_refusals_total': ('counter', "Retries refused because the run's retry budget was spent"),
+    'parse_duration_seconds': ('histogram', "Time to parse one product page (including process-pool hand-off)"),
+    'products_total': ('counter', "Products finished, by result"),
+    'queue_depth': ('gauge', "Products waiting for a detail worker"),
+    'in_flight_requests': ('gauge', "HTTP requests in flight per host"),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as exported to Prometheus."""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (None above the last bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'p50_le': self.quantile(0.5),
+            'p95_le': self.quantile(0.95),
+            'p99_le': self.quantile(0.99),
+        }
+
+
+class _Gauge:
+    def __init__(self):
+        self.value = 0
+        self.max = 0
+
+    def set(self, value):
+        self.value = value
+        self.max = max(self.max, value)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class RunMetrics:
+    """
+    Counters, gauges and histograms for one scraper run, labelled by host,
+    endpoint, status and so on. The Fetcher, the retry policy, the pipeline
+    and the parse workers record into it; `write()` exports a Prometheus text
+    file (for node_exporter's textfile collector) and a JSON run summary.
+    """
+    def __init__(self, scraper=''):
+        self.scraper = scraper
+        self.started_at = time.time()
+        self.counters = {}    # (name, label key) -> value
+        self.gauges = {}      # (name, label key) -> _Gauge
+        self.histograms = {}  # (name, label key) -> Histogram
+        self._in_flight = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        if key not in self.gauges:
+            self.gauges[key] = _Gauge()
+        self.gauges[key].set(value)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(buckets)
+        self.histograms[key].observe(value)
+
+    @contextmanager
+    def stage(self, name):
+        """Adds the wall time of the block to `stage_seconds{stage=name}`."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            key = ('stage_seconds', _label_key({'stage': name}))
+            gauge = self.gauges.setdefault(key, _Gauge())
+            gauge.set(gauge.value + time.monotonic() - started)
+
+    @contextmanager
+    def time_parse(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('parse_duration_seconds', time.perf_counter() - started, PARSE_BUCKETS, **labels)
+
+    def request_started(self, host):
+        self._in_flight[host] = self._in_flight.get(host, 0) + 1
+        self.set_gauge('in_flight_requests', self._in_flight[host], host=host)
+
+    def request_finished(self, host, endpoint, status, seconds, size):
+        self._in_flight[host] -= 1
+        self.set_gauge('in_flight_requests', self._in_flight[host], host=host)
+        self.observe('request_duration_seconds', seconds, host=host, endpoint=endpoint)
+        self.inc('responses_total', host=host, endpoint=endpoint, status=status)
+        if size:
+            self.inc('response_bytes_total', size, host=host, endpoint=endpoint)
+
+    # --- Export ---
+
+    def to_prometheus(self):
+        scraper = (('scraper', self.scraper),) if self.scraper else ()
+        by_name = {}
+        for (name, key), counter in self.counters.items():
+            by_name.setdefault(name, []).append(f"{METRIC_PREFIX}{name}{_format_labels(key, scraper)} {counter:g}")
+        for (name, key), gauge in self.gauges.items():
+            by_name.setdefault(name, []).append(f"{METRIC_PREFIX}{name}{_format_labels(key, scraper)} {gauge.value:g}")
+        for (name, key), histogram in self.histograms.items():
+            lines = by_name.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (None,), histogram.counts):
+                cumulative += count
+                le = (('le', '+Inf' if bound is None else f'{bound:g}'),)
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(key, scraper + le)} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(key, scraper)} {histogram.sum:g}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(key, scraper)} {histogram.count}")
+
+        out = []
+        for name in sorted(by_name):
+            kind, help_text = _HELP.get(name, ('untyped', name))
+            out.append(f"# HELP {METRIC_PREFIX}{name} {help_text}")
+            out.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+            out.extend(by_name[name])
+        return '\n'.join(out) + '\n'
+
+    def summary(self):
+        """JSON-ready run summary: totals, gauge peaks and histogram quantiles."""
+        def grouped(items, render):
+            result = {}
+            for (name, key), value in sorted(items, key=lambda item: item[0]):
+                label = ','.join(f'{k}={v}' for k, v in key) or 'total'
+                result.setdefault(name, {})[label] = render(value)
+            return result
+
+        stages = {dict(key)['stage']: round(gauge.value, 3)
+                  for (name, key), gauge in sorted(self.gauges.items()) if name == 'stage_seconds'}
+        gauges = [(key, gauge) for key, gauge in self.gauges.items() if key[0] != 'stage_seconds']
+        return {
+            'scraper': self.scraper,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'wall_seconds': round(time.time() - self.started_at, 3),
+            'stages': stages,
+            'counters': grouped(self.counters.items(), lambda value: value),
+            'gauges': grouped(gauges, lambda gauge: {'last': gauge.value, 'max': gauge.max}),
+            'histograms': grouped(self.histograms.items(), Histogram.summary),
+        }
+
+    def write(self, output_base):
+        """Writes `<output_base>.metrics.prom` and `<output_base>.metrics.json`; returns both paths."""
+        prom_path = f"{output_base}.metrics.prom"
+        json_path = f"{output_base}.metrics.json"
+        with open(prom_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        return prom_path, json_path
@@ -0,0 +1,74 @@
+import json
+
+from Modules.Journal import iter_journal, latest_offsets, read_record, record_key
+from Modules.ProductIndex import with_categories
+
+# --- Configuration ---
+OUTPUT_FORMAT = 'json'  # 'json' (category-grouped, the classic layout) or 'jsonl' (one record per line)
+
+
+def write_jsonl(journal_path, output_file, categories=None):
+    """
+    Writes the latest record for every product as one JSON object per line,
+    with all its categories in 'categories'. Returns the record count.
+    """
+    offsets = latest_offsets(journal_path)
+    with open(journal_path, 'rb') as journal, open(output_file, 'w', encoding='utf-8') as out:
+        for offset in offsets.values():
+            record = with_categories(read_record(journal, offset), categories)
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return len(offsets)
+
+
+def write_grouped_json(journal_path, output_file, categories=None):
+    """
+    Builds the classic `{category: [product, ...]}` JSON file (same layout as
+    `json.dump(final_data, indent=2)`) from the journal in two cheap passes:
+    the first only collects byte offsets per category, the second streams
+    the records out one at a time, so memory stays flat however big the
+    catalogue is. A product listed in several categories is fetched once but
+    appears under each of them, with 'category' set to that one.
+    Returns the record count.
+    """
+    latest = {}
+    for offset, record in iter_journal(journal_path):
+        latest[record_key(record)] = (offset, with_categories(record, categories)['categories'])
+    by_category = {}
+    for offset, names in latest.values():
+        for category in names:
+            by_category.setdefault(category or 'Uncategorized', []).append((offset, category))
+
+    with open(journal_path, 'rb') as journal, open(output_file, 'w', encoding='utf-8') as out:
+        if not by_category:
+            out.write('{}')
+            return 0
+        out.write('{')
+        for cat_index, (group, entries) in enumerate(by_category.items()):
+            out.write(',\n' if cat_index else '\n')
+            out.write(f'  {json.dumps(group, ensure_ascii=False)}: [')
+            for rec_index, (offset, category) in enumerate(entries):
+                out.write(',\n' if rec_index else '\n')
+                record = dict(with_categories(read_record(journal, offset), categories), category=category)
+                record_json = json.dumps(record, indent=2, ensure_ascii=False)
+                out.write('    ' + record_json.replace('\n', '\n    '))
+            out.write('\n  ]')
+        out.write('\n}')
+    return len(latest)
+
+
+def write_output(journal_path, output_base, output_format=OUTPUT_FORMAT, categories=None):
+    """
+    Writes the final output file from the journal and returns its path.
+    `categories` ({canonical URL: [names]}, from ProductIndex.categories())
+    lists every category a product was found in during this run; without it
+    each record keeps the categories it was journaled with.
+    """
+    if output_format == 'jsonl':
+        output_file = output_base + '.jsonl'
+        write_jsonl(journal_path, output_file, categories)
+    elif output_format == 'json':
+        output_file = output_base + '.json'
+        write_grouped_json(journal_path, output_file, categories)
+    else:
+        raise ValueError(f"Unknown output format '{output_format}' (expected 'json' or 'jsonl')")
+    return output_file
@@ -0,0 +1,35 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+# --- Configuration ---
+PARSE_EXECUTOR = 'inline'  # 'inline' parses on the event loop, 'process' in a process pool
+PARSE_BACKEND = 'bs4'      # 'bs4' (BeautifulSoup) or 'lxml' (precompiled XPath, same output)
+
+
+@contextmanager
+def parse_executor(kind=PARSE_EXECUTOR, workers=None):
+    """
+    Yields the executor product pages are parsed on: None for 'inline', or a
+    ProcessPoolExecutor sized to the core count for 'process'.
+    """
+    if kind == 'inline':
+        yield None
+    elif kind == 'process':
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            yield executor
+    else:
+        raise ValueError(f"Unknown parse executor '{kind}' (expected 'inline' or 'process')")
+
+
+async def parse_page(executor, parse_func, html):
+    """
+    Runs `parse_func(html)` and returns its result. With a process pool the raw
+    HTML bytes are handed to a worker and a plain dict comes back, so the event
+    loop keeps servicing sockets while the page is parsed.
+    `parse_func` must be a module-level function so it can be pickled.
+    """
+    if executor is None:
+        return parse_func(html)
+    return await asyncio.get_running_loop().run_in_executor(executor, parse_func, html)
@@ -0,0 +1,83 @@
+import asyncio
+
+from Modules.Control import RunCancelled
+
+# --- Configuration ---
+QUEUE_SIZE = 200      # Max product URLs waiting for a detail worker
+DETAIL_WORKERS = 20   # Fixed number of concurrent detail workers
+
+_DONE = object()
+
+
+async def run_pipeline(produce, consume, on_result, workers=DETAIL_WORKERS, queue_size=QUEUE_SIZE, metrics=None):
+    """
+    Streams items from a producer into a fixed pool of consumer workers over
+    a bounded asyncio.Queue, so consumers start as soon as the first item is
+    discovered and memory stays bounded however many items are produced.
+
+    Args:
+        produce: Coroutine function called as `produce(emit)`; it awaits
+            `emit(item)` for every item it finds (blocks while the queue is full).
+        consume: Coroutine function called once per item.
+        on_result: Plain function called with each value returned by `consume`.
+        workers: Number of concurrent consumers.
+        queue_size: Maximum number of items waiting in the queue.
+        metrics: Optional Modules.Metrics.RunMetrics that tracks the queue depth.
+
+    If the run is cancelled (RunCancelled from `produce` or `consume`), no
+    further items are produced, items whose `consume` was cancelled are
+    dropped and the results of items already in progress are still delivered.
+    Any other exception from `produce`, `consume` or `on_result` ends the
+    run: the remaining workers are cancelled and the exception is raised.
+
+    Returns:
+        The number of items consumed.
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+    consumed = 0
+
+    async def worker():
+        nonlocal consumed
+        while True:
+            item = await queue.get()
+            if metrics:
+                metrics.set_gauge('queue_depth', queue.qsize())
+            try:
+                if item is _DONE:
+                    return
+                try:
+                    result = await consume(item)
+                except RunCancelled:
+                    continue
+                on_result(result)
+                consumed += 1
+            finally:
+                queue.task_done()
+
+    async def emit(item):
+        await queue.put(item)
+        if metrics:
+            metrics.set_gauge('queue_depth', queue.qsize())
+
+    worker_tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+
+    async def feed():
+        try:
+            await produce(emit)
+        except RunCancelled:
+            pass
+        for _ in worker_tasks:
+            await queue.put(_DONE)
+
+    tasks = [asyncio.create_task(feed()), *worker_tasks]
+    try:
+        # Stop at the first failure: with its workers gone the producer would block on a full queue forever
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception():
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return consumed
@@ -1,70 +1,156 @@
 import asyncio
 import aiohttp
 from bs4 import BeautifulSoup
-import json
 import time
 import re
+from functools import partial
+from lxml import etree
+
+from Modules.Assets import AssetStore, download_product_assets, ASSET_CONCURRENCY
+from Modules.Http import Fetcher, shared_session, POLITENESS_DELAY
+from Modules.Concurrency import AdaptiveLimiter, MAX_CONCURRENCY
+from Modules.Control import RunControl, RunCancelled, gather_or_cancel
+from Modules.HttpCache import ResponseCache, CACHE_DIR
+from Modules.Journal import RunJournal
+from Modules.Locales import merge_locales, tag_locale, MERGED_SUFFIX
+from Modules.Metrics import RunMetrics
+from Modules.Delta import write_delta
+from Modules.Output import write_output, OUTPUT_FORMAT
+from Modules.Pipeline import run_pipeline
+from Modules.ProductIndex import ProductIndex
+from Modules.Progress import Progress
+from Modules.Sitemap import LastmodFilter, discover_from_sitemap, DISCOVERY_MODES
+from Modules.SqliteStore import write_sqlite, DB_SUFFIX
+from Modules.Registry import Scraper, register
+from Modules.Parsing import parse_executor, parse_page, PARSE_EXECUTOR, PARSE_BACKEND
+from Modules.LxmlHelpers import has_class, html_tree, get_text, bs4_string, first
 
 # --- Configuration ---
 BASE_URL = "https://www.petzl.com"
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
+JOURNAL_FILE = 'petzl_run.journal.jsonl'
+OUTPUT_BASE = 'petzl_full_product_data'
+ASSET_DIR = 'petzl_assets'
+# Locale -> URL prefix; the first locale of a run is the primary one (see Modules/Locales.py)
+LOCALES = {'de': 'DE/de', 'en': 'INT/en', 'fr': 'FR/fr', 'it': 'IT/it'}
+DEFAULT_LOCALE = 'de'
+SECTION = 'Professional'  # Site section crawled below every locale prefix
+# Product page labels in every supported locale
+SPEC_HEADING = re.compile(r'Specifications|Spezifikationen|Spécifications|Caractéristiques|Specifiche|Caratteristiche')
+REFERENCES_HEADING = re.compile(r'References|Referenzen|Références|Riferimenti')
+COLOR_LABELS = ('Farbe', 'Color', 'Couleur', 'Colore')
+REFERENCE_LABELS = ('Reference', 'Referenz', 'Référence', 'Riferimento')
+# Sitemap discovery (discovery='sitemap'): product pages are <prefix>/<SECTION>/<category>/<product>
+SITEMAP_URL = f"{BASE_URL}/sitemap.xml"
+PRODUCT_PATH = rf'/{SECTION}/[^/?#]+/[^/?#]+/?$'
+
+# === STAGE 1 & 2: Discover Product URLs (Asynchronous producer) ===
+
+def section_url(locale=DEFAULT_LOCALE):
+    """The landing page of the crawled section in `locale`."""
+    return f"{BASE_URL}/{LOCALES[locale]}/{SECTION}"
+
+async def fetch_categories(fetcher, locale=DEFAULT_LOCALE):
+    """Fetches the category links from the Petzl professional landing page of `locale`."""
+    print(f"--- STAGE 1: Fetching Categories ({locale}) ---")
+    start_url = section_url(locale)
+    try:
+        content = await fetcher.get(start_url, headers=HEADERS, polite=True, endpoint='categories')
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"Failed to fetch the main page: {e}")
+        return []
 
-# === STAGE 1 & 2: Get all Product URLs (Synchronous part) ===
-def get_all_product_urls():
+    soup = BeautifulSoup(content, 'lxml')
+    category_section = soup.find('div', id='submenu_a2w200000011y8DAAQ')
+    if not category_section:
+        print("Error: Could not find the main category navigation section.")
+        return []
+
+    categories = [{'name': a_tag.get_text(strip=True), 'url': a_tag['href']}
+                  for item in category_section.find_all('li', class_='ib')
+                  if (a_tag := item.find('a', href=True))]
+
+    print(f"Found {len(categories)} categories. Now fetching products from each.")
+    return categories
+
+def extract_category_products(content, category_name):
+    """Returns the products listed on a category page's 'productContainer all' grid."""
+    products = []
+    cat_soup = BeautifulSoup(content, 'lxml')
+    if container := cat_soup.find('div', class_='productContainer all'):
+        for block in container.find_all('div', class_='product'):
+            if prod_link := block.find('a', href=True):
+                products.append({
+                    'category': category_name,
+                    'product_url': prod_link['href']
+                })
+    return products
+
+async def fetch_category_products(fetcher, category, emit):
+    """Fetches one category page and emits every product listed on it."""
+    print(f"Fetching products for: {category['name']}")
+    try:
+        content = await fetcher.get(category['url'], headers=HEADERS, polite=True, endpoint='category')
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"  - Could not fetch category {category['name']}: {e}")
+        return
+
+    for product in extract_category_products(content, category['name']):
+        await emit(product)
+
+async def discover_products(fetcher, emit, locale=DEFAULT_LOCALE):
     """
-    Sequentially scrapes all categories and the products within them
-    to create a list of all product URLs to be scraped asynchronously.
+    Producer for the detail pipeline: crawls every category of `locale`
+    concurrently and awaits `emit(product)` for each product as soon as its
+    category page is parsed. A product listed in several categories is
+    emitted once per category; callers dedupe with a Modules.ProductIndex.
     """
-    print("--- STAGE 1: Fetching Categories ---")
-    start_url = f"{BASE_URL}/DE/de/Professional"
-    all_products = []
+    with fetcher.metrics.stage('1_categories'):
+        categories = await fetch_categories(fetcher, locale)
 
-    import requests # Use synchronous requests for this initial part
+    print("\n--- STAGE 2: Fetching Product Listings from each Category ---")
+    with fetcher.metrics.stage('2_listings'):
+        await gather_or_cancel(*(fetch_category_products(fetcher, category, emit) for category in categories))
 
-    try:
-        response = requests.get(start_url, headers=HEADERS)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'lxml')
-
-        category_section = soup.find('div', id='submenu_a2w200000011y8DAAQ')
-        if not category_section:
-            print("Error: Could not find the main category navigation section.")
-            return []
-
-        categories = [{'name': a_tag.get_text(strip=True), 'url': a_tag['href']}
-                      for item in category_section.find_all('li', class_='ib')
-                      if (a_tag := item.find('a', href=True))]
-
-        print(f"Found {len(categories)} categories. Now fetching products from each.")
-
-        print("\n--- STAGE 2: Fetching Product Listings from each Category ---")
-        for category in categories:
-            print(f"Fetching products for: {category['name']}")
-            try:
-                cat_response = requests.get(category['url'], headers=HEADERS)
-                cat_response.raise_for_status()
-                cat_soup = BeautifulSoup(cat_response.content, 'lxml')
-
-                if container := cat_soup.find('div', class_='productContainer all'):
-                    for block in container.find_all('div', class_='product'):
-                        if prod_link := block.find('a', href=True):
-                            all_products.append({
-                                'category': category['name'],
-                                'product_url': prod_link['href']
-                            })
-                time.sleep(0.5)
-            except requests.RequestException as e:
-                print(f"  - Could not fetch category {category['name']}: {e}")
-                continue
-
-    except requests.RequestException as e:
-        print(f"Failed to fetch the main page: {e}")
-        return []
+async def discover_products_sitemap(fetcher, emit, locales=(DEFAULT_LOCALE,)):
+    """
+    Sitemap-driven producer (Modules/Sitemap.py): emits the product pages of
+    every locale from SITEMAP_URL with their 'lastmod' as the sitemaps
+    stream in, while the category pages are crawled alongside only for
+    category membership (and for products the sitemap is missing).
+    """
+    routes = [(re.compile(re.escape('/' + LOCALES[locale]) + PRODUCT_PATH), tag_locale(emit, locale, locales))
+              for locale in locales]
+
+    async def listing(collect):
+        await gather_or_cancel(*(discover_products(fetcher, tag_locale(collect, locale, locales), locale)
+                                 for locale in locales))
+
+    await discover_from_sitemap(fetcher, SITEMAP_URL, routes, listing, emit, headers=HEADERS)
 
-    print(f"\nTotal products to scrape: {len(all_products)}")
-    return all_products
+async def get_all_product_urls(fetcher, index=None, locales=(DEFAULT_LOCALE,), discovery='categories'):
+    """
+    Crawls all categories of every locale and the products within them and
+    returns the complete list of product URLs to be scraped, each page once.
+    Pass a ProductIndex as `index` to keep every product's categories.
+    With several locales each product is tagged with its 'locale'.
+    `discovery='sitemap'` takes the URLs from the sitemap instead.
+    """
+    if index is None:
+        index = ProductIndex()
+
+    async def collect(product):
+        index.add(product)
+
+    if discovery == 'sitemap':
+        await discover_products_sitemap(fetcher, collect, locales)
+    else:
+        await gather_or_cancel(*(discover_products(fetcher, tag_locale(collect, locale, locales), locale)
+                                 for locale in locales))
+    print(f"\nTotal products to scrape: {index.summary()}")
+    return index.products()
 
 
 # === STAGE 3: Fetch and Parse a Single Product Page (Asynchronous Worker) ===
@@ -97,7 +183,7 @@ def parse_product_details(soup):
 
     # Specifications
     # MODIFIED: Use re.compile to find the header reliably
-    spec_section = soup.find('h3', string=re.compile(r'Specifications|Spezifikationen'))
+    spec_section = soup.find('h3', string=SPEC_HEADING)
     if spec_section and (spec_list := spec_section.find_next('div', class_='list')):
         specs = {}
         for item in spec_list.find_all('li'):
@@ -111,7 +197,7 @@ def parse_product_details(soup):
 
     # References Table
     # MODIFIED: Use re.compile to find the header reliably
-    references_section = soup.find('h3', string=re.compile(r'References|Referenzen'))
+    references_section = soup.find('h3', string=REFERENCES_HEADING)
     if references_section:
         references = []
         for table in references_section.find_next_siblings('table'):
@@ -140,9 +226,9 @@ def parse_product_details(soup):
                 row_title = row_title_cell.get_text(strip=True).replace(')', '').strip()
                 values = [td.get_text(strip=True) for td in row.find_all('td')[1:]]
 
-                if "Farbe" in row_title:
+                if any(label in row_title for label in COLOR_LABELS):
                   row_title = "color"
-                if "Reference" in row_title:
+                if any(label in row_title for label in REFERENCE_LABELS):
                   row_title = "article_number"
                 for i, value in enumerate(values):
                     if i < len(temp_refs):
@@ -172,48 +258,317 @@ def parse_product_details(soup):
 
     return details
 
-async def fetch_and_parse(session, product):
+# --- lxml backend: the same extraction as parse_product_details, with XPath compiled once at import ---
+
+_X_TITLE = etree.XPath(f"//h1[{has_class('productTitle')}]")
+_X_SUBTITLE = etree.XPath(f"//p[{has_class('productSubtitle')}]")
+_X_DESCRIPTION = etree.XPath(f"//div[{has_class('productCaracteristiques')}]")
+_X_SLIDESHOW = etree.XPath("//div[@id='slideshow']")
+_X_THUMBNAILS = etree.XPath(f".//li[{has_class('thumb')}][@style]")
+_X_ZOOM_IMAGES = etree.XPath(f".//img[{has_class('zoomOnClick')}][@data-zoom]")
+_X_DESCRIPTIF = etree.XPath("//div[@id='descriptif']")
+_X_FEATURE_POINTS = etree.XPath(f".//div[{has_class('list')}]//ul//li")
+_X_H3 = etree.XPath("//h3")
+_X_NEXT_LIST = etree.XPath(f"(descendant::div[{has_class('list')}] | following::div[{has_class('list')}])[1]")
+_X_LI = etree.XPath(".//li")
+_X_SIBLING_TABLES = etree.XPath("following-sibling::table")
+_X_HEADER_ROW = etree.XPath("(.//tr[ancestor::thead] | .//tr[not(preceding-sibling::*)])[1]")
+_X_TH = etree.XPath(".//th")
+_X_DATA_ROWS = etree.XPath(".//tr[ancestor::tbody] | .//tr[preceding-sibling::*]")
+_X_ROW_TITLE = etree.XPath(f"(.//td[{has_class('rowTitle')}])[1]")
+_X_TD = etree.XPath(".//td")
+_X_SOLUTIONS = etree.XPath("//div[@id='solutions']")
+_X_TITLE_LINKS = etree.XPath(f".//div[{has_class('titleLink')}]")
+_X_FIRST_H3 = etree.XPath("(.//h3)[1]")
+_X_LINKS = etree.XPath(".//a[@href]")
+
+def _find_heading(tree, pattern):
+    """Equivalent of soup.find('h3', string=pattern)."""
+    for h3 in _X_H3(tree):
+        text = bs4_string(h3)
+        if text is not None and pattern.search(text):
+            return h3
+    return None
+
+def parse_product_details_lxml(tree):
+    """lxml-native twin of parse_product_details; must return exactly the same dict."""
+    details = {}
+
+    # Product Title, Subtitle, and Main Description
+    if (title_tag := first(_X_TITLE(tree))) is not None:
+        details['title'] = get_text(title_tag, separator=' ').replace(' ®', '®')
+    if (subtitle_tag := first(_X_SUBTITLE(tree))) is not None:
+        details['subtitle'] = get_text(subtitle_tag)
+    if (desc_container := first(_X_DESCRIPTION(tree))) is not None:
+        details['main_description'] = get_text(desc_container)
+
+    # Image Gallery
+    if (slideshow := first(_X_SLIDESHOW(tree))) is not None:
+        details['gallery'] = {
+            'thumbnails': [img.get('style').split("url('")[1].split("')")[0]
+                           for img in _X_THUMBNAILS(slideshow)],
+            'full_images': [img.get('data-zoom') for img in _X_ZOOM_IMAGES(slideshow)]
+        }
+
+    # Features from "Detailed description"
+    if (detailed_desc_section := first(_X_DESCRIPTIF(tree))) is not None:
+        details['features'] = [get_text(point, separator=' ') for point in _X_FEATURE_POINTS(detailed_desc_section)]
+
+    # Specifications
+    spec_section = _find_heading(tree, SPEC_HEADING)
+    if spec_section is not None and (spec_list := first(_X_NEXT_LIST(spec_section))) is not None:
+        specs = {}
+        for item in _X_LI(spec_list):
+            text = get_text(item)
+            if ':' in text:
+                key, value = text.split(':', 1)
+                specs[key.strip()] = value.strip()
+            else:
+                specs.setdefault('notes', []).append(text)
+        details['specifications'] = specs
+
+    # References Table
+    references_section = _find_heading(tree, REFERENCES_HEADING)
+    if references_section is not None:
+        references = []
+        for table in _X_SIBLING_TABLES(references_section):
+            header_row = first(_X_HEADER_ROW(table))
+            if header_row is None: continue
+
+            headers = [get_text(th) for th in _X_TH(header_row)][1:]
+            if not headers: continue
+
+            temp_refs = [{'Reference': ref_code} for ref_code in headers]
+
+            for row in _X_DATA_ROWS(table):
+                row_title_cell = first(_X_ROW_TITLE(row))
+                if row_title_cell is None: continue
+
+                row_title = get_text(row_title_cell).replace(')', '').strip()
+                values = [get_text(td) for td in _X_TD(row)[1:]]
+
+                if any(label in row_title for label in COLOR_LABELS):
+                  row_title = "color"
+                if any(label in row_title for label in REFERENCE_LABELS):
+                  row_title = "article_number"
+                for i, value in enumerate(values):
+                    if i < len(temp_refs):
+                        temp_refs[i][row_title] = value
+
+            references.extend(temp_refs)
+        details['references'] = references
+
+    # Technical Documents
+    tech_docs = {}
+    if (tech_info_section := first(_X_SOLUTIONS(tree))) is not None:
+        for link_block in _X_TITLE_LINKS(tech_info_section):
+            if (heading_tag := first(_X_FIRST_H3(link_block))) is not None:
+                heading = get_text(heading_tag)
+                doc_links = []
+                for a_tag in _X_LINKS(link_block):
+                    url = a_tag.get('href')
+                    if not url.startswith('http'):
+                        url = BASE_URL + url
+                    doc_links.append({
+                        'text': get_text(a_tag, separator=' '),
+                        'url': url
+                    })
+                if doc_links:
+                    tech_docs[heading] = doc_links
+    details['technical_documents'] = tech_docs
+
+    return details
+
+def parse_product_page(html, backend=PARSE_BACKEND, encoding=None):
+    """
+    Parses raw product page HTML into a plain dict (runs inline or in a parse
+    worker process). `backend` is 'bs4' or 'lxml'; both give the same result.
+    `encoding` is the charset from the response's Content-Type, if any.
+    """
+    if backend == 'lxml':
+        return parse_product_details_lxml(html_tree(html, encoding))
+    return parse_product_details(BeautifulSoup(html, 'lxml', from_encoding=encoding))
+
+async def fetch_and_parse(fetcher, product, executor=None, backend=PARSE_BACKEND):
     """Async worker: fetches a URL, parses it, and returns the merged data."""
     url = product['product_url']
     try:
-        async with session.get(url, headers=HEADERS, timeout=30) as response:
-            if response.status != 200:
-                print(f"  - Failed {url} with status {response.status}")
-                return product # Return original info on failure
-            html = await response.text()
-            soup = BeautifulSoup(html, 'lxml')
-            detailed_data = parse_product_details(soup)
-            product.update(detailed_data)
-            return product
+        try:
+            html, charset = await fetcher.get_page(url, headers=HEADERS, timeout=30, endpoint='product')
+        except aiohttp.ClientResponseError as e:
+            print(f"  - Failed {url} with status {e.status}")
+            return {**product, 'error': f'HTTP Status {e.status}'}
+        with fetcher.metrics.time_parse(backend=backend):
+            parse = partial(parse_product_page, backend=backend, encoding=charset)
+            detailed_data = await parse_page(executor, parse, html)
+        return {**product, **detailed_data}
+    except RunCancelled:
+        raise
+    except asyncio.TimeoutError:
+        print(f"  - Timeout error processing {url}")
+        return {**product, 'error': 'Timeout'}
     except Exception as e:
         print(f"  - Error processing {url}: {e}")
-        return product
+        return {**product, 'error': str(e)}
 
 
 # === STAGE 4: Main Orchestration ===
 
-async def main_pitzl():
-    """Main function to run the entire scraping process."""
-
-    products_to_scrape = get_all_product_urls()
-    if not products_to_scrape:
+async def main_pitzl(pipelined=True, max_concurrency=MAX_CONCURRENCY, politeness_delay=POLITENESS_DELAY,
+                     parse_executor_kind=PARSE_EXECUTOR, cache_dir=CACHE_DIR, resume=False,
+                     output_format=OUTPUT_FORMAT, session=None, parse_backend=PARSE_BACKEND,
+                     record_dir=None, replay_url=None, progress=None, control=None, download_assets=False,
+                     sqlite=False, locales=(DEFAULT_LOCALE,), discovery='categories'):
+    """
+    Main function to run the entire scraping process.
+
+    With `pipelined=True` (default) category crawling feeds product URLs into a
+    bounded queue that a fixed pool of `max_concurrency` detail workers drains
+    straight away; in-flight requests adapt between 1 and `max_concurrency` (AIMD).
+    With `pipelined=False` discovery finishes before the first detail fetch.
+    `parse_executor_kind='process'` parses product pages in a process pool and
+    `parse_backend` picks the 'bs4' or the faster 'lxml' extraction.
+    `cache_dir` holds the shared on-disk HTTP cache; pass None to disable it.
+    Every product page is fetched once, however many categories list it.
+    Every finished product is streamed to JOURNAL_FILE; `resume=True` reloads
+    it and only fetches the products that are not done yet. The output file
+    ('json' or 'jsonl') is built from the journal at the end, next to a
+    Prometheus text file and a JSON summary of the run's metrics.
+    `download_assets=True` also downloads every product's full-size images
+    and technical documents into ASSET_DIR and lists their local paths in
+    the record's 'assets'.
+    `sqlite=True` also upserts the products into OUTPUT_BASE + '.sqlite'
+    (Modules/SqliteStore.py), indexed for article number and GTIN lookups.
+    `locales` (keys of LOCALES) crawls several languages in one run over the
+    same session, cache and per-host limits; the output then has one record
+    per product with every locale's text under 'locales' (Modules/Locales.py).
+    `discovery='sitemap'` streams the product URLs from the site's XML
+    sitemaps instead of waiting for the category pages, which are then only
+    crawled for category membership; a single-locale run also reuses the
+    last run's version of every product whose sitemap `lastmod` hasn't moved
+    (Modules/Sitemap.py).
+    Pass `session` to share an existing session; otherwise one is created
+    with Modules.Http.create_session.
+    `record_dir` archives every response for the replay server (Modules/Replay.py);
+    `replay_url` sends all requests to such a server instead of the real site.
+    `progress` is called with a Modules.Progress.ProgressEvent as products finish.
+    `control` (a Modules.Control.RunControl) pauses or cancels the run from another
+    thread; a cancelled run still saves every product parsed so far.
+    """
+    unknown = [locale for locale in locales if locale not in LOCALES]
+    if unknown:
+        raise ValueError(f"Unknown locale(s) {', '.join(unknown)} (expected some of: {', '.join(LOCALES)})")
+    if discovery not in DISCOVERY_MODES:
+        raise ValueError(f"Unknown discovery {discovery!r} (expected one of: {', '.join(DISCOVERY_MODES)})")
+    started = time.monotonic()
+    first_result = True
+    metrics = RunMetrics('petzl')
+    tracker = Progress(progress)
+    index = ProductIndex()
+    # Merged multi-locale snapshots can't stand in for one locale's page, so only single-locale runs skip
+    lastmods = LastmodFilter(OUTPUT_BASE if discovery == 'sitemap' and len(locales) == 1 else None)
+    control = control or RunControl()
+    control.bind()
+    if record_dir:
+        from Modules.Replay import ArchiveRecorder  # Only recording runs need the aiohttp server code
+
+    with RunJournal(JOURNAL_FILE, resume=resume) as journal, parse_executor(parse_executor_kind) as executor:
+        if resume:
+            print(f"Resuming: {len(journal.done)} products already done in '{JOURNAL_FILE}'")
+
+        def collect(product):
+            nonlocal first_result
+            if first_result:
+                print(f"  - First product parsed after {time.monotonic() - started:.1f}s")
+                first_result = False
+            metrics.inc('products_total', result='error' if product.get('error') else 'ok')
+            tracker.advance(error=bool(product.get('error')))
+            journal.append(product)
+
+        async with shared_session(session, limit_per_host=max_concurrency) as session:
+            cache = ResponseCache(cache_dir) if cache_dir else None
+            fetcher = Fetcher(session, delay=politeness_delay, cache=cache,
+                              limiter=AdaptiveLimiter(maximum=max_concurrency),
+                              recorder=ArchiveRecorder(record_dir) if record_dir else None, origin=replay_url,
+                              metrics=metrics, control=control)
+
+            if pipelined:
+                print(f"--- Streaming discovery into {max_concurrency} detail workers (STAGES 1-3) ---")
+                async def produce(emit):
+                    async def emit_pending(product):
+                        if control.cancelled:
+                            raise RunCancelled()
+                        if index.add(lastmods.take(product)) and not journal.is_done(product) \
+                                and not lastmods.carry_over(product, journal):
+                            tracker.add_total()
+                            await emit(product)
+                    if discovery == 'sitemap':
+                        await discover_products_sitemap(fetcher, emit_pending, locales)
+                    else:
+                        await gather_or_cancel(*(discover_products(fetcher, tag_locale(emit_pending, locale, locales), locale)
+                                                 for locale in locales))
+            else:
+                try:
+                    products_to_scrape = [p for p in await get_all_product_urls(fetcher, index, locales, discovery)
+                                          if not journal.is_done(lastmods.take(p))
+                                          and not lastmods.carry_over(p, journal)]
+                except RunCancelled:
+                    products_to_scrape = []
+                print(f"\n--- STAGE 3: Asynchronously Fetching Details for {len(products_to_scrape)} Products ---")
+                tracker.add_total(len(products_to_scrape))
+                async def produce(emit):
+                    for product in products_to_scrape:
+                        await emit(product)
+
+            with metrics.stage('3_details'):
+                scraped = await run_pipeline(produce, lambda product: fetch_and_parse(fetcher, product, executor, parse_backend),
+                                             collect, workers=max_concurrency, metrics=metrics)
+            tracker.finish()
+            print(f"  - Discovered {index.summary()}")
+
+            if download_assets and not control.cancelled:
+                print(f"\n--- Downloading product images and documents to '{ASSET_DIR}' ---")
+                store = AssetStore(ASSET_DIR)
+                asset_fetcher = Fetcher(session, delay=0, limiter=AdaptiveLimiter(maximum=ASSET_CONCURRENCY),
+                                        origin=replay_url, metrics=metrics, control=control)
+                with metrics.stage('3_assets'):
+                    await download_product_assets(asset_fetcher, store, journal)
+                store.close()
+                print(store.summary())
+
+    if not scraped and not journal.done and not lastmods.skipped:
+        print("No products found to scrape. Exiting.")
         return
 
-    print(f"\n--- STAGE 3: Asynchronously Fetching Details for {len(products_to_scrape)} Products ---")
-
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_and_parse(session, product) for product in products_to_scrape]
-        results = await asyncio.gather(*tasks)
-
-    print("\n--- STAGE 4: Data Processing Complete ---")
-
-    final_data = {}
-    for product in results:
-        category = product.get('category', 'Uncategorized')
-        final_data.setdefault(category, []).append(product)
-
-    output_file = 'petzl_full_product_data.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(final_data, f, indent=2, ensure_ascii=False)
-
-    print(f"\nSuccessfully scraped all data. Results saved to '{output_file}'")
\ No newline at end of file
+    if control.cancelled:
+        print(f"\n--- Run cancelled: saving the {scraped} products finished so far (resume to continue) ---")
+    print(f"\n--- STAGE 4: Data Processing Complete ({scraped} products in {time.monotonic() - started:.1f}s) ---")
+    print(fetcher.summary())
+    if lastmods.output_base:
+        print(lastmods.summary())
+
+    with metrics.stage('4_output'):
+        source = JOURNAL_FILE
+        if len(locales) > 1:
+            source = merge_locales(JOURNAL_FILE, OUTPUT_BASE + MERGED_SUFFIX, {locale: LOCALES[locale] for locale in locales})
+        output_file = write_output(source, OUTPUT_BASE, output_format, categories=index.categories())
+        delta_file, changes = write_delta(source, OUTPUT_BASE, complete=not control.cancelled,
+                                          categories=index.categories())
+        lastmods.save(source)
+        if sqlite:
+            written, seen = write_sqlite(source, OUTPUT_BASE + DB_SUFFIX, categories=index.categories())
+    print(f"\nSuccessfully scraped all data. Results saved to '{output_file}'")
+    print("Changes since the last run saved to '{}' ({added} added, {removed} removed, "
+          "{changed} changed, {unchanged} unchanged)".format(delta_file, **changes))
+    if sqlite:
+        print(f"SQLite store '{OUTPUT_BASE + DB_SUFFIX}' updated: {written} of {seen} products written")
+    print("Run metrics saved to '{}' and '{}'".format(*metrics.write(OUTPUT_BASE)))
+
+
+# === Registry ===
+
+SCRAPER = register(Scraper(
+    name='petzl', label='Pitzl',
+    discover=discover_products, fetch=fetch_and_parse, parse=parse_product_page, run=main_pitzl,
+    journal_file=JOURNAL_FILE, output_base=OUTPUT_BASE,
+))
@@ -0,0 +1,73 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# --- Configuration ---
+TRACKING_PARAMS = ('utm_', 'gclid', 'fbclid')  # Query parameters (or prefixes) that never change the page
+
+
+def canonical_url(url):
+    """
+    One spelling for every way a page gets linked: lower-case https scheme and
+    host without the default port, no duplicate or trailing slashes, query
+    parameters sorted with tracking parameters dropped, and no fragment.
+    Only used as a key; requests still go to the URL as discovered.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme in ('', 'http'):
+        scheme = 'https'
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port not in (80, 443):
+        host += f':{parts.port}'
+    path = '/'.join(segment for segment in parts.path.split('/') if segment)
+    query = urlencode(sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not name.lower().startswith(TRACKING_PARAMS)))
+    return urlunsplit((scheme, host, '/' + path, query, ''))
+
+
+def with_categories(record, categories=None):
+    """
+    Returns the record with 'categories' (every category it is listed in,
+    taken from `categories` = {canonical URL: [names]} when the product is in
+    it) and 'category' (the first of them).
+    """
+    key = canonical_url(record['product_url'])
+    names = (categories or {}).get(key) or record.get('categories') or [record.get('category')]
+    rest = {name: value for name, value in record.items() if name not in ('category', 'categories')}
+    return {'category': names[0], 'categories': list(names), **rest}
+
+
+class ProductIndex:
+    """
+    Every product found during discovery, once per canonical URL, with all
+    the categories it is listed in. A product shown in three categories (or
+    in both a category grid and its 'load all' listing) is fetched once; the
+    category grouping is rebuilt from `categories()` when the output is written.
+    """
+    def __init__(self):
+        self._products = {}    # canonical URL -> first product dict seen
+        self._categories = {}  # canonical URL -> category names, in discovery order
+        self.listings = 0      # Products added, duplicates included
+
+    def add(self, product):
+        """Records one listing of a product; returns True the first time its page is seen."""
+        self.listings += 1
+        key = canonical_url(product['product_url'])
+        names = self._categories.setdefault(key, [])
+        if product.get('category') is not None and product['category'] not in names:
+            names.append(product['category'])
+        if key in self._products:
+            return False
+        self._products[key] = product
+        return True
+
+    def products(self):
+        return list(self._products.values())
+
+    def categories(self):
+        return {key: list(names) for key, names in self._categories.items()}
+
+    def __len__(self):
+        return len(self._products)
+
+    def summary(self):
+        return f"{len(self)} unique products from {self.listings} category listings"
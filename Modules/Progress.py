@@ -0,0 +1,90 @@
+import time
+from typing import NamedTuple, Optional
+
+# --- Configuration ---
+PROGRESS_INTERVAL = 0.25  # Minimum seconds between two progress events
+
+
+class ProgressEvent(NamedTuple):
+    done: int
+    total: int
+    errors: int
+    rate: float            # Products per second since the run started
+    eta: Optional[float]   # Seconds left at the current rate, None while unknown
+    finished: bool = False
+
+
+class Progress:
+    """
+    Counts finished products against the number discovered so far and passes
+    a ProgressEvent to `callback` at most every `interval` seconds (plus one
+    final event from `finish()`). Without a callback it only counts.
+    The callback runs on the scraper's thread; the GUI hands it to its own
+    event queue.
+    """
+    def __init__(self, callback=None, interval=PROGRESS_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self.done = self.total = self.errors = 0
+        self._started = time.monotonic()
+        self._last_emit = 0.0
+
+    def add_total(self, count=1):
+        self.total += count
+        self._emit()
+
+    def advance(self, error=False):
+        self.done += 1
+        if error:
+            self.errors += 1
+        self._emit()
+
+    def finish(self):
+        self._emit(final=True)
+
+    def event(self, final=False):
+        elapsed = time.monotonic() - self._started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 and self.total >= self.done else None
+        return ProgressEvent(self.done, self.total, self.errors, rate, eta, final)
+
+    def _emit(self, final=False):
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if not final and now - self._last_emit < self.interval:
+            return
+        self._last_emit = now
+        self.callback(self.event(final))
+
+
+class CombinedProgress:
+    """
+    Merges the progress of several scrapers running side by side into one
+    stream of ProgressEvents: counts and rates are summed, the ETA is the
+    slowest part's, and the run is finished once every part is.
+    """
+    def __init__(self, callback):
+        self.callback = callback
+        self._latest = {}
+
+    def part(self, name):
+        """Returns the progress callback for one scraper."""
+        self._latest[name] = None
+
+        def update(event):
+            self._latest[name] = event
+            self._emit()
+        return update
+
+    def _emit(self):
+        events = [event for event in self._latest.values() if event is not None]
+        etas = [event.eta for event in events if not event.finished]
+        self.callback(ProgressEvent(
+            done=sum(event.done for event in events),
+            total=sum(event.total for event in events),
+            errors=sum(event.errors for event in events),
+            rate=sum(event.rate for event in events),
+            eta=None if None in etas else max(etas, default=0.0),
+            finished=len(events) == len(self._latest) and all(event.finished for event in events),
+        ))
@@ -0,0 +1,101 @@
+import asyncio
+import importlib
+
+from Modules.Concurrency import MAX_CONCURRENCY
+from Modules.Output import write_output, OUTPUT_FORMAT
+from Modules.Progress import CombinedProgress
+
+# --- Configuration ---
+# Scraper name -> module that registers it. Modules are only imported when
+# their scraper is asked for, so running one brand never loads the others.
+SCRAPER_MODULES = {
+    'petzl': 'Modules.Pitzl',
+    'edelrid': 'Modules.Edlerid',
+}
+
+SCRAPERS = {}
+
+
+class Scraper:
+    """
+    One brand's scraper as the runner sees it. Every brand module builds one
+    from its own functions and registers it:
+
+        discover(fetcher, emit)  awaits emit(product) for every product found (stages 1-2);
+                                 runners dedupe them by URL with a Modules.ProductIndex
+        fetch(fetcher, product, executor, backend)
+                                 fetches and parses one product; returns the record,
+                                 with an 'error' key if it failed (stage 3)
+        parse(html, backend)     turns a product page into a dict (no network)
+        run(**options)           the module's complete main coroutine
+        write(output_format)     builds the output file from the journal (stage 4)
+    """
+    def __init__(self, name, label, discover, fetch, parse, run, journal_file, output_base,
+                 max_concurrency=MAX_CONCURRENCY):
+        self.name = name
+        self.label = label
+        self.discover = discover
+        self.fetch = fetch
+        self.parse = parse
+        self.run = run
+        self.journal_file = journal_file
+        self.output_base = output_base
+        self.max_concurrency = max_concurrency
+
+    def write(self, output_format=OUTPUT_FORMAT):
+        return write_output(self.journal_file, self.output_base, output_format)
+
+
+def register(scraper):
+    SCRAPERS[scraper.name] = scraper
+    return scraper
+
+
+def get_scraper(name):
+    """Returns the registered scraper called `name`, importing its module on first use."""
+    if name not in SCRAPERS:
+        if name not in SCRAPER_MODULES:
+            raise KeyError(f"Unknown scraper '{name}' (available: {', '.join(SCRAPER_MODULES)})")
+        importlib.import_module(SCRAPER_MODULES[name])
+    return SCRAPERS[name]
+
+
+def all_scrapers():
+    return [get_scraper(name) for name in SCRAPER_MODULES]
+
+
+async def run_scrapers(names, max_concurrency=None, session=None, progress=None, **options):
+    """
+    Runs the selected scrapers at the same time in the current event loop,
+    over one shared session, so a full refresh takes as long as the slowest
+    site rather than the sum of all of them. Each site keeps its own per-host
+    limiter: `max_concurrency` is one limit for every site, a dict of
+    {name: limit}, or None for each scraper's default. Other keyword
+    arguments (resume, control, parse_backend, ...) go to every scraper's run().
+    A scraper that crashes is reported without stopping the others.
+
+    Returns {name: exception or None}.
+    """
+    from Modules.Http import shared_session  # Keeps importing the registry cheap (no aiohttp)
+
+    scrapers = [get_scraper(name) for name in names]
+
+    def limit_for(scraper):
+        if isinstance(max_concurrency, dict):
+            return max_concurrency.get(scraper.name, scraper.max_concurrency)
+        return max_concurrency or scraper.max_concurrency
+
+    combined = CombinedProgress(progress) if progress else None
+    async with shared_session(session, limit_per_host=max(limit_for(s) for s in scrapers)) as session:
+        results = await asyncio.gather(
+            *(scraper.run(session=session, max_concurrency=limit_for(scraper),
+                          progress=combined.part(scraper.name) if combined else None, **options)
+              for scraper in scrapers),
+            return_exceptions=True)
+
+    outcome = {}
+    for scraper, result in zip(scrapers, results):
+        if isinstance(result, BaseException):
+            print(f"\n❌ {scraper.label} failed: {result}")
+        outcome[scraper.name] = result if isinstance(result, BaseException) else None
+    return outcome
@@ -0,0 +1,227 @@
+"""
+Record a crawl into an archive and replay it from a local aiohttp server.
+
+Record with `main_pitzl(record_dir='petzl_archive')` (or `main_edelrid`), then
+serve the archive and point a scraper at it with `replay_url`:
+
+    python -m Modules.Replay petzl_archive --port 8799 --latency 0.05 --jitter 0.02 --error-rate 0.02
+
+    await main_pitzl(replay_url='http://127.0.0.1:8799', cache_dir=None)
+
+The server answers by path and query, so links to the real site found in the
+archived pages are redirected too (see Fetcher's `origin`).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from aiohttp import web
+
+# --- Configuration ---
+INDEX_FILE = 'index.jsonl'   # One line per recorded response
+BODIES_DIR = 'bodies'        # Bodies stored once per content hash
+REPLAY_HOST = '127.0.0.1'
+REPLAY_PORT = 8799
+
+
+def path_key(url):
+    """What the replay server matches a request on: path plus query."""
+    parts = urlsplit(url)
+    return urlunsplit(('', '', parts.path or '/', parts.query, ''))
+
+
+class _RecordingConsumer:
+    """Passes a body through to the scraper's consumer and archives it once complete."""
+    def __init__(self, recorder, url, consumer):
+        self.recorder = recorder
+        self.url = url
+        self.consumer = consumer
+        self._chunks = []
+
+    def begin(self, status, headers):
+        if hasattr(self.consumer, 'begin'):
+            self.consumer.begin(status, headers)
+
+    def feed(self, chunk):
+        self._chunks.append(chunk)
+        self.consumer.feed(chunk)
+
+    def close(self):
+        self.recorder.record(self.url, 200, b''.join(self._chunks))
+        return self.consumer.close()
+
+
+class ArchiveRecorder:
+    """
+    Appends every response a Fetcher returns to an archive directory:
+    `index.jsonl` maps each URL to its status and body hash, bodies live in
+    `bodies/<sha256>`. Bodies are held in memory until complete, so only
+    use it for recording runs.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.recorded = 0
+        os.makedirs(os.path.join(directory, BODIES_DIR), exist_ok=True)
+
+    def wrap(self, url, consumer_factory):
+        return lambda: _RecordingConsumer(self, url, consumer_factory())
+
+    def record(self, url, status, body=b''):
+        digest = None
+        if body:
+            digest = hashlib.sha256(body).hexdigest()
+            body_path = os.path.join(self.directory, BODIES_DIR, digest)
+            if not os.path.exists(body_path):
+                with open(body_path + '.tmp', 'wb') as f:
+                    f.write(body)
+                os.replace(body_path + '.tmp', body_path)
+        entry = {'url': url, 'status': status, 'body': digest, 'recorded_at': time.time()}
+        with open(os.path.join(self.directory, INDEX_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        self.recorded += 1
+
+
+def load_archive(directory):
+    """Returns {path_key: (status, body hash or None)}; a URL recorded twice keeps its last response."""
+    responses = {}
+    with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            responses[path_key(entry['url'])] = (entry['status'], entry['body'])
+    return responses
+
+
+class ReplayServer:
+    """
+    Serves an archive recorded by ArchiveRecorder with configurable network
+    behaviour, drawn from one seeded RNG so every run sees the same sequence:
+
+        latency / jitter  seconds added to every response (uniform +-jitter)
+        error_rate        fraction of requests answered with `error_status`
+        rate_limit        requests/second allowed (token bucket); excess gets
+                          429 with a Retry-After header
+
+    Bodies carry their hash as ETag, so cache revalidation returns 304.
+    """
+    def __init__(self, archive_dir, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 rate_limit=None, seed=0):
+        self.responses = load_archive(archive_dir)
+        self.bodies_dir = os.path.join(archive_dir, BODIES_DIR)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.stats = {'served': 0, 'not_modified': 0, 'injected_errors': 0, 'rate_limited': 0, 'not_found': 0}
+        self._tokens = rate_limit or 0
+        self._refilled = time.monotonic()
+        self._runner = None
+        self.url = None
+
+    def _take_token(self):
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def handle(self, request):
+        if not self._take_token():
+            self.stats['rate_limited'] += 1
+            return web.Response(status=429, headers={'Retry-After': '1'})
+
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.stats['injected_errors'] += 1
+            return web.Response(status=self.error_status)
+
+        recorded = self.responses.get(request.path_qs)
+        if recorded is None:
+            self.stats['not_found'] += 1
+            return web.Response(status=404)
+        status, digest = recorded
+        if digest is None:
+            return web.Response(status=status)
+
+        etag = f'"{digest}"'
+        if request.headers.get('If-None-Match') == etag:
+            self.stats['not_modified'] += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        with open(os.path.join(self.bodies_dir, digest), 'rb') as f:
+            body = f.read()
+        self.stats['served'] += 1
+        return web.Response(status=status, body=body, content_type='text/html', headers={'ETag': etag})
+
+    async def start(self, host=REPLAY_HOST, port=REPLAY_PORT):
+        """Starts serving and returns the base URL to pass as `replay_url` (port 0 picks a free port)."""
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start(port=0)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def summary(self):
+        return ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in self.stats.items())
+
+
+async def _serve(args):
+    server = ReplayServer(args.archive, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          error_status=args.error_status, rate_limit=args.rate_limit, seed=args.seed)
+    url = await server.start(args.host, args.port)
+    print(f"Replaying {len(server.responses)} responses from '{args.archive}' on {url} (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        print(f"Replay server: {server.summary()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a recorded crawl archive.")
+    parser.add_argument('archive', help="Directory written by a run with record_dir=...")
+    parser.add_argument('--host', default=REPLAY_HOST)
+    parser.add_argument('--port', type=int, default=REPLAY_PORT)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Latency varies uniformly by +- this much")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--rate-limit', type=float, help="Requests per second before 429s are returned")
+    parser.add_argument('--seed', type=int, default=0)
+    try:
+        asyncio.run(_serve(parser.parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import asyncio
+import random
+import aiohttp
+from urllib.parse import urlparse
+
+from Modules.Concurrency import parse_retry_after
+
+# --- Configuration ---
+MAX_ATTEMPTS = 4             # Attempts per request, including the first one
+BASE_DELAY = 1.0             # Backoff before the first retry (seconds), doubled per attempt
+MAX_DELAY = 30.0             # Cap on a single backoff
+RETRY_BUDGET = 20            # Retries always allowed per run...
+RETRY_BUDGET_RATIO = 0.1     # ...plus this fraction of all requests made, so an outage can't cause a retry storm
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error):
+    """Classifies a fetch error: timeouts, dropped connections and overload/5xx statuses are worth retrying."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+
+def describe_error(error):
+    if isinstance(error, aiohttp.ClientResponseError):
+        return f"HTTP {error.status}"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    return f"{type(error).__name__}: {error}"
+
+
+class RetryPolicy:
+    """
+    Retries retryable fetch errors with exponential backoff and full jitter,
+    up to `max_attempts` per request. All requests of a run draw on one
+    shared retry budget (`budget` plus `budget_ratio` of the requests made);
+    once it is spent, errors are raised straight away. A Retry-After header
+    is honoured as the minimum delay. Retries are counted in `metrics` if given.
+    """
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY,
+                 budget=RETRY_BUDGET, budget_ratio=RETRY_BUDGET_RATIO, metrics=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.budget_ratio = budget_ratio
+        self.requests = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.metrics = metrics
+
+    def backoff(self, attempt, error=None):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        headers = getattr(error, 'headers', None)
+        if headers and (retry_after := parse_retry_after(headers.get('Retry-After'))):
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def _take_budget(self):
+        if self.retries >= self.budget + self.budget_ratio * self.requests:
+            self.budget_exhausted += 1
+            return False
+        self.retries += 1
+        return True
+
+    async def call(self, func, url):
+        """Awaits `func()` and retries it on retryable errors; the last error is re-raised."""
+        self.requests += 1
+        attempt = 1
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_attempts:
+                    raise
+                if not self._take_budget():
+                    if self.metrics:
+                        self.metrics.inc('retry_budget_refusals_total', host=urlparse(url).netloc)
+                    raise
+                if self.metrics:
+                    self.metrics.inc('retries_total', host=urlparse(url).netloc, reason=describe_error(e))
+                delay = self.backoff(attempt, e)
+                attempt += 1
+                print(f"  - Retrying {url} in {delay:.1f}s after {describe_error(e)} "
+                      f"(attempt {attempt}/{self.max_attempts})")
+                await asyncio.sleep(delay)
+
+    def summary(self):
+        text = f"Retries: {self.retries} used for {self.requests} requests"
+        if self.budget_exhausted:
+            text += f", {self.budget_exhausted} refused because the run's retry budget was spent"
+        return text
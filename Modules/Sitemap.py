@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import zlib
+
+import aiohttp
+from lxml import etree
+
+from Modules.Control import gather_or_cancel
+from Modules.Delta import load_index, INDEX_SUFFIX, SNAPSHOT_SUFFIX
+from Modules.Journal import latest_offsets, read_record
+from Modules.ProductIndex import canonical_url
+
+# --- Configuration ---
+LASTMOD_SUFFIX = '.lastmod.json'  # Sitemap <lastmod> of every product as of its last good scrape
+MAX_SITEMAP_DEPTH = 3             # Sitemap indexes nested deeper than this are ignored
+DISCOVERY_MODES = ('categories', 'sitemap')
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+class SitemapParser:
+    """
+    Incremental reader for sitemap files (a <urlset> of pages or a
+    <sitemapindex> of further sitemaps), plain or gzipped. It is fed raw
+    chunks as they arrive, keeps only the <loc> and <lastmod> of every
+    <url> / <sitemap> entry and clears each entry once read, so a 50,000-URL
+    sitemap never becomes a tree in memory.
+    """
+    def __init__(self):
+        self._parser = etree.XMLPullParser(events=('end',), tag=('{*}url', '{*}sitemap'),
+                                           resolve_entities=False, no_network=True)
+        self._gunzip = None
+        self.urls = []      # (loc, lastmod) of the pages listed
+        self.sitemaps = []  # (loc, lastmod) of the sitemaps listed by an index
+        self.bytes_fed = 0
+
+    def feed(self, chunk):
+        if not self.bytes_fed and chunk.startswith(_GZIP_MAGIC):
+            # A .xml.gz file; gzip Content-Encoding is already undone by aiohttp
+            self._gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.bytes_fed += len(chunk)
+        self._parser.feed(self._gunzip.decompress(chunk) if self._gunzip else chunk)
+        self._drain()
+
+    def close(self):
+        if self.bytes_fed:
+            if self._gunzip:
+                self._parser.feed(self._gunzip.flush())
+            self._parser.close()
+            self._drain()
+        return self
+
+    def _drain(self):
+        for _, element in self._parser.read_events():
+            loc = (element.findtext('{*}loc') or '').strip()
+            lastmod = (element.findtext('{*}lastmod') or '').strip() or None
+            if loc:
+                (self.sitemaps if etree.QName(element).localname == 'sitemap' else self.urls).append((loc, lastmod))
+            # Drop everything already processed
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+async def read_sitemap(fetcher, url, emit_url, headers=None, depth=0):
+    """
+    Streams the sitemap at `url` and awaits `emit_url(loc, lastmod)` for every
+    page it lists; the sitemaps of a sitemap index are read concurrently.
+    A sitemap that fails to download is reported and skipped.
+    """
+    try:
+        sitemap = await fetcher.stream(url, SitemapParser, headers=headers, polite=True, endpoint='sitemap')
+    except (aiohttp.ClientError, asyncio.TimeoutError, etree.LxmlError, zlib.error) as e:
+        print(f"  - Could not read sitemap {url}: {e}")
+        return
+    for loc, lastmod in sitemap.urls:
+        await emit_url(loc, lastmod)
+    if sitemap.sitemaps and depth >= MAX_SITEMAP_DEPTH:
+        print(f"  - Ignoring {len(sitemap.sitemaps)} sitemaps nested in {url}")
+        return
+    await gather_or_cancel(*(read_sitemap(fetcher, loc, emit_url, headers, depth + 1) for loc, _ in sitemap.sitemaps))
+
+
+async def discover_from_sitemap(fetcher, sitemap_url, routes, listing, emit, headers=None):
+    """
+    Sitemap-driven producer for the detail pipeline. Every page of the
+    sitemap matching one of `routes` ([(compiled pattern, emit)], first match
+    wins) is emitted straight away as {'category': None, 'product_url',
+    'lastmod'}. Meanwhile `listing(collect)` (the category crawl) runs only
+    to learn category membership; once both are done its products are
+    passed to the plain `emit`, so products the sitemap missed are still
+    scraped and the rest just gain their categories (callers dedupe with a
+    Modules.ProductIndex). Returns the number of sitemap products.
+    """
+    found = 0
+    listed = []
+
+    async def emit_url(loc, lastmod):
+        nonlocal found
+        for pattern, route in routes:
+            if pattern.search(loc):
+                found += 1
+                await route({'category': None, 'product_url': loc, 'lastmod': lastmod})
+                return
+
+    async def collect(product):
+        listed.append(product)
+
+    async def from_sitemap():
+        print(f"--- STAGE 1: Streaming product URLs from {sitemap_url} ---")
+        with fetcher.metrics.stage('1_sitemap'):
+            await read_sitemap(fetcher, sitemap_url, emit_url, headers)
+        print(f"  - {found} product pages in the sitemap")
+
+    await gather_or_cancel(from_sitemap(), listing(collect))
+    for product in listed:
+        await emit(product)
+    return found
+
+
+class LastmodFilter:
+    """
+    Skips products whose sitemap <lastmod> has not moved since their last
+    good scrape: instead of fetching the page again, `carry_over()` journals
+    the previous run's version from the delta snapshot (Modules/Delta.py). The
+    lastmods are kept in `<output_base>.lastmod.json` next to the snapshot.
+
+    With `output_base=None` nothing is skipped or saved; `take()` still
+    strips the 'lastmod' so it never reaches the records.
+    """
+    def __init__(self, output_base=None):
+        self.output_base = output_base
+        self.current = {}   # canonical URL -> lastmod seen in this run's sitemap
+        self.previous = {}
+        self.snapshot = {}
+        self.skipped = 0
+        if output_base:
+            self.state_file = output_base + LASTMOD_SUFFIX
+            self.snapshot_file = output_base + SNAPSHOT_SUFFIX
+            self.snapshot = load_index(output_base + INDEX_SUFFIX, self.snapshot_file)
+            if self.snapshot and os.path.exists(self.state_file):
+                with open(self.state_file, encoding='utf-8') as f:
+                    self.previous = json.load(f)
+
+    def take(self, product):
+        """Removes the product's 'lastmod' and remembers it; returns the product."""
+        lastmod = product.pop('lastmod', None)
+        if lastmod:
+            self.current[canonical_url(product['product_url'])] = lastmod
+        return product
+
+    def carry_over(self, product, journal):
+        """
+        If `product`'s lastmod hasn't moved since its last good scrape, journals
+        the previous run's record of it instead of a fetch and returns True.
+        """
+        key = canonical_url(product['product_url'])
+        lastmod = self.current.get(key)
+        if lastmod is None or self.previous.get(key) != lastmod or key not in self.snapshot:
+            return False
+        with open(self.snapshot_file, 'rb') as f:
+            journal.append(read_record(f, self.snapshot[key]['offset']))
+        self.skipped += 1
+        return True
+
+    def save(self, journal_path):
+        """
+        Stores the lastmod of every product whose latest journal entry is good;
+        products that failed, or were fetched without a lastmod, are dropped so
+        the next run fetches them. Products this run never reached keep theirs.
+        """
+        if not self.output_base:
+            return
+        state = dict(self.previous)
+        with open(journal_path, 'rb') as journal:
+            for key, offset in latest_offsets(journal_path).items():
+                if 'error' not in read_record(journal, offset) and key in self.current:
+                    state[key] = self.current[key]
+                else:
+                    state.pop(key, None)
+        with open(self.state_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(self.state_file + '.tmp', self.state_file)
+
+    def summary(self):
+        return f"{self.skipped} products unchanged since their sitemap lastmod, reused from the last run"
@@ -0,0 +1,252 @@
+import json
+import math
+import sqlite3
+import time
+
+from Modules.Delta import content_hash
+from Modules.Journal import latest_offsets, read_record
+from Modules.ProductIndex import with_categories
+from Modules.VariantExport import parse_number
+
+# --- Configuration ---
+DB_SUFFIX = '.sqlite'
+BATCH_SIZE = 500  # Products written per executemany batch (and transaction)
+VARIANT_COLUMNS = ('article_number', 'gtin', 'color', 'size', 'price_eur', 'stock_quantity')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,          -- canonical URL, the key across runs
+    product_url TEXT NOT NULL,
+    category TEXT,
+    title TEXT,
+    subtitle TEXT,
+    main_description TEXT,
+    content_hash TEXT NOT NULL,
+    updated_at REAL NOT NULL,          -- last run the content changed
+    seen_at REAL NOT NULL              -- last run the product was scraped
+);
+CREATE TABLE IF NOT EXISTS product_categories (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (product_id, category)
+);
+CREATE TABLE IF NOT EXISTS variants (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    article_number TEXT,
+    gtin TEXT,
+    color TEXT,
+    size TEXT,
+    price_eur REAL,
+    stock_quantity INTEGER,
+    attributes TEXT NOT NULL,          -- the whole reference as JSON (sizes, weights, ...)
+    price_text TEXT,                   -- the price as the site wrote it ('12,99 €'), when it was text
+    PRIMARY KEY (product_id, position)
+);
+CREATE TABLE IF NOT EXISTS specifications (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (product_id, position)
+);
+CREATE TABLE IF NOT EXISTS features (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (product_id, position)
+);
+CREATE TABLE IF NOT EXISTS images (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    kind TEXT NOT NULL,                -- 'full' or 'thumbnail'
+    url TEXT NOT NULL,
+    local_path TEXT,
+    PRIMARY KEY (product_id, kind, position)
+);
+CREATE TABLE IF NOT EXISTS documents (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    heading TEXT,
+    title TEXT,
+    url TEXT NOT NULL,
+    local_path TEXT,
+    PRIMARY KEY (product_id, position)
+);
+CREATE INDEX IF NOT EXISTS variants_article_number ON variants (article_number);
+CREATE INDEX IF NOT EXISTS variants_gtin ON variants (gtin);
+CREATE INDEX IF NOT EXISTS product_categories_category ON product_categories (category);
+CREATE INDEX IF NOT EXISTS products_product_url ON products (product_url);
+"""
+
+CHILD_TABLES = ('product_categories', 'variants', 'specifications', 'features', 'images', 'documents')
+# Columns added after the first release, as (table, column, type); appended to older stores on connect
+MIGRATIONS = (('variants', 'price_text', 'TEXT'),)
+
+
+def connect(db_path):
+    """Opens (and creates) the store in WAL mode, so readers keep querying while a run writes."""
+    db = sqlite3.connect(db_path)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.execute('PRAGMA foreign_keys=ON')
+    db.executescript(SCHEMA)
+    for table, column, kind in MIGRATIONS:
+        if column not in {row[1] for row in db.execute(f'PRAGMA table_info({table})')}:
+            db.execute(f'ALTER TABLE {table} ADD COLUMN {column} {kind}')
+    return db
+
+
+def _number(value, kind):
+    """
+    Prices and stock arrive as numbers (Edelrid) or text (Petzl, '1.299,00 €');
+    text is read with parse_number(). Anything without a number stays NULL,
+    the raw price text is kept in `variants.price_text`.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        number = parse_number(value)
+        return None if math.isnan(number) else kind(number)
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value):
+    return value if value is None or isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def child_rows(product_id, record):
+    """The normalised rows of one product, as {table: [row tuple, ...]}."""
+    rows = {table: [] for table in CHILD_TABLES}
+    assets = record.get('assets') or {}
+    for position, category in enumerate(record.get('categories') or []):
+        rows['product_categories'].append((product_id, category, position))
+    for position, ref in enumerate(record.get('references') or []):
+        price = ref.get('price_eur')
+        rows['variants'].append((
+            product_id, position, _text(ref.get('article_number') or ref.get('Reference')), _text(ref.get('gtin')),
+            _text(ref.get('color')), _text(ref.get('size')), _number(price, float),
+            _number(ref.get('stock_quantity'), int), json.dumps(ref, ensure_ascii=False),
+            price if isinstance(price, str) else None))
+    position = 0
+    for name, value in (record.get('specifications') or {}).items():
+        for item in value if isinstance(value, list) else [value]:
+            rows['specifications'].append((product_id, position, name, _text(item)))
+            position += 1
+    for position, text in enumerate(record.get('features') or []):
+        rows['features'].append((product_id, position, text))
+    gallery = record.get('gallery') or {}
+    for kind, key in (('full', 'full_images'), ('thumbnail', 'thumbnails')):
+        for position, url in enumerate(gallery.get(key) or []):
+            rows['images'].append((product_id, position, kind, url, assets.get(url)))
+    documents = record.get('technical_documents') or []
+    if isinstance(documents, dict):  # Petzl: {heading: [{'text', 'url'}]}
+        documents = [dict(document, heading=heading) for heading, group in documents.items() for document in group]
+    for position, document in enumerate(documents):
+        url = document.get('url') or document.get('link')
+        rows['documents'].append((product_id, position, document.get('heading'),
+                                  document.get('text') or document.get('name'), url, assets.get(url)))
+    return rows
+
+
+def _write_batch(db, batch, now):
+    """Upserts one batch of (key, record) pairs; products whose content hash is unchanged only get `seen_at`."""
+    placeholders = ','.join('?' * len(batch))
+    stored = dict(db.execute(f'SELECT url, content_hash FROM products WHERE url IN ({placeholders})',
+                             [key for key, _ in batch]))
+    changed = [(key, record, digest) for key, record in batch
+               if stored.get(key) != (digest := content_hash(record))]
+    db.executemany('UPDATE products SET seen_at = ? WHERE url = ?',
+                   [(now, key) for key, _ in batch if key in stored])
+    if not changed:
+        return 0
+
+    db.executemany(
+        """INSERT INTO products (url, product_url, category, title, subtitle, main_description,
+                                 content_hash, updated_at, seen_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(url) DO UPDATE SET
+               product_url = excluded.product_url, category = excluded.category, title = excluded.title,
+               subtitle = excluded.subtitle, main_description = excluded.main_description,
+               content_hash = excluded.content_hash, updated_at = excluded.updated_at, seen_at = excluded.seen_at""",
+        [(key, record['product_url'], record.get('category'), record.get('title'), record.get('subtitle'),
+          record.get('main_description'), digest, now, now) for key, record, digest in changed])
+
+    placeholders = ','.join('?' * len(changed))
+    ids = dict(db.execute(f'SELECT url, id FROM products WHERE url IN ({placeholders})',
+                          [key for key, _, _ in changed]))
+    for table in CHILD_TABLES:
+        db.executemany(f'DELETE FROM {table} WHERE product_id = ?', [(ids[key],) for key, _, _ in changed])
+    rows = {table: [] for table in CHILD_TABLES}
+    for key, record, _ in changed:
+        for table, table_rows in child_rows(ids[key], record).items():
+            rows[table].extend(table_rows)
+    for table, table_rows in rows.items():
+        if table_rows:
+            marks = ','.join('?' * len(table_rows[0]))
+            db.executemany(f'INSERT INTO {table} VALUES ({marks})', table_rows)
+    return len(changed)
+
+
+def write_sqlite(journal_path, db_path, categories=None, batch_size=BATCH_SIZE):
+    """
+    Upserts every finished product from the journal into the SQLite store
+    at `db_path`, `batch_size` products per executemany batch and
+    transaction. Products are keyed by canonical URL; one whose content hash
+    is unchanged since the last run is left alone apart from `seen_at`, a
+    changed one has its rows replaced. Products that failed this run keep
+    their previous rows, and products that disappeared are never deleted
+    (their `seen_at` stops moving). `categories` is applied as in write_output().
+
+    Returns (products written or refreshed, products seen).
+    """
+    now = time.time()
+    written = seen = 0
+    db = connect(db_path)
+    try:
+        with open(journal_path, 'rb') as journal:
+            batch = []
+            for key, offset in latest_offsets(journal_path).items():
+                record = read_record(journal, offset)
+                if 'error' in record:
+                    continue
+                batch.append((key, with_categories(record, categories)))
+                if len(batch) >= batch_size:
+                    with db:
+                        written += _write_batch(db, batch, now)
+                    seen += len(batch)
+                    batch = []
+            if batch:
+                with db:
+                    written += _write_batch(db, batch, now)
+                seen += len(batch)
+    finally:
+        db.close()
+    return written, seen
+
+
+def find_variants(db_path, article_number=None, gtin=None):
+    """Point lookup of variants by article number and/or GTIN, with their product's URL and title."""
+    conditions, params = [], []
+    if article_number is not None:
+        conditions.append('variants.article_number = ?')
+        params.append(article_number)
+    if gtin is not None:
+        conditions.append('variants.gtin = ?')
+        params.append(gtin)
+    if not conditions:
+        raise ValueError("Pass an article_number and/or a gtin")
+    db = sqlite3.connect(db_path)
+    db.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in db.execute(
+            f"""SELECT products.product_url, products.title, variants.*
+                FROM variants JOIN products ON products.id = variants.product_id
+                WHERE {' AND '.join(conditions)}""", params)]
+    finally:
+        db.close()
@@ -0,0 +1,218 @@
+"""
+Flat, columnar export of every variant (each entry of a product's
+'references') across the scrapers, for price and stock analytics:
+
+    python -m Modules.VariantExport [petzl edelrid] [--output variants]
+
+writes `variants.csv` plus a column file: `variants.parquet` with pyarrow,
+else `variants.npz` with NumPy (`pip install .[analytics]` for both).
+Prices, stock numbers and the weights and lengths found in the variant or
+the product's specifications are normalised to float columns (EUR, grams,
+metres; NaN when missing).
+"""
+import argparse
+import csv
+import math
+import os
+import re
+import sys
+
+from Modules.Journal import latest_offsets, read_record
+from Modules.ProductIndex import with_categories
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the normalisation falls back to plain Python
+    np = None
+
+# --- Configuration ---
+EXPORT_BASE = 'variants'
+TEXT_COLUMNS = ('brand', 'product_url', 'title', 'category', 'article_number', 'gtin', 'color', 'size')
+NUMBER_COLUMNS = ('price_eur', 'stock_quantity', 'weight_g', 'length_m')
+WEIGHT_FIELDS = ('Gewicht', 'Weight', 'weight')
+LENGTH_FIELDS = ('Länge', 'Length', 'length')
+WEIGHT_UNITS = {'g': 1.0, 'kg': 1000.0, 'mg': 0.001, 'oz': 28.3495, 'lb': 453.592, 'lbs': 453.592}
+LENGTH_UNITS = {'m': 1.0, 'mm': 0.001, 'cm': 0.01, 'km': 1000.0, 'in': 0.0254, 'ft': 0.3048}
+
+# A sign only counts where it can't be a range hyphen ('50-60 m')
+_NUMBER = r'(?:(?<![\w.,])[-+])?\d+(?:[.,]\d+)*'
+_NUMBER_RE = re.compile(_NUMBER)
+_QUANTITY = re.compile(rf'({_NUMBER})\s*([^\W\d]*)')
+_THOUSANDS = re.compile(r'[1-9]\d{0,2}[.,]\d{3}')  # '1.000', '12,500'; not '0,750'
+
+
+def parse_number(text):
+    """
+    '12,99 €' -> 12.99, '1.299,00' / '1,299.00' -> 1299.0, '1.000' -> 1000.0,
+    '-5 %' -> -5.0; NaN if there is no number. With both separators the last
+    one is the decimal point; a lone separator followed by exactly three
+    digits (or used more than once) groups thousands, unless it follows a 0.
+    """
+    match = _NUMBER_RE.search(text)
+    if not match:
+        return math.nan
+    number = match.group(0)
+    separators = [char for char in number if char in ',.']
+    if len(set(separators)) == 2:
+        decimal = separators[-1]
+    elif separators and (len(separators) > 1 or _THOUSANDS.fullmatch(number.lstrip('+-'))):
+        decimal = None
+    else:
+        decimal = separators[0] if separators else None
+    for separator in ',.':
+        if separator != decimal:
+            number = number.replace(separator, '')
+    return float(number.replace(',', '.'))
+
+
+def quantity_parser(units, default_unit):
+    """
+    Returns a parser for '1,2 kg' / '950 g' / '2 x 60 m' style text that
+    converts to one unit: the first number followed by one of `units` wins,
+    else the first bare number is read as `default_unit` (NaN if neither).
+    """
+    def parse(text):
+        bare = None
+        for match in _QUANTITY.finditer(text):
+            number, unit = match.groups()
+            if factor := units.get(unit.lower()):
+                return parse_number(number) * factor
+            if not unit and bare is None:
+                bare = number
+        return parse_number(bare) * units[default_unit] if bare is not None else math.nan
+    return parse
+
+
+def normalise(raw, parse):
+    """
+    Parses a column of raw values into floats. Catalogues repeat the same
+    few strings ('950 g', '60 m', prices) thousands of times, so every
+    distinct value is parsed once and the results are broadcast back over
+    the column: with NumPy through np.unique's inverse index, without it
+    through a dict. Returns a float64 array (or a list without NumPy).
+    """
+    texts = ['' if value is None else str(value) for value in raw]
+    if np is not None:
+        distinct, inverse = np.unique(np.array(texts, dtype=str), return_inverse=True)
+        parsed = np.array([parse(text) if text else np.nan for text in distinct], dtype=np.float64)
+        return parsed[inverse.reshape(-1)]
+    cache = {}
+    return [cache[text] if text in cache else cache.setdefault(text, parse(text) if text else math.nan)
+            for text in texts]
+
+
+def _first(mappings, fields):
+    for mapping in mappings:
+        for field in fields:
+            if mapping.get(field) not in (None, ''):
+                return mapping[field]
+    return None
+
+
+def variant_columns(brands):
+    """
+    Flattens the latest journal records of `brands` ({brand: journal path})
+    into columns: {name: list of raw values}, one entry per variant.
+    Missing journals (scrapers that never ran here) are skipped.
+    """
+    columns = {name: [] for name in TEXT_COLUMNS + NUMBER_COLUMNS}
+    for brand, journal_path in brands.items():
+        if not os.path.exists(journal_path):
+            print(f"No journal for {brand} at '{journal_path}'; skipping")
+            continue
+        with open(journal_path, 'rb') as journal:
+            for offset in latest_offsets(journal_path).values():
+                record = read_record(journal, offset)
+                if 'error' in record:
+                    continue
+                record = with_categories(record)
+                specifications = record.get('specifications') or {}
+                for ref in record.get('references') or []:
+                    row = {
+                        'brand': brand, 'product_url': record['product_url'], 'title': record.get('title'),
+                        'category': record.get('category'),
+                        'article_number': ref.get('article_number') or ref.get('Reference'),
+                        'gtin': ref.get('gtin'), 'color': ref.get('color'), 'size': ref.get('size'),
+                        'price_eur': ref.get('price_eur'), 'stock_quantity': ref.get('stock_quantity'),
+                        'weight_g': _first((ref, specifications), WEIGHT_FIELDS),
+                        'length_m': _first((ref, specifications), LENGTH_FIELDS),
+                    }
+                    for name, values in columns.items():
+                        values.append(row[name])
+    return columns
+
+
+def normalise_columns(columns):
+    """Replaces the raw number columns with normalised float columns (in place) and returns the columns."""
+    columns['price_eur'] = normalise(columns['price_eur'], parse_number)
+    columns['stock_quantity'] = normalise(columns['stock_quantity'], parse_number)
+    columns['weight_g'] = normalise(columns['weight_g'], quantity_parser(WEIGHT_UNITS, 'g'))
+    columns['length_m'] = normalise(columns['length_m'], quantity_parser(LENGTH_UNITS, 'm'))
+    return columns
+
+
+def write_csv(columns, output_file):
+    names = list(columns)
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        for row in zip(*(columns[name] for name in names)):
+            writer.writerow(['' if value is None or (isinstance(value, float) and math.isnan(value)) else value
+                             for value in row])
+    return output_file
+
+
+def write_columnar(columns, output_base):
+    """Writes `<output_base>.parquet` with pyarrow, else `<output_base>.npz` with NumPy; None if neither is installed."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        pa = None
+    if pa is not None:
+        arrays = {name: pa.array([None if value is None else str(value) for value in columns[name]], pa.string())
+                  for name in TEXT_COLUMNS}
+        arrays.update({name: pa.array(columns[name], pa.float64(), from_pandas=True) for name in NUMBER_COLUMNS})
+        pq.write_table(pa.table(arrays), output_base + '.parquet')
+        return output_base + '.parquet'
+    if np is not None:
+        arrays = {name: np.array(['' if value is None else str(value) for value in columns[name]], dtype=str)
+                  for name in TEXT_COLUMNS}
+        arrays.update({name: np.asarray(columns[name], dtype=np.float64) for name in NUMBER_COLUMNS})
+        np.savez_compressed(output_base + '.npz', **arrays)
+        return output_base + '.npz'
+    return None
+
+
+def export_variants(brands, output_base=EXPORT_BASE):
+    """
+    Exports every variant of `brands` ({brand: journal path}) to
+    `<output_base>.csv` and a column file. Returns (variant count, files written).
+    """
+    columns = normalise_columns(variant_columns(brands))
+    files = [write_csv(columns, output_base + '.csv')]
+    if columnar_file := write_columnar(columns, output_base):
+        files.append(columnar_file)
+    else:
+        print("Neither pyarrow nor NumPy is installed; only the CSV was written (pip install .[analytics])")
+    return len(columns['brand']), files
+
+
+def main(argv=None):
+    from Modules.Registry import SCRAPER_MODULES, get_scraper
+
+    parser = argparse.ArgumentParser(description="Export every scraped variant as CSV and a column file.")
+    parser.add_argument('scrapers', nargs='*', metavar='SCRAPER',
+                        help=f"Scrapers whose journals to export (default: all of {', '.join(SCRAPER_MODULES)})")
+    parser.add_argument('--output', default=EXPORT_BASE, metavar='BASE',
+                        help=f"Output path without extension (default: {EXPORT_BASE})")
+    args = parser.parse_args(argv)
+
+    brands = {name: get_scraper(name).journal_file for name in args.scrapers or SCRAPER_MODULES}
+    count, files = export_variants(brands, args.output)
+    print(f"Exported {count} variants to {', '.join(files)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
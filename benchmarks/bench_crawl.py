@@ -0,0 +1,94 @@
+"""
+End-to-end crawl benchmark against the local replay server (Modules/Replay.py).
+
+Replays a recorded archive with the chosen latency, jitter, error rate and
+rate limit, runs a scraper against it in a scratch directory and reports
+products/sec together with the fetcher and server statistics. The same
+archive and seed give the same server behaviour, so numbers can be compared
+across versions offline.
+
+    python -m benchmarks.bench_crawl pitzl petzl_archive --latency 0.05 --jitter 0.02 --error-rate 0.02
+
+`--workers N` crawls through a frontier with N worker processes instead
+(Modules/Frontier.py), to measure how the distributed mode scales.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+
+from Modules.Edlerid import main_edelrid
+from Modules.Frontier import coordinate
+from Modules.Journal import iter_journal
+from Modules.Pitzl import main_pitzl
+from Modules.Replay import ReplayServer
+
+SCRAPERS = {
+    'pitzl': (main_pitzl, 'petzl_run.journal.jsonl', 'petzl'),
+    'edelrid': (main_edelrid, 'edelrid_run.journal.jsonl', 'edelrid'),
+}
+
+
+async def run_crawl(scraper, archive, server_options, scraper_options, quiet=True, workers=None):
+    """Runs one crawl against a fresh replay server; returns (products, errors, seconds, server)."""
+    main_function, journal_file, name = SCRAPERS[scraper]
+    if workers:
+        main_function = partial(coordinate, name, workers=workers)
+    async with ReplayServer(archive, **server_options) as server:
+        with tempfile.TemporaryDirectory() as scratch:
+            previous_dir = os.getcwd()
+            os.chdir(scratch)  # Journal and output files are written to the working directory
+            try:
+                output = open(os.devnull, 'w') if quiet else None
+                with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+                    started = time.perf_counter()
+                    await main_function(replay_url=server.url, cache_dir=None, **scraper_options)
+                    elapsed = time.perf_counter() - started
+                if output:
+                    output.close()
+                records = [record for _, record in iter_journal(journal_file)] if os.path.exists(journal_file) else []
+            finally:
+                os.chdir(previous_dir)
+    errors = sum(1 for record in records if record.get('error'))
+    return len(records), errors, elapsed, server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scraper', choices=sorted(SCRAPERS))
+    parser.add_argument('archive', help="Directory written by a run with record_dir=...")
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-concurrency', type=int, help="Override the scraper's MAX_CONCURRENCY")
+    parser.add_argument('--politeness-delay', type=float, default=0.0)
+    parser.add_argument('--parse-backend', choices=['bs4', 'lxml'])
+    parser.add_argument('--workers', type=int, help="Crawl through a frontier with this many worker processes")
+    parser.add_argument('--verbose', action='store_true', help="Show the scraper's own output")
+    args = parser.parse_args(argv)
+
+    server_options = {'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+                      'rate_limit': args.rate_limit, 'seed': args.seed}
+    scraper_options = {'politeness_delay': args.politeness_delay}
+    if args.max_concurrency:
+        scraper_options['max_concurrency'] = args.max_concurrency
+    if args.parse_backend:
+        scraper_options['parse_backend'] = args.parse_backend
+
+    products, errors, elapsed, server = asyncio.run(
+        run_crawl(args.scraper, args.archive, server_options, scraper_options, quiet=not args.verbose,
+                  workers=args.workers))
+    print(f"{args.scraper}: {products} products ({errors} with errors) in {elapsed:.2f}s "
+          f"= {products / elapsed:.1f} products/sec")
+    print(f"Replay server: {server.summary()}")
+    return 0 if products else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Offline benchmark for the product-page parsers and listing extractors.
+
+Times every parser over the saved pages in benchmarks/fixtures/ and reports
+pages/sec, p50/p99 per-page latency and peak Python heap per benchmark.
+Every pass also times a fixed reference workload (a synthetic page parsed
+with bs4 and lxml), and each benchmark's cost per page is expressed in
+units of it, so the comparison holds across machines. Results can be stored as a baseline and
+later runs are compared against it; a benchmark whose relative cost (or
+peak memory) grew past the threshold is flagged and the script exits
+non-zero. Needs no network access.
+
+Fixture layout (one saved response per .html file):
+    fixtures/petzl/            Petzl product pages
+    fixtures/edelrid/          Edelrid product pages
+    fixtures/petzl_listing/    Petzl category pages
+    fixtures/edelrid_listing/  Edelrid category pages and limit=9999 listing responses
+
+    python -m benchmarks.bench_parsers                  # run and compare with the baseline
+    python -m benchmarks.bench_parsers --save-baseline  # run and store a new baseline
+    python -m benchmarks.bench_parsers --collect 50     # one-off, online: save 50 pages per site
+    python -m benchmarks.bench_parsers --collect 50 --locale en  # ... from the English site
+
+The committed corpus is a small synthetic set; baseline.json was produced
+from it and holds only relative costs, never raw host timings. Re-save the
+baseline after changing the corpus or the parsers on purpose.
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from Modules import Edlerid, Pitzl
+from Modules.LxmlHelpers import html_tree
+
+BENCH_DIR = Path(__file__).parent
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+BASELINE_FILE = BENCH_DIR / 'baseline.json'
+REGRESSION_THRESHOLD = 0.5   # Flag a 50% rise in relative cost or peak memory (timings here are noisy)
+REFERENCE_ROWS = 50          # Size of the synthetic reference page (about one product page of work)
+BASELINE_KEYS = ('pages', 'relative_cost', 'peak_mb')  # Host-independent, so the only numbers committed
+
+
+def _soup(html):
+    return BeautifulSoup(html, 'lxml')
+
+
+def _stream_grid(html, chunk_size=64 * 1024):
+    parser = Edlerid.EdelridGridParser()
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+    return parser.close().product_paths
+
+
+# name -> (fixture directory, prepare(html) run outside the timer or None, function timed per page)
+BENCHMARKS = {
+    'petzl.parse_product_page[bs4]': ('petzl', None, partial(Pitzl.parse_product_page, backend='bs4')),
+    'petzl.parse_product_page[lxml]': ('petzl', None, partial(Pitzl.parse_product_page, backend='lxml')),
+    'petzl.parse_product_details': ('petzl', _soup, Pitzl.parse_product_details),
+    'petzl.parse_product_details_lxml': ('petzl', html_tree, Pitzl.parse_product_details_lxml),
+    'edelrid.parse_product_page[bs4]': ('edelrid', None, partial(Edlerid.parse_product_page_edelrid, backend='bs4')),
+    'edelrid.parse_product_page[lxml]': ('edelrid', None, partial(Edlerid.parse_product_page_edelrid, backend='lxml')),
+    'edelrid.parse_product_details_edelrid': ('edelrid', _soup, Edlerid.parse_product_details_edelrid),
+    'edelrid.parse_product_details_edelrid_lxml': ('edelrid', html_tree, Edlerid.parse_product_details_edelrid_lxml),
+    'edelrid.extract_features_list': ('edelrid', _soup, Edlerid.extract_features_list),
+    'edelrid.extract_features_list_lxml': ('edelrid', html_tree, Edlerid.extract_features_list_lxml),
+    'edelrid.extract_download_links': ('edelrid', _soup, Edlerid.extract_download_links),
+    'edelrid.extract_download_links_lxml': ('edelrid', html_tree, Edlerid.extract_download_links_lxml),
+    'petzl.extract_category_products': ('petzl_listing', None, partial(Pitzl.extract_category_products, category_name='bench')),
+    'edelrid.EdelridGridParser': ('edelrid_listing', None, _stream_grid),
+}
+
+
+def _reference_page(rows=REFERENCE_ROWS):
+    cells = ''.join(f'<tr class="row"><th>Item {i}</th><td><a href="/p/{i}">{i * 7 % 101} g</a></td></tr>'
+                    for i in range(rows))
+    return f'<html><body><div id="main"><table>{cells}</table></div></body></html>'.encode('utf-8')
+
+
+def _reference_workload(html):
+    soup = BeautifulSoup(html, 'lxml')
+    bs4_cells = [(row.th.get_text(strip=True), row.a['href']) for row in soup.select('tr.row')]
+    lxml_cells = html_tree(html).xpath('//tr[@class="row"]/td/a/@href')
+    return len(bs4_cells) + len(lxml_cells)
+
+
+def _time_reference(html):
+    started = time.perf_counter()
+    _reference_workload(html)
+    return time.perf_counter() - started
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_benchmark(name, pages, repeat):
+    """Times one benchmark over `pages` and returns its result dict, or None without fixtures."""
+    _, prepare, func = BENCHMARKS[name]
+    if not pages:
+        return None
+    args = [prepare(html) if prepare else html for html in pages]
+
+    reference_html = _reference_page()
+
+    # Each page keeps its fastest run over `repeat` passes (like timeit), which
+    # filters out scheduler noise for the latency columns. The gated number is
+    # the median over passes of (pass time per page / reference time), with
+    # the reference timed inside the same pass so a slow spell hits both.
+    best = [float('inf')] * len(args)
+    ratios = []
+    with contextlib.redirect_stdout(io.StringIO()):  # Parser warnings would skew the timings
+        for arg in args:  # Warm-up
+            func(arg)
+        _reference_workload(reference_html)
+        gc.disable()  # Collections would land on whichever page happens to trigger them
+        try:
+            for _ in range(repeat):
+                reference = _time_reference(reference_html)
+                total = 0.0
+                for i, arg in enumerate(args):
+                    started = time.perf_counter()
+                    func(arg)
+                    elapsed = time.perf_counter() - started
+                    best[i] = min(best[i], elapsed)
+                    total += elapsed
+                ratios.append(total / len(args) / reference)
+        finally:
+            gc.enable()
+
+        # Separate pass for memory, tracemalloc slows everything down
+        tracemalloc.start()
+        for arg in args:
+            func(arg)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    latencies = sorted(best)
+    return {
+        'pages': len(pages),
+        'pages_per_sec': len(latencies) / sum(latencies),
+        'p50_ms': _percentile(latencies, 0.50) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'peak_mb': peak / 1e6,
+        'relative_cost': statistics.median(ratios),
+    }
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Returns human-readable regression messages for results whose relative
+    cost or peak memory is worse than the baseline by more than `threshold`.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base or 'relative_cost' not in base:
+            continue
+        if result['relative_cost'] > base['relative_cost'] * (1 + threshold):
+            regressions.append(f"{name}: {result['relative_cost']:.4g} vs {base['relative_cost']:.4g} "
+                               f"reference units per page in the baseline")
+        if result['peak_mb'] > base['peak_mb'] * (1 + threshold) and result['peak_mb'] - base['peak_mb'] > 1:
+            regressions.append(f"{name}: peak {result['peak_mb']:.1f} MB vs {base['peak_mb']:.1f} MB baseline")
+    return regressions
+
+
+def print_report(results):
+    print(f"{'benchmark':48} {'pages':>6} {'pages/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'peak MB':>8} {'rel cost':>9}")
+    for name, result in results.items():
+        if result is None:
+            print(f"{name:48} {'no fixtures':>6}")
+            continue
+        print(f"{name:48} {result['pages']:>6} {result['pages_per_sec']:>9.1f} {result['p50_ms']:>8.2f} "
+              f"{result['p99_ms']:>8.2f} {result['peak_mb']:>8.2f} {result['relative_cost']:>9.4f}")
+
+
+# --- Fixture collection (the only part that needs the network) ---
+
+def _fixture_name(url):
+    return re.sub(r'[^A-Za-z0-9]+', '_', url.split('://', 1)[-1]).strip('_')[:150] + '.html'
+
+
+async def collect_fixtures(per_site, fixtures_dir=FIXTURES_DIR, locale=None):
+    """
+    Saves up to `per_site` product pages and the category pages of both
+    sites, crawling each scraper's own section in `locale` (default: the
+    scraper's DEFAULT_LOCALE).
+    """
+    from Modules.Http import Fetcher, create_session
+
+    def save(kind, url, body):
+        directory = fixtures_dir / kind
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / _fixture_name(url)).write_bytes(body)
+
+    async with create_session() as session:
+        fetcher = Fetcher(session)
+
+        products = []
+        for category in await Pitzl.fetch_categories(fetcher, locale or Pitzl.DEFAULT_LOCALE):
+            body = await fetcher.get(category['url'], headers=Pitzl.HEADERS, polite=True)
+            save('petzl_listing', category['url'], body)
+            products.extend(Pitzl.extract_category_products(body, category['name']))
+        for product in products[:per_site]:
+            url = product['product_url']
+            save('petzl', url, await fetcher.get(url, headers=Pitzl.HEADERS))
+
+        products = []
+        start_url = Edlerid.section_url(locale or Edlerid.DEFAULT_LOCALE)
+        for category in await Edlerid.fetch_edelrid_categories(fetcher, start_url):
+            body = await fetcher.get(category['category_url'], headers=Edlerid.HEADERS, polite=True)
+            save('edelrid_listing', category['category_url'], body)
+            grid = Edlerid.EdelridGridParser()
+            grid.feed(body)
+            products.extend(grid.close().products(category['category_name']))
+        for product in products[:per_site]:
+            url = product['product_url']
+            save('edelrid', url, await fetcher.get(url, headers=Edlerid.HEADERS))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fixtures', type=Path, default=FIXTURES_DIR, help="Fixture root directory")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed passes over each corpus (fastest run per page counts)")
+    parser.add_argument('--only', help="Run only benchmarks whose name contains this text")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--collect', type=int, metavar='N', help="Download N product pages per site into the fixtures (online)")
+    parser.add_argument('--locale', choices=sorted(set(Pitzl.LOCALES) & set(Edlerid.LOCALES)),
+                        help="Locale to collect from (default: each scraper's DEFAULT_LOCALE)")
+    args = parser.parse_args(argv)
+
+    if args.collect:
+        asyncio.run(collect_fixtures(args.collect, args.fixtures, args.locale))
+        return 0
+
+    corpora = {}
+    results = {}
+    for name, (kind, _, _) in BENCHMARKS.items():
+        if args.only and args.only not in name:
+            continue
+        if kind not in corpora:
+            corpora[kind] = [page.read_bytes() for page in sorted((args.fixtures / kind).glob('*.html'))]
+        results[name] = run_benchmark(name, corpora[kind], args.repeat)
+    print_report(results)
+    results = {name: result for name, result in results.items() if result is not None}
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({
+            'python': platform.python_version(),
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'reference_rows': REFERENCE_ROWS,
+            'results': {name: {key: result[key] for key in BASELINE_KEYS} for name, result in results.items()},
+        }, indent=2))
+        print(f"\nBaseline saved to '{args.baseline}'")
+        return 0
+
+    if not args.baseline.exists():
+        print("\nNo baseline yet; run with --save-baseline to create one.")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if not regressions:
+        print("\nNo regressions against the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Cold-start benchmark for the headless CLI: time from process start to exit
+for the commands a cron job pays for before any network traffic.
+
+    python -m benchmarks.bench_startup [--runs 10]
+
+Add `-X importtime` to a single command to see where the time goes, e.g.
+    python -X importtime -m Modules.Cli --list 2> imports.txt
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    'python -c pass (interpreter only)': [sys.executable, '-c', 'pass'],
+    'scraper --list': [sys.executable, '-m', 'Modules.Cli', '--list'],
+    'scraper --help': [sys.executable, '-m', 'Modules.Cli', '--help'],
+    'load petzl scraper': [sys.executable, '-c', "from Modules.Registry import get_scraper; get_scraper('petzl')"],
+    'load edelrid scraper': [sys.executable, '-c', "from Modules.Registry import get_scraper; get_scraper('edelrid')"],
+    'load all scrapers': [sys.executable, '-c', "from Modules.Registry import all_scrapers; all_scrapers()"],
+}
+
+
+def time_command(command, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print(f"{'command':36} {'median ms':>10} {'best ms':>8}")
+    for name, command in COMMANDS.items():
+        median, best = time_command(command, args.runs)
+        print(f"{name:36} {median * 1000:>10.0f} {best * 1000:>8.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
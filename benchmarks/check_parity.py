@@ -0,0 +1,63 @@
+"""
+Checks that the 'bs4' and 'lxml' parse backends give identical product dicts.
+
+Runs both backends over every saved product page in
+benchmarks/fixtures/petzl/*.html and benchmarks/fixtures/edelrid/*.html
+(or the directories given on the command line) and exits non-zero if any
+page differs, or if a directory holds no pages at all. Needs no network
+access; tests/test_parity.py runs the same comparison under pytest.
+
+    python -m benchmarks.check_parity
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from Modules.Pitzl import parse_product_page
+from Modules.Edlerid import parse_product_page_edelrid
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+PARSERS = {
+    'petzl': parse_product_page,
+    'edelrid': parse_product_page_edelrid,
+}
+
+
+def check_site(site, directory):
+    """Returns (pages checked, list of mismatching page paths)."""
+    parse = PARSERS[site]
+    pages = sorted(Path(directory).glob('*.html'))
+    mismatches = []
+    for page in pages:
+        html = page.read_bytes()
+        expected = parse(html, backend='bs4')
+        actual = parse(html, backend='lxml')
+        if expected != actual:
+            mismatches.append(page)
+            print(f"MISMATCH {page}")
+            print(f"  bs4:  {json.dumps(expected, ensure_ascii=False)[:500]}")
+            print(f"  lxml: {json.dumps(actual, ensure_ascii=False)[:500]}")
+    return len(pages), mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--petzl', default=FIXTURES_DIR / 'petzl', help="Directory of saved Petzl product pages")
+    parser.add_argument('--edelrid', default=FIXTURES_DIR / 'edelrid', help="Directory of saved Edelrid product pages")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for site in PARSERS:
+        checked, mismatches = check_site(site, getattr(args, site))
+        if not checked:
+            print(f"{site}: no pages found in {getattr(args, site)}")
+            failed = True
+            continue
+        print(f"{site}: {checked - len(mismatches)}/{checked} pages identical")
+        failed = failed or bool(mismatches)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,36 +1,43 @@
 import asyncio
+import multiprocessing
+import queue
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 import threading
 import time
 import sys
 
-from Modules.Pitzl import main_pitzl
-from Modules.Edlerid import main_edelrid
+from Modules.Control import RunControl
+from Modules.Registry import all_scrapers, run_scrapers
+
+# --- Configuration ---
+UI_TICK_MS = 100          # How often the GUI drains the event queue
+MAX_LOG_LINES = 5000      # Scrollback kept in the log widget; older lines are dropped
+MAX_EVENTS_PER_TICK = 5000  # Keeps one tick short even if a worker floods the queue
 
 
 # === GUI Logger ===
-# This class redirects stdout (like print statements) to the GUI's text widget.
+# This class redirects stdout (like print statements) to the GUI's event queue.
 class GUILogger:
-    def __init__(self, text_widget):
-        self.text_widget = text_widget
+    def __init__(self, events):
+        self.events = events
 
     def write(self, message):
-        """Writes a message to the text widget in a thread-safe way."""
-        # Ensure UI updates happen on the main thread
-        self.text_widget.after(0, self._write, message)
-
-    def _write(self, message):
-        self.text_widget.configure(state='normal')
-        self.text_widget.insert(tk.END, message)
-        self.text_widget.see(tk.END)  # Auto-scroll to the bottom
-        self.text_widget.configure(state='disabled')
+        """Queues a message for the GUI; safe to call from any thread."""
+        if message:
+            self.events.put(('log', message))
 
     def flush(self):
         """Flush method is required for a stream-like object."""
         pass
 
 
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {seconds:02d}s"
+
+
 # === Main GUI Application ===
 class ScraperApp:
     def __init__(self, root):
@@ -44,14 +51,19 @@ class ScraperApp:
         self.style = ttk.Style()
         self.style.theme_use('clam')
         self.style.configure('TButton', font=('Arial', 10))
-        self.style.configure('TRadiobutton', font=('Arial', 10))
+        self.style.configure('TCheckbutton', font=('Arial', 10))
         self.style.configure('TLabelFrame.Label', font=('Arial', 11, 'bold'))
 
         self.create_widgets()
-        
+
+        # Worker threads never touch Tk: they put ('log', text), ('progress', ProgressEvent)
+        # and ('done', None) on this queue and the Tk thread applies them in batches every tick.
+        self.events = queue.SimpleQueue()
+
         # Redirect print statements to the GUI logger
-        sys.stdout = GUILogger(self.log_text)
-        
+        sys.stdout = GUILogger(self.events)
+        self.root.after(UI_TICK_MS, self.drain_events)
+
         print("🚀 Application Ready. Please select a function and click 'Run'.")
 
     def create_widgets(self):
@@ -65,40 +77,67 @@ class ScraperApp:
         
         # Configure main_frame grid
         main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(2, weight=1) # Make log section expand
+        main_frame.rowconfigure(3, weight=1) # Make log section expand
 
         # --- Options Section ---
-        options_frame = ttk.LabelFrame(main_frame, text="Select a Function", padding="10")
+        options_frame = ttk.LabelFrame(main_frame, text="Select Scrapers", padding="10")
         options_frame.grid(row=0, column=0, sticky="ew", pady=(0, 15))
-        options_frame.columnconfigure(0, weight=1)
-        options_frame.columnconfigure(1, weight=1)
         
-        # Radio button variable
-        self.choice_var = tk.IntVar(value=1) # Default selection is function 1
+        # One checkbox per registered scraper; the selected ones run side by side
+        self.scraper_vars = {}
+        for column, scraper in enumerate(all_scrapers()):
+            self.scraper_vars[scraper.name] = tk.BooleanVar(value=column == 0)
+            check = ttk.Checkbutton(options_frame, text=f"Run {scraper.label}", variable=self.scraper_vars[scraper.name])
+            check.grid(row=0, column=column, sticky='w', padx=5, pady=5)
+            options_frame.columnconfigure(column, weight=1)
 
-        # Radio buttons
-        radio1 = ttk.Radiobutton(options_frame, text="Run Pitzl", variable=self.choice_var, value=1)
-        radio1.grid(row=0, column=0, sticky='w', padx=5, pady=5)
-        
-        radio2 = ttk.Radiobutton(options_frame, text="Run Edlerid", variable=self.choice_var, value=2)
-        radio2.grid(row=0, column=1, sticky='w', padx=5, pady=5)
+        # Resume from the run journal instead of starting from zero
+        self.resume_var = tk.BooleanVar(value=False)
+        resume_check = ttk.Checkbutton(options_frame, text="Resume previous run", variable=self.resume_var)
+        resume_check.grid(row=1, column=0, columnspan=len(self.scraper_vars), sticky='w', padx=5, pady=(0, 5))
+
+        # Optional stage: download gallery images and technical documents next to the output
+        self.assets_var = tk.BooleanVar(value=False)
+        assets_check = ttk.Checkbutton(options_frame, text="Download images and PDFs", variable=self.assets_var)
+        assets_check.grid(row=2, column=0, columnspan=len(self.scraper_vars), sticky='w', padx=5, pady=(0, 5))
+
+        # Optional SQLite store next to the JSON output, for article number / GTIN lookups
+        self.sqlite_var = tk.BooleanVar(value=False)
+        sqlite_check = ttk.Checkbutton(options_frame, text="Update SQLite database", variable=self.sqlite_var)
+        sqlite_check.grid(row=3, column=0, columnspan=len(self.scraper_vars), sticky='w', padx=5, pady=(0, 5))
         
         # --- Control Section ---
         control_frame = ttk.Frame(main_frame)
         control_frame.grid(row=1, column=0, sticky="ew", pady=(0, 15))
 
-        self.run_button = ttk.Button(control_frame, text="🚀 Run Selected Function", command=self.start_selected_function)
+        self.run_button = ttk.Button(control_frame, text="🚀 Run Selected", command=self.start_selected_function)
         self.run_button.pack(side=tk.LEFT, padx=(0, 10))
 
+        self.pause_button = ttk.Button(control_frame, text="⏸ Pause", command=self.toggle_pause, state='disabled')
+        self.pause_button.pack(side=tk.LEFT, padx=(0, 10))
+
+        self.cancel_button = ttk.Button(control_frame, text="⏹ Cancel", command=self.cancel_run, state='disabled')
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 10))
+
         clear_button = ttk.Button(control_frame, text="🗑 Clear Log", command=self.clear_log)
         clear_button.pack(side=tk.LEFT)
         
         self.status_label = ttk.Label(control_frame, text="Status: Ready")
         self.status_label.pack(side=tk.RIGHT, padx=10)
 
+        # --- Progress Section ---
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.grid(row=2, column=0, sticky="ew", pady=(0, 15))
+        progress_frame.columnconfigure(0, weight=1)
+
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate', maximum=1)
+        self.progress_bar.grid(row=0, column=0, sticky="ew")
+        self.progress_label = ttk.Label(progress_frame, text="")
+        self.progress_label.grid(row=1, column=0, sticky="w", pady=(5, 0))
+
         # --- Log Section ---
         log_frame = ttk.LabelFrame(main_frame, text="Logs", padding="10")
-        log_frame.grid(row=2, column=0, sticky="nsew")
+        log_frame.grid(row=3, column=0, sticky="nsew")
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
 
@@ -113,46 +152,124 @@ class ScraperApp:
         self.log_text.config(state='disabled')
         print("--- Log cleared ---")
 
+    def drain_events(self):
+        """Applies everything the workers queued since the last tick in one batch."""
+        messages = []
+        latest_progress = None
+        finished = False
+        try:
+            for _ in range(MAX_EVENTS_PER_TICK):
+                kind, payload = self.events.get_nowait()
+                if kind == 'log':
+                    messages.append(payload)
+                elif kind == 'progress':
+                    latest_progress = payload  # Only the newest one matters
+                elif kind == 'done':
+                    finished = True
+        except queue.Empty:
+            pass
+
+        try:
+            if messages:
+                self.append_log(''.join(messages))
+            if latest_progress:
+                self.show_progress(latest_progress)
+            if finished:
+                self.processing_complete()
+        finally:
+            self.root.after(UI_TICK_MS, self.drain_events)
+
+    def append_log(self, text):
+        self.log_text.configure(state='normal')
+        self.log_text.insert(tk.END, text)
+        line_count = int(self.log_text.index('end-1c').split('.')[0])
+        if line_count > MAX_LOG_LINES:
+            self.log_text.delete('1.0', f'{line_count - MAX_LOG_LINES + 1}.0')
+        self.log_text.see(tk.END)  # Auto-scroll to the bottom
+        self.log_text.configure(state='disabled')
+
+    def post_progress(self, event):
+        """Progress callback for the scrapers; called on the worker thread."""
+        self.events.put(('progress', event))
+
+    def show_progress(self, event):
+        self.progress_bar.configure(maximum=max(event.total, 1), value=event.done)
+        text = f"{event.done}/{event.total} products · {event.rate:.1f}/s · {event.errors} errors"
+        if event.finished:
+            text += " · done"
+        elif event.eta is not None:
+            text += f" · ETA {format_duration(event.eta)}"
+        self.progress_label.config(text=text)
+
     def start_selected_function(self):
-        """Starts the chosen function in a new thread to keep the GUI responsive."""
+        """Starts the selected scrapers in a new thread to keep the GUI responsive."""
+        selected = [name for name, var in self.scraper_vars.items() if var.get()]
+        if not selected:
+            print("Error: Select at least one scraper.")
+            return
+
         self.run_button.config(state='disabled')
         self.status_label.config(text="Status: Running...")
-        
-        selected_option = self.choice_var.get()
-        
-        if selected_option == 1:
-            target_function = main_pitzl
-        elif selected_option == 2:
-            target_function = main_edelrid
-        else:
-            print("Error: No valid function selected.")
-            self.processing_complete()
-            return
-            
+
+        self.progress_bar.configure(value=0, maximum=1)
+        self.progress_label.config(text="Discovering products...")
+
+        # The worker's event loop checks this before every new request
+        self.run_control = RunControl()
+        self.pause_button.config(state='normal', text="⏸ Pause")
+        self.cancel_button.config(state='normal')
+
         # Run the target function in a separate thread
-        processing_thread = threading.Thread(target=self.run_worker, args=(target_function,))
+        processing_thread = threading.Thread(target=self.run_worker,
+                                             args=(selected, self.resume_var.get(), self.run_control,
+                                                   self.assets_var.get(), self.sqlite_var.get()))
         processing_thread.daemon = True # Allows main app to exit even if thread is running
         processing_thread.start()
 
-    def run_worker(self, target_function):
-        """Worker that executes the long task and handles completion."""
+    def toggle_pause(self):
+        """Holds new requests (connections stay open) or lets them continue."""
+        if self.run_control.paused:
+            self.run_control.resume()
+            self.pause_button.config(text="⏸ Pause")
+            self.status_label.config(text="Status: Running...")
+            print("--- Resumed ---")
+        else:
+            self.run_control.pause()
+            self.pause_button.config(text="▶ Resume")
+            self.status_label.config(text="Status: Paused")
+            print("--- Paused: requests in flight will finish, no new ones are sent ---")
+
+    def cancel_run(self):
+        """Stops dispatching, lets in-flight requests finish and saves what was parsed."""
+        self.run_control.cancel()
+        self.pause_button.config(state='disabled')
+        self.cancel_button.config(state='disabled')
+        self.status_label.config(text="Status: Cancelling...")
+        print("--- Cancelling: finishing requests in flight and saving results ---")
+
+    def run_worker(self, scraper_names, resume=False, control=None, download_assets=False, sqlite=False):
+        """Worker that runs the selected scrapers concurrently in one event loop."""
         try:
-            asyncio.run(target_function())
+            asyncio.run(run_scrapers(scraper_names, resume=resume, progress=self.post_progress, control=control,
+                                     download_assets=download_assets, sqlite=sqlite))
         except Exception as e:
             print(f"\n❌ An error occurred: {e}\n")
         finally:
-            # Schedule the UI update on the main thread
-            self.root.after(0, self.processing_complete)
+            # The UI update happens on the main thread once the queue is drained
+            self.events.put(('done', None))
     
     def processing_complete(self):
         """Updates the GUI after the task is finished."""
         self.run_button.config(state='normal')
+        self.pause_button.config(state='disabled', text="⏸ Pause")
+        self.cancel_button.config(state='disabled')
         self.status_label.config(text="Status: Ready")
         print("--- Task finished. Ready for next operation. ---")
 
 
 # --- Main Execution ---
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Needed for the parse process pool in the py2app bundle
     root = tk.Tk()
     app = ScraperApp(root)
     root.mainloop()
\ No newline at end of file
@@ -1,10 +1,11 @@
+import sys
 from setuptools import setup
 
 APP = ['main.py']  # Replace with your script's filename
 OPTIONS = {
     'argv_emulation': True,
-    'includes': ['tkinter', 'bs4', 'requests', 'aiohttp', "asyncio", "time", "json", "urllib", "pathlib", "re"],
-    'packages': ['bs4', 'requests', 'aiohttp', "Modules"],
+    'includes': ['tkinter', 'bs4', 'lxml', 'aiohttp', 'brotli', "asyncio", "time", "json", "urllib", "pathlib", "re"],
+    'packages': ['bs4', 'lxml', 'aiohttp', "Modules"],
     'plist': {
         'CFBundleName': 'Pitzl Edelrid Scraper',
         'CFBundleDisplayName': 'Pitzl Edelrid Scraper',
@@ -14,8 +15,16 @@ OPTIONS = {
     }
 }
 
+# The macOS app bundle is only built with `python setup.py py2app`; a plain
+# `pip install .` (e.g. on a headless Linux server) just installs the CLI.
+APP_BUILD = dict(app=APP, options={'py2app': OPTIONS}, setup_requires=['py2app']) if 'py2app' in sys.argv else {}
+
 setup(
-    app=APP,
-    options={'py2app': OPTIONS},
-    setup_requires=['py2app'],
+    name='pitzl-edelrid-scraper',
+    version='0.1.0',
+    packages=['Modules'],
+    install_requires=['aiohttp', 'bs4', 'lxml'],
+    extras_require={'brotli': ['brotli'], 'analytics': ['numpy', 'pyarrow']},
+    entry_points={'console_scripts': ['scraper = Modules.Cli:main', 'scraper-frontier = Modules.Frontier:main']},
+    **APP_BUILD,
 )
@@ -0,0 +1,22 @@
+"""The parser benchmark gate: a clean checkout passes against the committed baseline, a real slowdown does not."""
+import json
+
+from benchmarks.bench_parsers import BASELINE_FILE, BASELINE_KEYS, REGRESSION_THRESHOLD, compare, main
+
+
+def test_committed_baseline_holds_only_relative_numbers():
+    baseline = json.loads(BASELINE_FILE.read_text())
+    assert baseline['results']
+    assert all(set(result) == set(BASELINE_KEYS) for result in baseline['results'].values())
+
+
+def test_clean_checkout_passes_the_gate(capsys):
+    assert main(['--repeat', '3']) == 0, capsys.readouterr().out
+
+
+def test_slowdown_past_the_threshold_is_flagged():
+    baseline = {'results': {'parser': {'pages': 5, 'relative_cost': 0.2, 'peak_mb': 0.5}}}
+    within = {'parser': {'pages': 5, 'relative_cost': 0.2 * (1 + REGRESSION_THRESHOLD * 0.9), 'peak_mb': 0.5}}
+    slower = {'parser': {'pages': 5, 'relative_cost': 0.2 * (1 + REGRESSION_THRESHOLD * 1.1), 'peak_mb': 0.5}}
+    assert compare(within, baseline) == []
+    assert len(compare(slower, baseline)) == 1
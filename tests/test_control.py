@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from Modules import Pitzl
+from Modules.Control import RunCancelled, gather_or_cancel
+from Modules.Metrics import RunMetrics
+
+
+def test_gather_or_cancel_returns_results_in_order():
+    async def value(v, delay):
+        await asyncio.sleep(delay)
+        return v
+
+    assert asyncio.run(gather_or_cancel(value(1, 0.02), value(2, 0))) == [1, 2]
+
+
+def test_gather_or_cancel_cancels_siblings():
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(5)
+        finished.append('slow')
+
+    async def cancelled():
+        raise RunCancelled()
+
+    async def run():
+        await asyncio.wait_for(gather_or_cancel(slow(), cancelled(), slow()), timeout=2)
+
+    with pytest.raises(RunCancelled):
+        asyncio.run(run())
+    assert finished == []
+
+
+class _CancellingFetcher:
+    """Serves a Petzl landing page; the first category cancels the run, the others hang until cancelled."""
+    def __init__(self):
+        self.metrics = RunMetrics('petzl')
+        self.pending = 0
+
+    async def get(self, url, **kwargs):
+        if url == Pitzl.section_url():
+            links = ''.join(f'<li class="ib"><a href="{Pitzl.BASE_URL}/cat{i}">Cat {i}</a></li>' for i in range(5))
+            return f'<div id="submenu_a2w200000011y8DAAQ"><ul>{links}</ul></div>'.encode()
+        if url.endswith('/cat0'):
+            raise RunCancelled()
+        self.pending += 1
+        try:
+            await asyncio.sleep(5)
+        finally:
+            self.pending -= 1
+        return b''
+
+
+def test_discovery_stops_on_cancel():
+    fetcher = _CancellingFetcher()
+
+    async def emit(product):
+        pass
+
+    async def run():
+        with pytest.raises(RunCancelled):
+            await Pitzl.discover_products(fetcher, emit)
+        return fetcher.pending  # Category fetches still running once the cancel has propagated
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=2)) == 0
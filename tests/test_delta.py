@@ -0,0 +1,60 @@
+import json
+
+from Modules.Delta import DELTA_SUFFIX, write_delta
+from Modules.Journal import RunJournal
+
+RECORD = {
+    'category': 'Harnesses', 'product_url': 'https://www.petzl.com/DE/de/Professional/Harnesses/ASTRO',
+    'title': 'ASTRO', 'specifications': {'Gewicht': '1,2 kg'},
+    'gallery': {'full_images': ['https://cdn.example/astro.jpg']},
+    'references': [{'Reference': 'C083AA00', 'color': 'black'}],
+}
+
+
+def run(tmp_path, name, record):
+    """Journals one run with `record` and returns (counts, delta entries)."""
+    journal_path = tmp_path / f'{name}.journal.jsonl'
+    with RunJournal(str(journal_path)) as journal:
+        journal.append(record)
+    delta_file, counts = write_delta(str(journal_path), str(tmp_path / 'output'))
+    with open(delta_file, encoding='utf-8') as f:
+        return counts, [json.loads(line) for line in f]
+
+
+def test_first_run_adds(tmp_path):
+    counts, entries = run(tmp_path, 'first', RECORD)
+    assert counts['added'] == 1
+    assert entries[0]['op'] == 'added'
+
+
+def test_toggling_download_assets_gives_an_empty_delta(tmp_path):
+    run(tmp_path, 'without', RECORD)
+    counts, entries = run(tmp_path, 'with', {**RECORD, 'assets': {'https://cdn.example/astro.jpg': 'assets/astro.jpg'}})
+    assert entries == []
+    assert counts == {'added': 0, 'removed': 0, 'changed': 0, 'unchanged': 1}
+    counts, entries = run(tmp_path, 'without_again', RECORD)
+    assert entries == []
+
+
+def test_other_locales_give_an_empty_delta(tmp_path):
+    run(tmp_path, 'de', RECORD)
+    counts, entries = run(tmp_path, 'de_en', {**RECORD, 'locale': 'de', 'locales': {'de': {'title': 'ASTRO'},
+                                                                                 'en': {'title': 'ASTRO'}}})
+    assert entries == []
+
+
+def test_site_change_is_reported(tmp_path):
+    run(tmp_path, 'before', RECORD)
+    changed = {**RECORD, 'specifications': {'Gewicht': '1,1 kg'}, 'assets': {'x': 'y'},
+               'references': [{'Reference': 'C083AA00', 'color': 'orange'}]}
+    counts, entries = run(tmp_path, 'after', changed)
+    assert counts['changed'] == 1
+    assert entries[0]['changes'] == [{'field': 'specifications.Gewicht', 'old': '1,2 kg', 'new': '1,1 kg'}]
+    assert entries[0]['references']['changed'][0]['reference'] == 'Reference:C083AA00'
+
+
+def test_category_move_is_reported(tmp_path):
+    run(tmp_path, 'before', RECORD)
+    counts, entries = run(tmp_path, 'after', {**RECORD, 'category': 'Rescue'})
+    assert counts['changed'] == 1
+    assert {change['field'] for change in entries[0]['changes']} == {'category', 'categories'}
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from Modules.Control import RunControl
+from Modules.Frontier import MAX_ATTEMPTS, Frontier, join_frontier
+from Modules.Journal import RunJournal, iter_journal
+
+BASE = 'https://www.petzl.com/DE/de/Professional/Harnesses'
+
+
+def products(*names):
+    return [{'category': 'Harnesses', 'product_url': f'{BASE}/{name}'} for name in names]
+
+
+def names(claimed):
+    return sorted(product['product_url'].rsplit('/', 1)[1] for product in claimed)
+
+
+@pytest.fixture
+def frontier_path(tmp_path):
+    return str(tmp_path / 'petzl.frontier.sqlite')
+
+
+@pytest.fixture
+def open_frontier(frontier_path):
+    """Opens connections to one frontier file, like separate worker processes would; closes them afterwards."""
+    opened = []
+
+    def open_():
+        frontier = asyncio.run(Frontier.open(frontier_path))
+        opened.append(frontier)
+        return frontier
+
+    yield open_
+    for frontier in opened:
+        frontier.close()
+
+
+def test_two_workers_never_claim_the_same_product(open_frontier):
+    first, second = open_frontier(), open_frontier()
+    assert first.add(products('ASTRO', 'AVAO', 'NEWTON', 'VOLT')) == 4
+    assert first.add(products('ASTRO')) == 0
+
+    claimed_first, reclaimed = first.claim('worker-1', limit=3)
+    claimed_second, _ = second.claim('worker-2', limit=3)
+    assert (len(claimed_first), reclaimed) == (3, 0)
+    assert names(claimed_second) == ['VOLT']
+    assert not set(names(claimed_first)) & set(names(claimed_second))
+    assert second.claim('worker-2')[0] == []
+    assert first.counts() == {'pending': 0, 'leased': 4, 'done': 0}
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(open_frontier):
+    first, second = open_frontier(), open_frontier()
+    first.add(products('ASTRO', 'AVAO'))
+    first.claim('worker-1', limit=1, lease=-1)  # Dies straight away: the lease is already over
+    first.claim('worker-1', limit=1)
+
+    claimed, reclaimed = second.claim('worker-2')
+    assert (names(claimed), reclaimed) == (['ASTRO'], 1)
+    assert second.claim('worker-3')[0] == []
+
+
+def test_heartbeat_keeps_the_lease(open_frontier):
+    first, second = open_frontier(), open_frontier()
+    first.add(products('ASTRO'))
+    first.claim('worker-1', lease=-1)
+    first.heartbeat('worker-1')
+    assert second.claim('worker-2')[0] == []
+
+
+def test_product_lost_too_often_is_given_up(open_frontier):
+    frontier = open_frontier()
+    frontier.add(products('ASTRO'))
+    for attempt in range(MAX_ATTEMPTS):
+        assert names(frontier.claim(f'worker-{attempt}', lease=-1)[0]) == ['ASTRO']
+    frontier.finish_discovery({})
+
+    assert frontier.claim('worker-last')[0] == []
+    assert frontier.finished()
+    assert frontier.counts() == {'pending': 0, 'leased': 0, 'done': 1}
+
+
+def test_release_and_complete(open_frontier, tmp_path):
+    frontier = open_frontier()
+    frontier.add(products('ASTRO', 'AVAO'))
+    frontier.finish_discovery({})
+    frontier.claim('worker-1')
+    frontier.release('worker-1')
+    assert frontier.counts()['pending'] == 2
+    assert not frontier.finished()
+
+    claimed, _ = frontier.claim('worker-2')
+    frontier.complete('worker-2', [dict(product, title=names([product])[0]) for product in claimed])
+    assert frontier.finished()
+    journal_path = str(tmp_path / 'petzl.journal.jsonl')
+    with RunJournal(journal_path) as journal:
+        assert frontier.export(journal) == 2
+    assert [record['title'] for _, record in iter_journal(journal_path)] == ['ASTRO', 'AVAO']
+
+
+def test_join_frontier_waits_for_the_coordinator(frontier_path):
+    async def run():
+        control = RunControl()
+        control.bind()
+        with pytest.raises(TimeoutError):
+            await join_frontier(frontier_path, control, wait=0)
+
+        coordinator = await Frontier.open(frontier_path)
+        await coordinator.call(coordinator.set_meta, 'scraper', 'petzl')
+        frontier, scraper_name = await join_frontier(frontier_path, control, wait=0)
+        frontier.close()
+        coordinator.close()
+        return scraper_name
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=5)) == 'petzl'
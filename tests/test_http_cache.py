@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+
+import aiohttp
+
+from Modules.Http import Fetcher
+from Modules.HttpCache import STALE_TEMP_AGE, CacheEntry, ResponseCache
+from Modules.Replay import ArchiveRecorder, ReplayServer
+
+URL = 'https://www.petzl.com/DE/de/Professional/Harnesses/ASTRO'
+BODY = '<html><h1>ASTRO</h1></html>'.encode('utf-8')
+
+
+def fetch_twice(tmp_path, default_ttl):
+    """
+    Fetches URL twice through a cache against the replay server; returns
+    (bodies, cache, server stats, the URL the cache stored it under).
+    """
+    ArchiveRecorder(str(tmp_path / 'archive')).record(URL, 200, BODY)
+    cache = ResponseCache(str(tmp_path / 'cache'), default_ttl=default_ttl, ttl_rules=[])
+
+    async def run():
+        async with ReplayServer(str(tmp_path / 'archive')) as server, aiohttp.ClientSession() as session:
+            fetcher = Fetcher(session, delay=0, cache=cache, origin=server.url)
+            return [await fetcher.get(URL) for _ in range(2)], server.stats, fetcher._target(URL)
+
+    bodies, stats, target = asyncio.run(asyncio.wait_for(run(), timeout=10))
+    return bodies, cache, stats, target
+
+
+def test_fresh_entry_is_served_from_disk(tmp_path):
+    bodies, cache, stats, _ = fetch_twice(tmp_path, default_ttl=3600)
+    assert bodies == [BODY, BODY]
+    assert (cache.misses, cache.hits, cache.revalidated) == (1, 1, 0)
+    assert (stats['served'], stats['not_modified']) == (1, 0)
+
+
+def test_stale_entry_is_revalidated_with_its_etag(tmp_path):
+    bodies, cache, stats, target = fetch_twice(tmp_path, default_ttl=0)
+    assert bodies == [BODY, BODY]
+    assert (cache.misses, cache.hits, cache.revalidated) == (1, 0, 1)
+    assert (stats['served'], stats['not_modified']) == (1, 1)
+    entry = cache.lookup(target)
+    assert entry.conditional_headers()['If-None-Match'] == entry.meta['etag']
+    assert entry.response_headers()['Content-Type'].startswith('text/html')
+
+
+def test_conditional_headers_carry_last_modified():
+    entry = CacheEntry({'etag': '"abc"', 'last_modified': 'Wed, 21 Oct 2026 07:28:00 GMT'}, None)
+    assert entry.conditional_headers() == {'If-None-Match': '"abc"',
+                                           'If-Modified-Since': 'Wed, 21 Oct 2026 07:28:00 GMT'}
+
+
+def test_stale_temp_files_are_removed_on_open(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store(URL, BODY, {'ETag': '"abc"'})
+    abandoned = cache.writer(URL + '?page=2', {})
+    abandoned._file.close()
+    in_flight = cache.writer(URL + '?page=3', {})
+    in_flight._file.close()
+    old = time.time() - STALE_TEMP_AGE - 1
+    os.utime(abandoned._tmp_path, (old, old))
+
+    reopened = ResponseCache(str(tmp_path))
+    assert not os.path.exists(abandoned._tmp_path)
+    assert os.path.exists(in_flight._tmp_path)
+    assert reopened.lookup(URL).read() == BODY
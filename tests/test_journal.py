@@ -0,0 +1,75 @@
+import json
+
+from Modules.Journal import RunJournal, iter_journal, latest_offsets, read_record
+
+URL = 'https://www.petzl.com/DE/de/Professional/Harnesses/ASTRO'
+
+
+def product(name, **fields):
+    return {'category': 'Harnesses', 'product_url': f'https://www.petzl.com/DE/de/Professional/Harnesses/{name}', **fields}
+
+
+def test_append_and_read_back(tmp_path):
+    path = str(tmp_path / 'run.journal.jsonl')
+    with RunJournal(path) as journal:
+        journal.append(product('ASTRO', title='ASTRO'))
+        journal.append(product('AVAO', title='AVAO'))
+    assert [record['title'] for _, record in iter_journal(path)] == ['ASTRO', 'AVAO']
+
+
+def test_latest_entry_wins(tmp_path):
+    path = str(tmp_path / 'run.journal.jsonl')
+    with RunJournal(path) as journal:
+        journal.append(product('ASTRO', error='Timeout'))
+        journal.append(product('AVAO', title='AVAO'))
+        journal.append(product('ASTRO', title='ASTRO'))
+    offsets = latest_offsets(path)
+    assert len(offsets) == 2
+    with open(path, 'rb') as f:
+        assert read_record(f, offsets[URL])['title'] == 'ASTRO'
+
+
+def test_resume_skips_finished_products(tmp_path):
+    path = str(tmp_path / 'run.journal.jsonl')
+    with RunJournal(path) as journal:
+        journal.append(product('ASTRO', title='ASTRO'))
+        journal.append(product('AVAO', error='HTTP Status 503'))
+        journal.append(product('NEWTON', error='Timeout'))
+        journal.append(product('NEWTON', title='NEWTON'))
+
+    with RunJournal(path, resume=True) as journal:
+        assert journal.is_done(product('ASTRO'))
+        assert journal.is_done(product('NEWTON'))
+        assert not journal.is_done(product('AVAO'))  # Failed: fetched again
+        assert not journal.is_done(product('VOLT'))
+        # The same page linked differently is still the same product
+        assert journal.is_done({'product_url': 'http://www.petzl.com/DE/de/Professional/Harnesses/ASTRO/?utm_source=x'})
+        journal.append(product('AVAO', title='AVAO'))
+    assert len(list(iter_journal(path))) == 5
+
+
+def test_fresh_run_starts_over(tmp_path):
+    path = str(tmp_path / 'run.journal.jsonl')
+    with RunJournal(path) as journal:
+        journal.append(product('ASTRO', title='ASTRO'))
+    with RunJournal(path) as journal:
+        assert not journal.is_done(product('ASTRO'))
+    assert list(iter_journal(path)) == []
+
+
+def test_truncated_last_line_is_tolerated(tmp_path):
+    path = tmp_path / 'run.journal.jsonl'
+    with RunJournal(str(path)) as journal:
+        journal.append(product('ASTRO', title='ASTRO'))
+    complete = path.read_bytes()
+    # A crash in the middle of the next write
+    path.write_bytes(complete + json.dumps(product('AVAO', title='AVAO')).encode()[:40])
+    assert [record['title'] for _, record in iter_journal(str(path))] == ['ASTRO']
+
+    with RunJournal(str(path), resume=True) as journal:
+        assert journal.is_done(product('ASTRO'))
+        assert not journal.is_done(product('AVAO'))
+        journal.append(product('AVAO', title='AVAO'))
+    # The partial line is dropped, so the new record starts on a fresh line
+    assert path.read_bytes().startswith(complete)
+    assert [record['title'] for _, record in iter_journal(str(path))] == ['ASTRO', 'AVAO']
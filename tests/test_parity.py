@@ -0,0 +1,29 @@
+"""The 'bs4' and 'lxml' parse backends must give identical product dicts."""
+import pytest
+
+from benchmarks.check_parity import FIXTURES_DIR, PARSERS
+
+PAGES = [(site, page) for site in PARSERS for page in sorted((FIXTURES_DIR / site).glob('*.html'))]
+
+
+@pytest.mark.parametrize('site', PARSERS)
+def test_fixtures_present(site):
+    assert list((FIXTURES_DIR / site).glob('*.html')), f"no {site} fixtures in {FIXTURES_DIR / site}"
+
+
+@pytest.mark.parametrize('site,page', PAGES, ids=[f"{site}/{page.name}" for site, page in PAGES])
+def test_backends_agree(site, page):
+    html = page.read_bytes()
+    parse = PARSERS[site]
+    expected = parse(html, backend='bs4')
+    assert expected.get('title')
+    assert parse(html, backend='lxml') == expected
+
+
+@pytest.mark.parametrize('site', PARSERS)
+@pytest.mark.parametrize('backend', ['bs4', 'lxml'])
+def test_http_charset_is_used(site, backend):
+    # Sniffing alone reads these Latin-1 bytes as windows-1250 ('naďve'); the Content-Type charset decides
+    html = ('<html><body><h1 class="productTitle">naïve Größe</h1>'
+            '<div class="ed-product-detail-banner-details-header"><h1>naïve Größe</h1></div></body></html>').encode('latin-1')
+    assert PARSERS[site](html, backend=backend, encoding='ISO-8859-1')['title'] == 'naïve Größe'
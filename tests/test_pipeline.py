@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from Modules.Control import RunCancelled
+from Modules.Pipeline import run_pipeline
+
+
+def run(produce, consume, on_result, **kwargs):
+    # A hang fails the test instead of blocking the suite
+    return asyncio.run(asyncio.wait_for(run_pipeline(produce, consume, on_result, **kwargs), timeout=5))
+
+
+async def produce_range(emit, count=50):
+    for i in range(count):
+        await emit(i)
+
+
+async def identity(item):
+    return item
+
+
+def test_consumes_every_item():
+    results = []
+    assert run(produce_range, identity, results.append, workers=4, queue_size=2) == 50
+    assert sorted(results) == list(range(50))
+
+
+def test_on_result_failure_is_raised():
+    def on_result(result):
+        raise OSError('disk full')
+
+    with pytest.raises(OSError, match='disk full'):
+        run(produce_range, identity, on_result, workers=3, queue_size=1)
+
+
+def test_consume_failure_is_raised():
+    async def consume(item):
+        if item == 7:
+            raise ValueError(item)
+        return item
+
+    with pytest.raises(ValueError):
+        run(produce_range, consume, lambda result: None, workers=2, queue_size=1)
+
+
+def test_producer_cancellation_keeps_results():
+    async def produce(emit):
+        await produce_range(emit, 5)
+        raise RunCancelled()
+
+    results = []
+    assert run(produce, identity, results.append, workers=2) == 5
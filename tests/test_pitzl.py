@@ -0,0 +1,22 @@
+import pytest
+
+from Modules.Pitzl import parse_product_page
+
+REFERENCES_PAGE = """<html><body><h1 class="productTitle">ASTRO</h1>
+<div class="refs"><h3>{heading}</h3><table><thead><tr><th>Ref.</th><th>C083AA00</th><th>C083AA01</th></tr></thead><tbody>
+<tr><td class="rowTitle">{reference})</td><td>C083AA00</td><td>C083AA01</td></tr>
+<tr><td class="rowTitle">{color})</td><td>black</td><td>yellow</td></tr>
+</tbody></table></div></body></html>"""
+
+
+@pytest.mark.parametrize('heading,reference,color', [
+    ('References', 'Reference', 'Color'),
+    ('Referenzen', 'Referenz', 'Farbe'),
+    ('Références', 'Référence', 'Couleur'),
+    ('Riferimenti', 'Riferimento', 'Colore'),
+])
+@pytest.mark.parametrize('backend', ['bs4', 'lxml'])
+def test_reference_rows_in_every_locale(heading, reference, color, backend):
+    html = REFERENCES_PAGE.format(heading=heading, reference=reference, color=color).encode('utf-8')
+    references = parse_product_page(html, backend=backend)['references']
+    assert [(ref['article_number'], ref['color']) for ref in references] == [('C083AA00', 'black'), ('C083AA01', 'yellow')]
@@ -0,0 +1,75 @@
+import sqlite3
+
+from Modules.Journal import RunJournal
+from Modules.SqliteStore import connect, find_variants, write_sqlite
+
+BASE = 'https://www.petzl.com/DE/de/Professional/Harnesses'
+
+
+def astro(**fields):
+    return {
+        'category': 'Harnesses', 'product_url': f'{BASE}/ASTRO', 'title': 'ASTRO',
+        'references': [
+            {'Reference': 'C083AA00', 'gtin': '3342540105295', 'color': 'black', 'price_eur': '1.299,00 €'},
+            {'Reference': 'C083AA01', 'gtin': '3342540105301', 'price_eur': 'auf Anfrage', 'stock_quantity': '7'},
+        ],
+        'specifications': {'Gewicht': '1050 g', 'Material': ['Nylon', 'Polyester']},
+        'features': ['Padded waist belt'],
+        'gallery': {'full_images': [f'{BASE}/astro.jpg'], 'thumbnails': []},
+        **fields,
+    }
+
+
+def write_journal(path, *records):
+    with RunJournal(str(path)) as journal:
+        for record in records:
+            journal.append(record)
+
+
+def test_journal_to_sqlite_round_trip(tmp_path):
+    journal, db_path = tmp_path / 'run.journal.jsonl', str(tmp_path / 'petzl.sqlite')
+    write_journal(journal, astro(), {'category': 'Harnesses', 'product_url': f'{BASE}/AVAO', 'error': 'Timeout'})
+    assert write_sqlite(str(journal), db_path) == (1, 1)
+
+    [variant] = find_variants(db_path, article_number='C083AA00')
+    assert (variant['product_url'], variant['title']) == (f'{BASE}/ASTRO', 'ASTRO')
+    assert (variant['gtin'], variant['color']) == ('3342540105295', 'black')
+    assert (variant['price_eur'], variant['price_text']) == (1299.0, '1.299,00 €')
+
+    [variant] = find_variants(db_path, gtin='3342540105301')
+    assert (variant['price_eur'], variant['price_text'], variant['stock_quantity']) == (None, 'auf Anfrage', 7)
+
+    db = sqlite3.connect(db_path)
+    try:
+        assert db.execute('SELECT name, value FROM specifications ORDER BY position').fetchall() == [
+            ('Gewicht', '1050 g'), ('Material', 'Nylon'), ('Material', 'Polyester')]
+        assert db.execute('SELECT category FROM product_categories').fetchall() == [('Harnesses',)]
+    finally:
+        db.close()
+
+
+def test_unchanged_products_are_only_seen(tmp_path):
+    journal, db_path = tmp_path / 'run.journal.jsonl', str(tmp_path / 'petzl.sqlite')
+    write_journal(journal, astro())
+    assert write_sqlite(str(journal), db_path) == (1, 1)
+    assert write_sqlite(str(journal), db_path) == (0, 1)
+
+    write_journal(journal, astro(title='ASTRO BOD'))
+    assert write_sqlite(str(journal), db_path) == (1, 1)
+    assert find_variants(db_path, article_number='C083AA00')[0]['title'] == 'ASTRO BOD'
+    assert len(find_variants(db_path, article_number='C083AA01')) == 1
+
+
+def test_older_store_gains_price_text(tmp_path):
+    db_path = str(tmp_path / 'petzl.sqlite')
+    db = sqlite3.connect(db_path)
+    db.execute("""CREATE TABLE variants (product_id INTEGER NOT NULL, position INTEGER NOT NULL,
+                  article_number TEXT, gtin TEXT, color TEXT, size TEXT, price_eur REAL, stock_quantity INTEGER,
+                  attributes TEXT NOT NULL, PRIMARY KEY (product_id, position))""")
+    db.close()
+    connect(db_path).close()
+
+    journal = tmp_path / 'run.journal.jsonl'
+    write_journal(journal, astro())
+    write_sqlite(str(journal), db_path)
+    assert find_variants(db_path, article_number='C083AA00')[0]['price_text'] == '1.299,00 €'
@@ -0,0 +1,58 @@
+import math
+
+import pytest
+
+from Modules.VariantExport import LENGTH_UNITS, WEIGHT_UNITS, parse_number, quantity_parser
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('12,99 €', 12.99),
+    ('1.299,00', 1299.0),
+    ('1.234.567', 1234567.0),
+    ('5', 5.0),
+    ('-5 %', -5.0),
+    ('+3', 3.0),
+    ('Rabatt: -12,5 %', -12.5),
+    ('50-60', 50.0),
+    ('1,299.00', 1299.0),
+    ('1.000', 1000.0),
+    ('€ 1.299,00', 1299.0),
+    ('12,5 mm', 12.5),
+    ('0,750', 0.75),
+    ('12,500', 12500.0),
+    ('2.5', 2.5),
+])
+def test_parse_number(text, expected):
+    assert parse_number(text) == pytest.approx(expected)
+
+
+def test_parse_number_without_number():
+    assert math.isnan(parse_number('n/a'))
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('60 m', 60.0),
+    ('2 x 60 m', 60.0),
+    ('2x60m', 60.0),
+    ('50-60 m', 60.0),
+    ('9,8 mm', 0.0098),
+    ('EN892 70 m', 70.0),
+    ('80', 80.0),
+])
+def test_length(text, expected):
+    assert quantity_parser(LENGTH_UNITS, 'm')(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('1,2 kg', 1200.0),
+    ('950 g', 950.0),
+    ('52 g/m', 52.0),
+    ('2 Stück à 350 g', 350.0),
+])
+def test_weight(text, expected):
+    assert quantity_parser(WEIGHT_UNITS, 'g')(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('text', ['', 'ca. 5 Meter', 'leicht'])
+def test_quantity_without_known_unit(text):
+    assert math.isnan(quantity_parser(LENGTH_UNITS, 'm')(text))